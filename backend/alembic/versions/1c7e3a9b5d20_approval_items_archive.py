@@ -0,0 +1,163 @@
+"""approval_items_archive and the archival of decided items
+
+Revision ID: 1c7e3a9b5d20
+Revises: f4b8c2d6a1e3
+Create Date: 2026-02-09 16:44:29.605318
+
+Decided items are moved by the archiver from approval_items to
+approval_items_archive once their decision is old enough. The archive has
+the same columns plus archived_at, and the same keyset indexes.
+approval_items gets a partial index on decision_at over decided rows, for
+picking archive batches. The stats trigger function learns to ignore the
+archiver's deletes: they move items, so the counters must not change.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '1c7e3a9b5d20'
+down_revision: Union[str, Sequence[str], None] = 'f4b8c2d6a1e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+STATS_FUNCTION = """
+CREATE OR REPLACE FUNCTION approval_item_stats_apply() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'DELETE' AND current_setting('approvals.archiving', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO approval_item_stats AS s (status, type, assigned_to, count)
+        SELECT status, type, coalesce(assigned_to, ''), count(*)
+        FROM new_rows GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+        ON CONFLICT (status, type, assigned_to)
+        DO UPDATE SET count = s.count + EXCLUDED.count;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO approval_item_stats AS s (status, type, assigned_to, count)
+        SELECT status, type, coalesce(assigned_to, ''), -count(*)
+        FROM old_rows GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+        ON CONFLICT (status, type, assigned_to)
+        DO UPDATE SET count = s.count + EXCLUDED.count;
+    ELSE
+        INSERT INTO approval_item_stats AS s (status, type, assigned_to, count)
+        SELECT status, type, assigned_to, sum(delta)
+        FROM (
+            SELECT status, type, coalesce(assigned_to, '') AS assigned_to, 1 AS delta
+            FROM new_rows
+            UNION ALL
+            SELECT status, type, coalesce(assigned_to, ''), -1 FROM old_rows
+        ) d
+        GROUP BY 1, 2, 3 HAVING sum(delta) <> 0 ORDER BY 1, 2, 3
+        ON CONFLICT (status, type, assigned_to)
+        DO UPDATE SET count = s.count + EXCLUDED.count;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+# as in f4b8c2d6a1e3
+PREVIOUS_STATS_FUNCTION = """
+CREATE OR REPLACE FUNCTION approval_item_stats_apply() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO approval_item_stats AS s (status, type, assigned_to, count)
+        SELECT status, type, coalesce(assigned_to, ''), count(*)
+        FROM new_rows GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+        ON CONFLICT (status, type, assigned_to)
+        DO UPDATE SET count = s.count + EXCLUDED.count;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO approval_item_stats AS s (status, type, assigned_to, count)
+        SELECT status, type, coalesce(assigned_to, ''), -count(*)
+        FROM old_rows GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+        ON CONFLICT (status, type, assigned_to)
+        DO UPDATE SET count = s.count + EXCLUDED.count;
+    ELSE
+        INSERT INTO approval_item_stats AS s (status, type, assigned_to, count)
+        SELECT status, type, assigned_to, sum(delta)
+        FROM (
+            SELECT status, type, coalesce(assigned_to, '') AS assigned_to, 1 AS delta
+            FROM new_rows
+            UNION ALL
+            SELECT status, type, coalesce(assigned_to, ''), -1 FROM old_rows
+        ) d
+        GROUP BY 1, 2, 3 HAVING sum(delta) <> 0 ORDER BY 1, 2, 3
+        ON CONFLICT (status, type, assigned_to)
+        DO UPDATE SET count = s.count + EXCLUDED.count;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+KEYSET_INDEXES = {
+    'ix_approval_items_archive_created_at_id': ['created_at', 'id'],
+    'ix_approval_items_archive_status_created_at_id': ['status', 'created_at', 'id'],
+    'ix_approval_items_archive_type_created_at_id': ['type', 'created_at', 'id'],
+    'ix_approval_items_archive_status_type_created_at_id':
+        ['status', 'type', 'created_at', 'id'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'approval_items_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('title', sa.String(length=200), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('type', sa.String(length=64), nullable=False),
+        sa.Column(
+            'payload_json', postgresql.JSONB(astext_type=sa.Text()), nullable=False
+        ),
+        sa.Column(
+            'status',
+            postgresql.ENUM(
+                'PENDING',
+                'APPROVED',
+                'REJECTED',
+                name='approval_status',
+                create_type=False,
+            ),
+            nullable=False,
+        ),
+        sa.Column('requested_by', sa.String(length=128), nullable=False),
+        sa.Column('assigned_to', sa.String(length=128), nullable=True),
+        sa.Column('idempotency_key', sa.String(length=128), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('decision_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('decision_by', sa.String(length=128), nullable=True),
+        sa.Column('decision_reason', sa.Text(), nullable=True),
+        sa.Column(
+            'archived_at',
+            sa.DateTime(timezone=True),
+            server_default=sa.text('now()'),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    for name, columns in KEYSET_INDEXES.items():
+        op.create_index(name, 'approval_items_archive', columns, unique=False)
+    op.create_index(
+        'ix_approval_items_decided_decision_at',
+        'approval_items',
+        ['decision_at'],
+        unique=False,
+        postgresql_where=sa.text("status != 'PENDING'"),
+    )
+    op.execute(STATS_FUNCTION)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(PREVIOUS_STATS_FUNCTION)
+    op.drop_index('ix_approval_items_decided_decision_at', table_name='approval_items')
+    for name in KEYSET_INDEXES:
+        op.drop_index(name, table_name='approval_items_archive')
+    op.drop_table('approval_items_archive')
@@ -0,0 +1,38 @@
+"""create embedding_cache
+
+Revision ID: 2f8a6d3b9e15
+Revises: 9c4d1e6f2a73
+Create Date: 2026-01-12 09:21:33.730482
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from pgvector.sqlalchemy import VECTOR
+
+# revision identifiers, used by Alembic.
+revision: str = '2f8a6d3b9e15'
+down_revision: Union[str, Sequence[str], None] = '9c4d1e6f2a73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('embedding_cache',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('content_sha256', sa.String(length=64), nullable=False),
+    sa.Column('embedding_model_version', sa.String(length=64), nullable=False),
+    sa.Column('embedding', VECTOR(dim=1536), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True),
+              server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('content_sha256', 'embedding_model_version',
+                        name='uq_embedding_cache_sha_model')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('embedding_cache')
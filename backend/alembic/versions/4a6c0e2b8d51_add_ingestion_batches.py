@@ -0,0 +1,59 @@
+"""add ingestion batch columns
+
+Revision ID: 4a6c0e2b8d51
+Revises: 7e1b4a8c2d96
+Create Date: 2026-01-15 09:41:27.630184
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '4a6c0e2b8d51'
+down_revision: Union[str, Sequence[str], None] = '7e1b4a8c2d96'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'ingestion_runs',
+        sa.Column('parent_run_id', sa.String(length=64), nullable=True),
+    )
+    op.add_column(
+        'ingestion_runs', sa.Column('file_sha256', sa.String(length=64), nullable=True)
+    )
+    op.create_foreign_key(
+        'ingestion_runs_parent_run_id_fkey',
+        'ingestion_runs',
+        'ingestion_runs',
+        ['parent_run_id'],
+        ['run_id'],
+        ondelete='CASCADE',
+    )
+    op.create_index(
+        op.f('ix_ingestion_runs_parent_run_id'),
+        'ingestion_runs',
+        ['parent_run_id'],
+        unique=False,
+    )
+    op.create_index(
+        op.f('ix_ingestion_runs_file_sha256'),
+        'ingestion_runs',
+        ['file_sha256'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_ingestion_runs_file_sha256'), table_name='ingestion_runs')
+    op.drop_index(op.f('ix_ingestion_runs_parent_run_id'), table_name='ingestion_runs')
+    op.drop_constraint(
+        'ingestion_runs_parent_run_id_fkey', 'ingestion_runs', type_='foreignkey'
+    )
+    op.drop_column('ingestion_runs', 'file_sha256')
+    op.drop_column('ingestion_runs', 'parent_run_id')
@@ -0,0 +1,48 @@
+"""add chunk_embeddings ann indexes
+
+Revision ID: 5b2e7c91d4a0
+Revises: 11832204f394
+Create Date: 2026-01-06 10:12:41.208113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2e7c91d4a0'
+down_revision: Union[str, Sequence[str], None] = '11832204f394'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_chunk_embeddings_embedding_hnsw_cosine',
+        'chunk_embeddings',
+        ['embedding'],
+        unique=False,
+        postgresql_using='hnsw',
+        postgresql_with={'m': 16, 'ef_construction': 64},
+        postgresql_ops={'embedding': 'vector_cosine_ops'},
+    )
+    op.create_index(
+        'ix_chunk_embeddings_embedding_hnsw_ip',
+        'chunk_embeddings',
+        ['embedding'],
+        unique=False,
+        postgresql_using='hnsw',
+        postgresql_with={'m': 16, 'ef_construction': 64},
+        postgresql_ops={'embedding': 'vector_ip_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        'ix_chunk_embeddings_embedding_hnsw_ip', table_name='chunk_embeddings'
+    )
+    op.drop_index(
+        'ix_chunk_embeddings_embedding_hnsw_cosine', table_name='chunk_embeddings'
+    )
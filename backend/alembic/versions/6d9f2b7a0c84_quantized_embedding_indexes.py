@@ -0,0 +1,88 @@
+"""per-model first-pass precision for chunk_embeddings HNSW indexes
+
+Revision ID: 6d9f2b7a0c84
+Revises: a7d2c95e1f48
+Create Date: 2026-01-23 15:02:41.218730
+
+Each model is searched at one precision (settings.rag_vector_precision) and
+keeps only the HNSW indexes that precision walks. 'half' uses two indexes
+over embedding::halfvec(dim) (cosine, ip), half the size of the float32 ones;
+'binary' uses one over binary_quantize(embedding)::bit(dim) (Hamming), 1/32
+of the size. Either replaces the model's float32 cosine/ip indexes from
+a7d2c95e1f48. The stored vectors are not changed: quantized searches re-rank
+their candidates on them. Models at 'full' are left as they are. halfvec and
+binary_quantize need pgvector >= 0.7.
+
+Switching a model's precision later needs a migration like this one.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '6d9f2b7a0c84'
+down_revision: Union[str, Sequence[str], None] = 'a7d2c95e1f48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# embedding model version -> (dimension, precision) at the time of this migration
+MODELS = {'stub-1536': (1536, 'full')}
+
+# index flavour -> (indexed expression, operator class)
+FLAVOURS = {
+    'cosine': ('embedding::vector({dim})', 'vector_cosine_ops'),
+    'ip': ('embedding::vector({dim})', 'vector_ip_ops'),
+    'half_cosine': ('embedding::halfvec({dim})', 'halfvec_cosine_ops'),
+    'half_ip': ('embedding::halfvec({dim})', 'halfvec_ip_ops'),
+    'bit_hamming': (
+        'binary_quantize(embedding::vector({dim}))::bit({dim})',
+        'bit_hamming_ops',
+    ),
+}
+
+PRECISION_FLAVOURS = {
+    'full': ('cosine', 'ip'),
+    'half': ('half_cosine', 'half_ip'),
+    'binary': ('bit_hamming',),
+}
+
+
+def _model_index(model: str, ops: str) -> str:
+    slug = ''.join(c if c.isalnum() else '_' for c in model.lower())
+    return f'ix_chunk_embeddings_hnsw_{ops}_{slug}'[:63]
+
+
+def _create(model: str, dim: int, ops: str) -> None:
+    expr, opclass = FLAVOURS[ops]
+    op.create_index(
+        _model_index(model, ops),
+        'chunk_embeddings',
+        [sa.text(f'({expr.format(dim=dim)}) {opclass}')],
+        unique=False,
+        postgresql_using='hnsw',
+        postgresql_with={'m': 16, 'ef_construction': 64},
+        postgresql_where=sa.text(f"embedding_model_version = '{model}'"),
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for model, (dim, precision) in MODELS.items():
+        if precision == 'full':
+            continue
+        for ops in PRECISION_FLAVOURS[precision]:
+            _create(model, dim, ops)
+        for ops in PRECISION_FLAVOURS['full']:
+            op.drop_index(_model_index(model, ops), table_name='chunk_embeddings')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for model, (dim, precision) in MODELS.items():
+        if precision == 'full':
+            continue
+        for ops in PRECISION_FLAVOURS['full']:
+            _create(model, dim, ops)
+        for ops in PRECISION_FLAVOURS[precision]:
+            op.drop_index(_model_index(model, ops), table_name='chunk_embeddings')
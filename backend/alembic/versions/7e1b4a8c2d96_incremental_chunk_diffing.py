@@ -0,0 +1,50 @@
+"""incremental chunk diffing
+
+Revision ID: 7e1b4a8c2d96
+Revises: 2f8a6d3b9e15
+Create Date: 2026-01-14 16:02:48.114950
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '7e1b4a8c2d96'
+down_revision: Union[str, Sequence[str], None] = '2f8a6d3b9e15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'document_chunks',
+        sa.Column('content_sha256', sa.String(length=64), nullable=True),
+    )
+    op.execute(
+        "UPDATE document_chunks"
+        " SET content_sha256 = encode(sha256(convert_to(content, 'UTF8')), 'hex')"
+    )
+    op.drop_constraint(
+        'uq_document_chunks_doc_id_ordinal', 'document_chunks', type_='unique'
+    )
+    op.create_unique_constraint(
+        'uq_document_chunks_doc_id_ordinal',
+        'document_chunks',
+        ['doc_id', 'ordinal'],
+        deferrable=True,
+        initially='DEFERRED',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(
+        'uq_document_chunks_doc_id_ordinal', 'document_chunks', type_='unique'
+    )
+    op.create_unique_constraint(
+        'uq_document_chunks_doc_id_ordinal', 'document_chunks', ['doc_id', 'ordinal']
+    )
+    op.drop_column('document_chunks', 'content_sha256')
@@ -0,0 +1,47 @@
+"""add ingestion_runs queue columns
+
+Revision ID: 9c4d1e6f2a73
+Revises: 5b2e7c91d4a0
+Create Date: 2026-01-08 14:37:05.551920
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4d1e6f2a73'
+down_revision: Union[str, Sequence[str], None] = '5b2e7c91d4a0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'ingestion_runs', sa.Column('claimed_by', sa.String(length=64), nullable=True)
+    )
+    op.add_column(
+        'ingestion_runs',
+        sa.Column('claimed_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.add_column(
+        'ingestion_runs',
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    )
+    op.create_index(
+        'ix_ingestion_runs_queue',
+        'ingestion_runs',
+        ['started_at'],
+        unique=False,
+        postgresql_where=sa.text("status = 'STARTED'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_ingestion_runs_queue', table_name='ingestion_runs')
+    op.drop_column('ingestion_runs', 'attempts')
+    op.drop_column('ingestion_runs', 'claimed_at')
+    op.drop_column('ingestion_runs', 'claimed_by')
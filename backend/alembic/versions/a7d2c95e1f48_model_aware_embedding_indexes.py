@@ -0,0 +1,124 @@
+"""model-aware chunk_embeddings storage and filter columns
+
+Revision ID: a7d2c95e1f48
+Revises: e81d4b7f3c29
+Create Date: 2026-01-21 10:27:53.904416
+
+The embedding columns lose their fixed 1536 dimension so models of any size
+can share the tables. Each model gets partial HNSW indexes over
+``embedding::vector(dim)``. The two global HNSW indexes are dropped: an
+untyped vector column cannot be indexed directly. Models added later to
+settings.rag_embedding_dims need their own migration that creates the same
+pair of indexes.
+
+doc_id and source_type are copied from document_chunks/documents onto
+chunk_embeddings so retrieval filters run inside the index scan.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d2c95e1f48'
+down_revision: Union[str, Sequence[str], None] = 'e81d4b7f3c29'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# embedding model version -> dimension at the time of this migration
+MODELS = {'stub-1536': 1536}
+
+
+def _model_index(model: str, ops: str) -> str:
+    slug = ''.join(c if c.isalnum() else '_' for c in model.lower())
+    return f'ix_chunk_embeddings_hnsw_{ops}_{slug}'[:63]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index(
+        'ix_chunk_embeddings_embedding_hnsw_ip', table_name='chunk_embeddings'
+    )
+    op.drop_index(
+        'ix_chunk_embeddings_embedding_hnsw_cosine', table_name='chunk_embeddings'
+    )
+    op.execute('ALTER TABLE chunk_embeddings ALTER COLUMN embedding TYPE vector')
+    op.execute('ALTER TABLE embedding_cache ALTER COLUMN embedding TYPE vector')
+
+    op.add_column(
+        'chunk_embeddings', sa.Column('doc_id', sa.String(length=128), nullable=True)
+    )
+    op.add_column(
+        'chunk_embeddings',
+        sa.Column('source_type', sa.String(length=32), nullable=True),
+    )
+    op.execute(
+        """
+        UPDATE chunk_embeddings e
+        SET doc_id = c.doc_id, source_type = d.source_type
+        FROM document_chunks c
+        JOIN documents d ON d.doc_id = c.doc_id
+        WHERE c.chunk_id = e.chunk_id
+        """
+    )
+    op.alter_column('chunk_embeddings', 'doc_id', nullable=False)
+    op.alter_column('chunk_embeddings', 'source_type', nullable=False)
+    op.create_index(
+        'ix_chunk_embeddings_model_doc_id',
+        'chunk_embeddings',
+        ['embedding_model_version', 'doc_id'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_chunk_embeddings_model_source_type',
+        'chunk_embeddings',
+        ['embedding_model_version', 'source_type'],
+        unique=False,
+    )
+
+    for model, dim in MODELS.items():
+        for ops, opclass in (('cosine', 'vector_cosine_ops'), ('ip', 'vector_ip_ops')):
+            op.create_index(
+                _model_index(model, ops),
+                'chunk_embeddings',
+                [sa.text(f'(embedding::vector({dim})) {opclass}')],
+                unique=False,
+                postgresql_using='hnsw',
+                postgresql_with={'m': 16, 'ef_construction': 64},
+                postgresql_where=sa.text(f"embedding_model_version = '{model}'"),
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for model in MODELS:
+        for ops in ('ip', 'cosine'):
+            op.drop_index(_model_index(model, ops), table_name='chunk_embeddings')
+    op.drop_index(
+        'ix_chunk_embeddings_model_source_type', table_name='chunk_embeddings'
+    )
+    op.drop_index('ix_chunk_embeddings_model_doc_id', table_name='chunk_embeddings')
+    op.drop_column('chunk_embeddings', 'source_type')
+    op.drop_column('chunk_embeddings', 'doc_id')
+
+    # fails if rows of another dimension were stored in the meantime
+    op.execute('ALTER TABLE embedding_cache ALTER COLUMN embedding TYPE vector(1536)')
+    op.execute('ALTER TABLE chunk_embeddings ALTER COLUMN embedding TYPE vector(1536)')
+    op.create_index(
+        'ix_chunk_embeddings_embedding_hnsw_cosine',
+        'chunk_embeddings',
+        ['embedding'],
+        unique=False,
+        postgresql_using='hnsw',
+        postgresql_with={'m': 16, 'ef_construction': 64},
+        postgresql_ops={'embedding': 'vector_cosine_ops'},
+    )
+    op.create_index(
+        'ix_chunk_embeddings_embedding_hnsw_ip',
+        'chunk_embeddings',
+        ['embedding'],
+        unique=False,
+        postgresql_using='hnsw',
+        postgresql_with={'m': 16, 'ef_construction': 64},
+        postgresql_ops={'embedding': 'vector_ip_ops'},
+    )
@@ -0,0 +1,69 @@
+"""approval_items keyset pagination indexes
+
+Revision ID: b5e8d1a3f7c2
+Revises: 6d9f2b7a0c84
+Create Date: 2026-01-26 09:41:17.562093
+
+GET /approvals pages on (created_at, id) newest first. Each filter
+combination (none, status, type, status+type) gets its own
+(filters..., created_at, id) index. The older (status, created_at) and
+(status) indexes are prefixes of these and are dropped.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e8d1a3f7c2'
+down_revision: Union[str, Sequence[str], None] = '6d9f2b7a0c84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_approval_items_created_at_id',
+        'approval_items',
+        ['created_at', 'id'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_approval_items_status_created_at_id',
+        'approval_items',
+        ['status', 'created_at', 'id'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_approval_items_type_created_at_id',
+        'approval_items',
+        ['type', 'created_at', 'id'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_approval_items_status_type_created_at_id',
+        'approval_items',
+        ['status', 'type', 'created_at', 'id'],
+        unique=False,
+    )
+    op.drop_index('ix_approval_items_status_created_at', table_name='approval_items')
+    op.execute('DROP INDEX IF EXISTS ix_approval_items_status')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(
+        'ix_approval_items_status', 'approval_items', ['status'], unique=False
+    )
+    op.create_index(
+        'ix_approval_items_status_created_at',
+        'approval_items',
+        ['status', 'created_at'],
+        unique=False,
+    )
+    op.drop_index(
+        'ix_approval_items_status_type_created_at_id', table_name='approval_items'
+    )
+    op.drop_index('ix_approval_items_type_created_at_id', table_name='approval_items')
+    op.drop_index('ix_approval_items_status_created_at_id', table_name='approval_items')
+    op.drop_index('ix_approval_items_created_at_id', table_name='approval_items')
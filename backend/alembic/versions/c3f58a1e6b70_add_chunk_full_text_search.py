@@ -0,0 +1,46 @@
+"""add document_chunks full-text search column
+
+Revision ID: c3f58a1e6b70
+Revises: 4a6c0e2b8d51
+Create Date: 2026-01-16 11:05:19.442871
+
+Adding a stored generated column rewrites document_chunks once; the GIN
+index is built afterwards.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f58a1e6b70'
+down_revision: Union[str, Sequence[str], None] = '4a6c0e2b8d51'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'document_chunks',
+        sa.Column(
+            'content_tsv',
+            postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('english', content)", persisted=True),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        'ix_document_chunks_content_tsv',
+        'document_chunks',
+        ['content_tsv'],
+        unique=False,
+        postgresql_using='gin',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_document_chunks_content_tsv', table_name='document_chunks')
+    op.drop_column('document_chunks', 'content_tsv')
@@ -0,0 +1,43 @@
+"""approval_items idempotency key
+
+Revision ID: d2f6a9c4e1b7
+Revises: b5e8d1a3f7c2
+Create Date: 2026-02-02 14:08:51.230417
+
+Creates take an optional client-chosen idempotency_key, unique per
+requested_by. The unique index is partial (keyed rows only) and is the
+ON CONFLICT DO NOTHING target of the create INSERTs.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f6a9c4e1b7'
+down_revision: Union[str, Sequence[str], None] = 'b5e8d1a3f7c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'approval_items',
+        sa.Column('idempotency_key', sa.String(length=128), nullable=True),
+    )
+    op.create_index(
+        'uq_approval_items_requested_by_idempotency_key',
+        'approval_items',
+        ['requested_by', 'idempotency_key'],
+        unique=True,
+        postgresql_where=sa.text('idempotency_key IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        'uq_approval_items_requested_by_idempotency_key', table_name='approval_items'
+    )
+    op.drop_column('approval_items', 'idempotency_key')
@@ -0,0 +1,113 @@
+"""approval_item_stats counters maintained by triggers
+
+Revision ID: f4b8c2d6a1e3
+Revises: d2f6a9c4e1b7
+Create Date: 2026-02-05 10:27:03.914552
+
+GET /approvals/stats reads per (status, type, assigned_to) counters instead
+of running COUNT(*) ... GROUP BY over approval_items. Statement-level
+AFTER INSERT/UPDATE/DELETE triggers keep the counters current in the
+writing transaction. Each trigger adjusts a counter once per statement,
+using the statement's transition tables. Writes are blocked while the
+counters are backfilled and the triggers created, so no change is missed
+or counted twice.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4b8c2d6a1e3'
+down_revision: Union[str, Sequence[str], None] = 'd2f6a9c4e1b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+STATS_FUNCTION = """
+CREATE OR REPLACE FUNCTION approval_item_stats_apply() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO approval_item_stats AS s (status, type, assigned_to, count)
+        SELECT status, type, coalesce(assigned_to, ''), count(*)
+        FROM new_rows GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+        ON CONFLICT (status, type, assigned_to)
+        DO UPDATE SET count = s.count + EXCLUDED.count;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO approval_item_stats AS s (status, type, assigned_to, count)
+        SELECT status, type, coalesce(assigned_to, ''), -count(*)
+        FROM old_rows GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+        ON CONFLICT (status, type, assigned_to)
+        DO UPDATE SET count = s.count + EXCLUDED.count;
+    ELSE
+        INSERT INTO approval_item_stats AS s (status, type, assigned_to, count)
+        SELECT status, type, assigned_to, sum(delta)
+        FROM (
+            SELECT status, type, coalesce(assigned_to, '') AS assigned_to, 1 AS delta
+            FROM new_rows
+            UNION ALL
+            SELECT status, type, coalesce(assigned_to, ''), -1 FROM old_rows
+        ) d
+        GROUP BY 1, 2, 3 HAVING sum(delta) <> 0 ORDER BY 1, 2, 3
+        ON CONFLICT (status, type, assigned_to)
+        DO UPDATE SET count = s.count + EXCLUDED.count;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+TRIGGERS = (
+    ('approval_items_stats_insert', 'INSERT', 'NEW TABLE AS new_rows'),
+    (
+        'approval_items_stats_update',
+        'UPDATE',
+        'OLD TABLE AS old_rows NEW TABLE AS new_rows',
+    ),
+    ('approval_items_stats_delete', 'DELETE', 'OLD TABLE AS old_rows'),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'approval_item_stats',
+        sa.Column(
+            'status',
+            postgresql.ENUM(
+                'PENDING',
+                'APPROVED',
+                'REJECTED',
+                name='approval_status',
+                create_type=False,
+            ),
+            nullable=False,
+        ),
+        sa.Column('type', sa.String(length=64), nullable=False),
+        sa.Column('assigned_to', sa.String(length=128), nullable=False),
+        sa.Column('count', sa.BigInteger(), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('status', 'type', 'assigned_to'),
+    )
+    # readers keep going; writers wait until the triggers are in place
+    op.execute('LOCK TABLE approval_items IN SHARE ROW EXCLUSIVE MODE')
+    op.execute(
+        "INSERT INTO approval_item_stats (status, type, assigned_to, count) "
+        "SELECT status, type, coalesce(assigned_to, ''), count(*) "
+        "FROM approval_items GROUP BY 1, 2, 3"
+    )
+    op.execute(STATS_FUNCTION)
+    for name, event, transition in TRIGGERS:
+        op.execute(
+            f'CREATE TRIGGER {name} AFTER {event} ON approval_items '
+            f'REFERENCING {transition} '
+            'FOR EACH STATEMENT EXECUTE FUNCTION approval_item_stats_apply()'
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, _, _ in TRIGGERS:
+        op.execute(f'DROP TRIGGER IF EXISTS {name} ON approval_items')
+    op.execute('DROP FUNCTION IF EXISTS approval_item_stats_apply()')
+    op.drop_table('approval_item_stats')
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Small in-process LRU map with optional TTL.
+
+    Not thread-safe; meant for one event loop. Expired entries are dropped
+    lazily, when looked up or pushed out by newer ones.
+    """
+
+    def __init__(self, max_size: int, ttl_s: float | None = None) -> None:
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self._data: OrderedDict[K, tuple[V, float | None]] = OrderedDict()
+
+    def get(self, key: K) -> V | None:
+        try:
+            value, expires_at = self._data[key]
+        except KeyError:
+            return None
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def put(self, key: K, value: V) -> None:
+        if self.max_size <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl_s if self.ttl_s is not None else None
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
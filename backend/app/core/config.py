@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -14,5 +15,111 @@ class Settings(BaseSettings):
     test_database_url: str | None = None
     test_database_url_sync: str | None = None
 
+    # embedding dimension per model version; each gets its own partial HNSW indexes
+    # (adding a model here needs a migration for its indexes; startup fails without)
+    rag_embedding_dims: dict[str, int] = {"stub-1536": 1536}
+    # pgvector ANN search defaults; overridable per /rag/query request
+    rag_hnsw_ef_search: int = 40
+    rag_ivfflat_probes: int = 10
+    # keep scanning the HNSW graph until enough rows pass the filters; the orders
+    # need pgvector >= 0.8, checked at startup
+    rag_hnsw_iterative_scan: Literal["off", "relaxed_order", "strict_order"] = "off"
+    # first pass of vector search per model (unlisted models: "full"): the float32
+    # HNSW index, or a halfvec / binary quantized one instead. A model only has the
+    # indexes of its precision, so changing it needs a migration. Quantized passes
+    # fetch top_k * rag_rerank_oversample candidates and re-rank them on the stored
+    # full-precision vectors
+    rag_vector_precision: dict[str, Literal["full", "half", "binary"]] = {}
+    rag_rerank_oversample: int = 4
+    # optional rerank stage after retrieval: over-fetch rag_rerank_candidates rows and
+    # score them ("lexical" BM25, or a local "cross_encoder" model) in batches on a
+    # thread pool; after rag_rerank_budget_ms unscored rows keep their retrieval order
+    rag_reranker: Literal["off", "lexical", "cross_encoder"] = "off"
+    rag_rerank_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    rag_rerank_candidates: int = 50
+    rag_rerank_batch_size: int = 16
+    rag_rerank_budget_ms: float = 300.0
+    rag_rerank_workers: int = 2
+    # hybrid retrieval: rows taken from each of the keyword and vector lists
+    # before fusion
+    rag_hybrid_candidates: int = 50
+    # /rag/query caches (per API process): query text -> vector, and search -> results.
+    # Results also expire when ingestion bumps the corpus version, re-read every
+    # rag_corpus_version_check_s seconds.
+    rag_query_cache_enabled: bool = True
+    rag_query_vector_cache_size: int = 10_000
+    rag_query_vector_cache_ttl_s: float = 3600.0
+    rag_result_cache_size: int = 2_000
+    rag_result_cache_ttl_s: float = 300.0
+    rag_corpus_version_check_s: float = 2.0
+    # streamed answers (POST /rag/query/stream): retrieved text put in the prompt, and
+    # the cap on generated tokens
+    rag_answer_max_context_chars: int = 12_000
+    rag_answer_max_tokens: int = 512
+    # rag_queries / retrieval_logs rows are buffered per API process and bulk-inserted
+    # every query_log_batch_size rows or query_log_flush_interval_s seconds. Past
+    # query_log_max_pending queued rows new ones are dropped (counted), or with
+    # query_log_block_when_full the request waits up to query_log_put_timeout_s first.
+    query_log_enabled: bool = True
+    query_log_batch_size: int = 500
+    query_log_flush_interval_s: float = 1.0
+    query_log_max_pending: int = 10_000
+    query_log_block_when_full: bool = False
+    query_log_put_timeout_s: float = 0.05
+    # live approval events (GET /approvals/events, WS /approvals/ws): one LISTEN
+    # connection per API process fans NOTIFYs out to clients. Each client buffers up to
+    # approval_events_queue_size events before being told to resync, and idle streams
+    # get a keepalive every approval_events_heartbeat_s seconds.
+    approval_events_queue_size: int = 100
+    approval_events_heartbeat_s: float = 15.0
+    approval_events_reconnect_delay_s: float = 1.0
+    # GET /approvals/{id}/wait: longest a request may park waiting for a decision
+    approval_wait_max_timeout_s: float = 120.0
+    # GET /approvals/stats: seconds counts are served from memory before re-reading
+    # approval_item_stats (0 disables the cache)
+    approval_stats_cache_ttl_s: float = 2.0
+    # approval archiver (python -m app.features.approvals.services.archiver): items
+    # decided more than approval_archive_after_days ago move to
+    # approval_items_archive, approval_archive_batch_size per transaction, checked
+    # every approval_archive_interval_s.
+    # An archived item's idempotency key no longer blocks a new create.
+    approval_archive_after_days: float = 30.0
+    approval_archive_batch_size: int = 1000
+    approval_archive_interval_s: float = 300.0
+    # chunk/embedding writes: "copy" (asyncpg COPY) or "executemany" (Core INSERT)
+    rag_bulk_insert_method: Literal["copy", "executemany"] = "copy"
+    # structure-aware chunking budget
+    rag_chunk_max_tokens: int = 512
+    rag_chunk_overlap_tokens: int = 64
+    # streamed ingestion: chunks per write/commit batch, batches buffered between
+    # stages, and PDF pages parsed per Docling call (0 = whole document at once)
+    ingestion_write_batch_size: int = 256
+    ingestion_queue_depth: int = 2
+    ingestion_parse_window_pages: int = 50
+
+    # ingestion worker (python -m app.features.rag.services.ingestion.worker)
+    ingestion_worker_concurrency: int = 2
+    ingestion_worker_poll_interval_s: float = 1.0
+    ingestion_lease_timeout_s: float = 600.0
+    ingestion_max_attempts: int = 3
+    # upper bound on documents per batch (POST /rag/ingestion-batches and the batch CLI)
+    ingestion_batch_max_documents: int = 100_000
+
+    # Docling runs in a process pool so parsing never blocks the event loop
+    docling_parser_workers: int = 2
+    docling_parser_max_tasks_per_child: int | None = None
+    # load Docling models at startup (API lifespan / pool initializer), not on first PDF
+    docling_eager_load: bool = False
+
+    # embedding pipeline micro-batching / retries
+    embedding_batch_size: int = 64
+    embedding_batch_max_tokens: int = 8_000
+    embedding_concurrency: int = 4
+    embedding_max_retries: int = 3
+    embedding_retry_backoff_s: float = 0.5
+    # content-addressed embedding cache (Postgres + in-process LRU entries)
+    embedding_cache_enabled: bool = True
+    embedding_cache_lru_size: int = 20_000
+
 
 settings = Settings()
@@ -1,6 +1,11 @@
 # app/db/base.py
+from typing import ClassVar
+
+from sqlalchemy import Table
 from sqlalchemy.orm import DeclarativeBase
 
 
 class Base(DeclarativeBase):
-    pass
+    # every model here is mapped to a plain Table (SQLAlchemy types this as
+    # any FromClause), so Core statements and COPY can take Model.__table__
+    __table__: ClassVar[Table]
@@ -20,3 +20,8 @@ AsyncSessionLocal = async_sessionmaker(
 async def get_session():
     async with AsyncSessionLocal() as session:
         yield session
+
+
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    # for work that needs several sessions at once (e.g. concurrent queries)
+    return AsyncSessionLocal
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from functools import lru_cache
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.db.session_async import engine
+from app.features.approvals.domain.models import ApprovalStatus
+from app.features.approvals.domain.schemas import ApprovalItemStats
+from app.features.approvals.services.event_hub import ApprovalEventHub
+
+
+@lru_cache(maxsize=1)
+def get_event_hub() -> ApprovalEventHub:
+    # process-wide: one LISTEN connection shared by every SSE / WebSocket client,
+    # closed by the API lifespan on shutdown
+    return ApprovalEventHub(
+        engine,
+        queue_size=settings.approval_events_queue_size,
+        reconnect_delay_s=settings.approval_events_reconnect_delay_s,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_stats_cache() -> LRUCache[ApprovalStatus, ApprovalItemStats] | None:
+    # per API process: one entry per status, shared by every dashboard
+    if settings.approval_stats_cache_ttl_s <= 0:
+        return None
+    return LRUCache(
+        max_size=len(ApprovalStatus), ttl_s=settings.approval_stats_cache_ttl_s
+    )
@@ -1,18 +1,45 @@
 from __future__ import annotations
 
+import asyncio
+import json
 from datetime import datetime
-from typing import Optional
+from typing import AsyncIterator, Optional
 
+from app.core.cache import LRUCache
+from app.core.config import settings
 from app.db.session_async import get_session
-from app.features.approvals.domain.models import ApprovalStatus
+from app.features.approvals.api.deps import get_event_hub, get_stats_cache
+from app.features.approvals.domain.models import ApprovalItem, ApprovalStatus
 from app.features.approvals.domain.schemas import (
     ApprovalItemApprove,
+    ApprovalItemBatchCreate,
+    ApprovalItemBatchResult,
+    ApprovalItemBulkApprove,
+    ApprovalItemBulkReject,
+    ApprovalItemBulkResult,
     ApprovalItemCreate,
     ApprovalItemRead,
     ApprovalItemReject,
+    ApprovalItemStats,
 )
 from app.features.approvals.services.approval_item_service import ApprovalItemService
-from fastapi import APIRouter, Depends, Query
+from app.features.approvals.services.event_hub import (
+    ApprovalEventHub,
+    ApprovalEventSubscription,
+)
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+    WebSocketException,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(tags=["approvals"])
@@ -24,35 +51,139 @@ def get_service(session: AsyncSession = Depends(get_session)) -> ApprovalItemSer
 
 @router.post("", response_model=ApprovalItemRead, status_code=201)
 async def create_approval_item(payload: ApprovalItemCreate, 
+                               response: Response,
                                svc: ApprovalItemService = Depends(get_service)):
-    return await svc.create(payload)
+    item, created = await svc.create(payload)
+    if not created:
+        # idempotency_key already used: this is the item the first request created
+        response.status_code = 200
+    return item
 
 @router.get("", response_model=list[ApprovalItemRead])
 async def list_approval_items(
+    response: Response,
     status: Optional[ApprovalStatus] = Query(default=None),
     type: Optional[str] = Query(default=None),
     created_after: Optional[datetime] = Query(default=None),
     created_before: Optional[datetime] = Query(default=None),
     limit: int = Query(default=50, ge=1, le=200),
     offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = Query(default=None, max_length=200),
     svc: ApprovalItemService = Depends(get_service),
 ):
-    items = await svc.list(
+    # page with ?cursor=<X-Next-Cursor of the previous page>; offset is kept for
+    # old clients but costs O(offset) per page
+    items, next_cursor = await svc.list(
         status=status,
         type=type,
         created_after=created_after,
         created_before=created_before,
         limit=limit,
         offset=offset,
+        cursor=cursor,
     )
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
     return list(items)
 
 
+# declared before the /{item_id} routes so "batch" / "bulk" / "stats" are never
+# parsed as an id
+@router.get("/stats", response_model=ApprovalItemStats)
+async def approval_item_stats(
+    status: ApprovalStatus = Query(default=ApprovalStatus.PENDING),
+    svc: ApprovalItemService = Depends(get_service),
+    cache: Optional[LRUCache[ApprovalStatus, ApprovalItemStats]] = Depends(
+        get_stats_cache
+    ),
+) -> ApprovalItemStats:
+    return await svc.stats(status=status, cache=cache)
+
+
+@router.post("/batch", response_model=ApprovalItemBatchResult)
+async def create_approval_items(
+    payload: ApprovalItemBatchCreate, svc: ApprovalItemService = Depends(get_service)
+) -> ApprovalItemBatchResult:
+    return await svc.create_batch(payload.items)
+
+
+@router.post("/bulk/approve", response_model=ApprovalItemBulkResult)
+async def bulk_approve_approval_items(
+    payload: ApprovalItemBulkApprove, svc: ApprovalItemService = Depends(get_service)
+) -> ApprovalItemBulkResult:
+    return await svc.decide_many(payload, status=ApprovalStatus.APPROVED)
+
+
+@router.post("/bulk/reject", response_model=ApprovalItemBulkResult)
+async def bulk_reject_approval_items(
+    payload: ApprovalItemBulkReject, svc: ApprovalItemService = Depends(get_service)
+) -> ApprovalItemBulkResult:
+    return await svc.decide_many(payload, status=ApprovalStatus.REJECTED)
+
+
+@router.get("/events")
+async def stream_approval_events(
+    type: Optional[list[str]] = Query(default=None),
+    assigned_to: Optional[str] = Query(default=None),
+    hub: ApprovalEventHub = Depends(get_event_hub),
+) -> StreamingResponse:
+    # Server-Sent Events: created/approved/rejected as they commit, instead of polling
+    try:
+        sub = await hub.subscribe(types=type, assigned_to=assigned_to)
+    except (SQLAlchemyError, OSError) as e:
+        raise HTTPException(
+            status_code=503, detail="Approval events unavailable"
+        ) from e
+    return StreamingResponse(
+        _sse_events(sub),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws")
+async def approval_events_socket(
+    websocket: WebSocket,
+    type: Optional[list[str]] = Query(default=None),
+    assigned_to: Optional[str] = Query(default=None),
+    hub: ApprovalEventHub = Depends(get_event_hub),
+) -> None:
+    try:
+        sub = await hub.subscribe(types=type, assigned_to=assigned_to)
+    except (SQLAlchemyError, OSError) as e:
+        raise WebSocketException(
+            code=status.WS_1011_INTERNAL_ERROR, reason="Approval events unavailable"
+        ) from e
+    await websocket.accept()
+    # the client only listens: its side of the socket is read just to notice it leave
+    watcher = asyncio.create_task(_close_on_disconnect(websocket, sub))
+    try:
+        async for event in sub.events(heartbeat_s=settings.approval_events_heartbeat_s):
+            await websocket.send_json(event if event is not None else {"event": "ping"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        watcher.cancel()
+        sub.close()
+
+
 @router.get("/{item_id}", response_model=ApprovalItemRead)
 async def get_approval_item(item_id: int, svc: ApprovalItemService = Depends(get_service)):
     return await svc.get(item_id)
 
 
+@router.get("/{item_id}/wait", response_model=ApprovalItemRead)
+async def wait_for_approval_decision(
+    item_id: int,
+    timeout: float = Query(default=30.0, ge=0, le=settings.approval_wait_max_timeout_s),
+    svc: ApprovalItemService = Depends(get_service),
+    hub: ApprovalEventHub = Depends(get_event_hub),
+) -> ApprovalItem:
+    # long poll for agents: returns as soon as the item is decided, or with the
+    # item still PENDING once `timeout` seconds pass (then just call again)
+    return await svc.wait(item_id, timeout_s=timeout, events=hub)
+
+
 @router.post("/{item_id}/approve", response_model=ApprovalItemRead)
 async def approve_approval_item(item_id: int, payload: ApprovalItemApprove, svc: ApprovalItemService = Depends(get_service)):
     return await svc.approve(item_id, decision_by=payload.decision_by, decision_reason=payload.decision_reason)
@@ -61,3 +192,23 @@ async def approve_approval_item(item_id: int, payload: ApprovalItemApprove, svc:
 @router.post("/{item_id}/reject", response_model=ApprovalItemRead)
 async def reject_approval_item(item_id: int, payload: ApprovalItemReject, svc: ApprovalItemService = Depends(get_service)):
     return await svc.reject(item_id, decision_by=payload.decision_by, decision_reason=payload.decision_reason)
+
+
+async def _sse_events(sub: ApprovalEventSubscription) -> AsyncIterator[str]:
+    try:
+        async for event in sub.events(heartbeat_s=settings.approval_events_heartbeat_s):
+            if event is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+    finally:
+        # also reached when the client disconnects and the stream is cancelled
+        sub.close()
+
+
+async def _close_on_disconnect(
+    websocket: WebSocket, sub: ApprovalEventSubscription
+) -> None:
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+    sub.close()
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from typing import Any, Literal
+
+# Postgres NOTIFY channel for approval item changes (see ApprovalItemRepo.notify)
+APPROVAL_EVENTS_CHANNEL = "approval_events"
+
+ApprovalEventKind = Literal["created", "approved", "rejected"]
+
+
+def approval_event(kind: ApprovalEventKind, item: Any) -> dict[str, Any]:
+    """NOTIFY payload for one item: the fields clients filter and render on.
+
+    ``item`` is an ApprovalItem or a row with the same columns. Kept small:
+    a NOTIFY payload is capped at 8000 bytes, and clients fetch the full item
+    with GET /approvals/{id} when they need it.
+    """
+    return {
+        "event": kind,
+        "id": item.id,
+        "type": item.type,
+        "status": item.status.value,
+        "title": item.title,
+        "requested_by": item.requested_by,
+        "assigned_to": item.assigned_to,
+    }
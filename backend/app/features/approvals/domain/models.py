@@ -6,10 +6,13 @@ from typing import Any, Optional
 
 from app.db.base import Base
 from sqlalchemy import (
+    DDL,
+    BigInteger,
     DateTime,
     Index,
     String,
     Text,
+    event,
     func,
 )
 from sqlalchemy import (
@@ -40,11 +43,12 @@ class ApprovalItem(Base):
         nullable=False,
         default=ApprovalStatus.PENDING,
         server_default=ApprovalStatus.PENDING.value,
-        index=True,
     )
 
     requested_by: Mapped[str] = mapped_column(String(128), nullable=False)
     assigned_to: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+    # client-chosen, unique per requested_by: a retried create returns the first item
+    idempotency_key: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(
@@ -59,4 +63,194 @@ class ApprovalItem(Base):
     decision_reason: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
 
 
-Index("ix_approval_items_status_created_at", ApprovalItem.status, ApprovalItem.created_at)
+# keyset pagination: one (filters..., created_at, id) index per filter combination
+# of GET /approvals, so every page is a short backward index range scan
+Index("ix_approval_items_created_at_id", ApprovalItem.created_at, ApprovalItem.id)
+Index(
+    "ix_approval_items_status_created_at_id",
+    ApprovalItem.status,
+    ApprovalItem.created_at,
+    ApprovalItem.id,
+)
+Index(
+    "ix_approval_items_type_created_at_id",
+    ApprovalItem.type,
+    ApprovalItem.created_at,
+    ApprovalItem.id,
+)
+Index(
+    "ix_approval_items_status_type_created_at_id",
+    ApprovalItem.status,
+    ApprovalItem.type,
+    ApprovalItem.created_at,
+    ApprovalItem.id,
+)
+# rows the archiver may move: decided, oldest decision first
+Index(
+    "ix_approval_items_decided_decision_at",
+    ApprovalItem.decision_at,
+    postgresql_where=ApprovalItem.status != ApprovalStatus.PENDING,
+)
+# ON CONFLICT target of the create INSERTs; partial, since most items have no key
+Index(
+    "uq_approval_items_requested_by_idempotency_key",
+    ApprovalItem.requested_by,
+    ApprovalItem.idempotency_key,
+    unique=True,
+    postgresql_where=ApprovalItem.idempotency_key.is_not(None),
+)
+
+
+class ApprovalItemArchive(Base):
+    """Decided approval items moved out of approval_items by the archiver.
+
+    Same columns, plus archived_at. approval_items keeps the working set
+    (PENDING and recent decisions) small. ApprovalItemRepo reads both
+    tables as one wherever decided items can show up.
+    """
+
+    __tablename__ = "approval_items_archive"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+
+    title: Mapped[str] = mapped_column(String(200), nullable=False)
+    description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    type: Mapped[str] = mapped_column(String(64), nullable=False)
+
+    payload_json: Mapped[dict[str, Any]] = mapped_column(JSONB, nullable=False)
+
+    status: Mapped[ApprovalStatus] = mapped_column(
+        SAEnum(ApprovalStatus, name="approval_status"), nullable=False
+    )
+
+    requested_by: Mapped[str] = mapped_column(String(128), nullable=False)
+    assigned_to: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+    idempotency_key: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+
+    decision_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    decision_by: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+    decision_reason: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+
+# the same keyset indexes as approval_items, so a list over both tables is a
+# merge of two backward index scans
+Index(
+    "ix_approval_items_archive_created_at_id",
+    ApprovalItemArchive.created_at,
+    ApprovalItemArchive.id,
+)
+Index(
+    "ix_approval_items_archive_status_created_at_id",
+    ApprovalItemArchive.status,
+    ApprovalItemArchive.created_at,
+    ApprovalItemArchive.id,
+)
+Index(
+    "ix_approval_items_archive_type_created_at_id",
+    ApprovalItemArchive.type,
+    ApprovalItemArchive.created_at,
+    ApprovalItemArchive.id,
+)
+Index(
+    "ix_approval_items_archive_status_type_created_at_id",
+    ApprovalItemArchive.status,
+    ApprovalItemArchive.type,
+    ApprovalItemArchive.created_at,
+    ApprovalItemArchive.id,
+)
+
+
+class ApprovalItemStat(Base):
+    """Per (status, type, assigned_to) item counts, kept by triggers on approval_items.
+
+    Unassigned items count under assigned_to = '' (a primary key column
+    cannot be NULL).
+    """
+
+    __tablename__ = "approval_item_stats"
+
+    status: Mapped[ApprovalStatus] = mapped_column(
+        SAEnum(ApprovalStatus, name="approval_status"), primary_key=True
+    )
+    type: Mapped[str] = mapped_column(String(64), primary_key=True)
+    assigned_to: Mapped[str] = mapped_column(String(128), primary_key=True)
+    count: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")
+
+
+# Statement-level triggers: a bulk decision or batch create adjusts each
+# affected counter once, from the transition tables, in the writing
+# transaction. Rows are upserted in key order so concurrent writers lock
+# counters in the same order. Deletes by the archiver (which sets
+# approvals.archiving for its transaction) are not counted: the items still
+# exist, in approval_items_archive. Same SQL as migration 1c7e3a9b5d20.
+APPROVAL_ITEM_STATS_FUNCTION = """
+CREATE OR REPLACE FUNCTION approval_item_stats_apply() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'DELETE' AND current_setting('approvals.archiving', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO approval_item_stats AS s (status, type, assigned_to, count)
+        SELECT status, type, coalesce(assigned_to, ''), count(*)
+        FROM new_rows GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+        ON CONFLICT (status, type, assigned_to)
+        DO UPDATE SET count = s.count + EXCLUDED.count;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO approval_item_stats AS s (status, type, assigned_to, count)
+        SELECT status, type, coalesce(assigned_to, ''), -count(*)
+        FROM old_rows GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+        ON CONFLICT (status, type, assigned_to)
+        DO UPDATE SET count = s.count + EXCLUDED.count;
+    ELSE
+        INSERT INTO approval_item_stats AS s (status, type, assigned_to, count)
+        SELECT status, type, assigned_to, sum(delta)
+        FROM (
+            SELECT status, type, coalesce(assigned_to, '') AS assigned_to, 1 AS delta
+            FROM new_rows
+            UNION ALL
+            SELECT status, type, coalesce(assigned_to, ''), -1 FROM old_rows
+        ) d
+        GROUP BY 1, 2, 3 HAVING sum(delta) <> 0 ORDER BY 1, 2, 3
+        ON CONFLICT (status, type, assigned_to)
+        DO UPDATE SET count = s.count + EXCLUDED.count;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+APPROVAL_ITEM_STATS_TRIGGERS = (
+    "CREATE TRIGGER approval_items_stats_insert AFTER INSERT ON approval_items "
+    "REFERENCING NEW TABLE AS new_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION approval_item_stats_apply()",
+    "CREATE TRIGGER approval_items_stats_update AFTER UPDATE ON approval_items "
+    "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION approval_item_stats_apply()",
+    "CREATE TRIGGER approval_items_stats_delete AFTER DELETE ON approval_items "
+    "REFERENCING OLD TABLE AS old_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION approval_item_stats_apply()",
+)
+
+# so metadata.create_all (tests) builds the same schema as the migrations
+event.listen(ApprovalItem.__table__, "after_create", DDL(APPROVAL_ITEM_STATS_FUNCTION))
+for _trigger in APPROVAL_ITEM_STATS_TRIGGERS:
+    event.listen(ApprovalItem.__table__, "after_create", DDL(_trigger))
+event.listen(
+    ApprovalItem.__table__,
+    "after_drop",
+    DDL("DROP FUNCTION IF EXISTS approval_item_stats_apply()"),
+)
@@ -4,7 +4,7 @@ from datetime import datetime
 from typing import Any, Optional
 
 from app.features.approvals.domain.models import ApprovalStatus
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
 class ApprovalItemCreate(BaseModel):
@@ -14,6 +14,12 @@ class ApprovalItemCreate(BaseModel):
     payload_json: dict[str, Any] = Field(default_factory=dict)
     requested_by: str = Field(min_length=1, max_length=128)
     assigned_to: Optional[str] = Field(default=None, max_length=128)
+    # retries with the same key (per requested_by) get the original item back
+    idempotency_key: Optional[str] = Field(default=None, min_length=1, max_length=128)
+
+
+class ApprovalItemBatchCreate(BaseModel):
+    items: list[ApprovalItemCreate] = Field(min_length=1, max_length=1000)
 
 
 class ApprovalItemRead(BaseModel):
@@ -26,6 +32,7 @@ class ApprovalItemRead(BaseModel):
     status: ApprovalStatus
     requested_by: str
     assigned_to: Optional[str]
+    idempotency_key: Optional[str] = None
     created_at: datetime
     updated_at: datetime
     decision_at: Optional[datetime]
@@ -41,3 +48,68 @@ class ApprovalItemApprove(BaseModel):
 class ApprovalItemReject(BaseModel):
     decision_by: str = Field(min_length=1, max_length=128)
     decision_reason: str = Field(min_length=1)
+
+
+class ApprovalItemFilter(BaseModel):
+    """Selects PENDING items for a bulk decision; omitted fields match everything."""
+
+    type: Optional[str] = Field(default=None, max_length=64)
+    requested_by: Optional[str] = Field(default=None, max_length=128)
+    assigned_to: Optional[str] = Field(default=None, max_length=128)
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+
+class ApprovalItemBulkApprove(BaseModel):
+    # either explicit ids, or a filter over PENDING items, oldest first, up to `limit`
+    ids: Optional[list[int]] = Field(default=None, min_length=1, max_length=10_000)
+    filter: Optional[ApprovalItemFilter] = None
+    limit: int = Field(default=1000, ge=1, le=10_000)
+    decision_by: str = Field(min_length=1, max_length=128)
+    decision_reason: Optional[str] = None
+
+    @model_validator(mode="after")
+    def _ids_or_filter(self) -> "ApprovalItemBulkApprove":
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("Give exactly one of ids or filter")
+        return self
+
+
+class ApprovalItemBulkReject(ApprovalItemBulkApprove):
+    decision_reason: str = Field(min_length=1)
+
+
+class ApprovalItemSkipped(BaseModel):
+    id: int
+    status: ApprovalStatus
+
+
+class ApprovalItemBulkResult(BaseModel):
+    updated: list[ApprovalItemRead]
+    # only reported for explicit ids
+    already_decided: list[ApprovalItemSkipped] = Field(default_factory=list)
+    not_found: list[int] = Field(default_factory=list)
+
+
+class ApprovalItemBatchResult(BaseModel):
+    created: list[ApprovalItemRead]
+    # items whose idempotency key was already used: the ones created the first time
+    existing: list[ApprovalItemRead] = Field(default_factory=list)
+
+
+class ApprovalTypeCount(BaseModel):
+    type: str
+    count: int
+
+
+class ApprovalAssigneeCount(BaseModel):
+    assigned_to: Optional[str]
+    count: int
+
+
+class ApprovalItemStats(BaseModel):
+    status: ApprovalStatus
+    total: int
+    # largest first
+    by_type: list[ApprovalTypeCount]
+    by_assigned_to: list[ApprovalAssigneeCount]
@@ -1,26 +1,79 @@
 from __future__ import annotations
 
+import json
 from datetime import datetime
-from typing import Optional, Sequence
+from typing import Any, Optional, Sequence
 
-from app.features.approvals.domain.models import ApprovalItem, ApprovalStatus
-from sqlalchemy import Select, select
+from app.features.approvals.domain.events import APPROVAL_EVENTS_CHANNEL
+from app.features.approvals.domain.models import (
+    ApprovalItem,
+    ApprovalItemArchive,
+    ApprovalItemStat,
+    ApprovalStatus,
+)
+from sqlalchemy import (
+    Integer,
+    Row,
+    Select,
+    Text,
+    bindparam,
+    delete,
+    func,
+    literal,
+    select,
+    tuple_,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
 
 class ApprovalItemRepo:
     def __init__(self, session: AsyncSession) -> None:
         self.session = session
 
-    async def create(self, item: ApprovalItem) -> ApprovalItem:
-        self.session.add(item)
-        await self.session.flush()
-        await self.session.refresh(item)
-        return item
+    async def insert_many(
+        self, rows: Sequence[dict[str, Any]]
+    ) -> Sequence[ApprovalItem]:
+        """Insert all ``rows`` in one INSERT ... RETURNING, in row order.
+
+        A row whose (requested_by, idempotency_key) already exists, or appears
+        earlier in ``rows``, is skipped and not returned.
+        """
+        stmt = (
+            insert(ApprovalItem)
+            .values(list(rows))
+            .on_conflict_do_nothing(
+                index_elements=[
+                    ApprovalItem.requested_by,
+                    ApprovalItem.idempotency_key,
+                ],
+                index_where=ApprovalItem.idempotency_key.is_not(None),
+            )
+            .returning(ApprovalItem)
+        )
+        res = await self.session.execute(stmt)
+        return sorted(res.scalars().all(), key=lambda item: item.id)
+
+    async def get_by_idempotency_keys(
+        self, keys: Sequence[tuple[str, str]]
+    ) -> Sequence[ApprovalItem]:
+        """Items for (requested_by, idempotency_key) pairs, ordered by id."""
+        key = tuple_(ApprovalItem.requested_by, ApprovalItem.idempotency_key)
+        res = await self.session.execute(
+            select(ApprovalItem)
+            .where(ApprovalItem.idempotency_key.is_not(None))
+            .where(key.in_(list(keys)))
+            .order_by(ApprovalItem.id)
+        )
+        return res.scalars().all()
 
     async def get(self, item_id: int) -> Optional[ApprovalItem]:
-        res = await self.session.execute(select(ApprovalItem)\
-                                         .where(ApprovalItem.id == item_id))
+        # archived items included: one primary key probe per table
+        items = _with_archive()
+        res = await self.session.execute(select(items).where(items.id == item_id))
         return res.scalar_one_or_none()
 
     async def list(
@@ -32,18 +85,219 @@ class ApprovalItemRepo:
         created_before: Optional[datetime] = None,
         limit: int = 50,
         offset: int = 0,
+        after: Optional[tuple[datetime, int]] = None,
     ) -> Sequence[ApprovalItem]:
-        stmt: Select[tuple[ApprovalItem]] = select(ApprovalItem)
+        """Newest first. ``after`` is the (created_at, id) of the last row of the
+        previous page: rows strictly after it are returned (keyset pagination).
+
+        PENDING items are never archived, so only a PENDING list skips the
+        archive table.
+        """
+        items = ApprovalItem if status == ApprovalStatus.PENDING else _with_archive()
+        stmt: Select[tuple[ApprovalItem]] = select(items)
 
         if status is not None:
-            stmt = stmt.where(ApprovalItem.status == status)
+            stmt = stmt.where(items.status == status)
         if type is not None:
-            stmt = stmt.where(ApprovalItem.type == type)
+            stmt = stmt.where(items.type == type)
         if created_after is not None:
-            stmt = stmt.where(ApprovalItem.created_at >= created_after)
+            stmt = stmt.where(items.created_at >= created_after)
         if created_before is not None:
-            stmt = stmt.where(ApprovalItem.created_at <= created_before)
+            stmt = stmt.where(items.created_at <= created_before)
+
+        if after is not None:
+            created_at, item_id = after
+            last = tuple_(literal(created_at, items.created_at.type), literal(item_id))
+            stmt = stmt.where(tuple_(items.created_at, items.id) < last)
 
-        stmt = stmt.order_by(ApprovalItem.created_at.desc()).limit(limit).offset(offset)
+        # id breaks created_at ties, so the order (and every cursor) is total
+        stmt = (
+            stmt.order_by(items.created_at.desc(), items.id.desc())
+            .limit(limit)
+            .offset(offset)
+        )
         res = await self.session.execute(stmt)
         return res.scalars().all()
+
+    async def stats(self, status: ApprovalStatus) -> Sequence[ApprovalItemStat]:
+        """The non-zero counters for ``status``, one per (type, assigned_to) in use."""
+        res = await self.session.execute(
+            select(ApprovalItemStat)
+            .where(ApprovalItemStat.status == status)
+            .where(ApprovalItemStat.count > 0)
+        )
+        return res.scalars().all()
+
+    async def decide_ids(
+        self,
+        ids: Sequence[int],
+        *,
+        status: ApprovalStatus,
+        decision_by: str,
+        decision_reason: Optional[str],
+    ) -> Sequence[Row]:
+        """Decide every PENDING item among ``ids`` in one statement.
+
+        Returns one row per requested id, in request order: ``requested_id``,
+        ``previous_status`` (None if no such item) and the item's columns
+        after the update (all None if it was not updated). The join reads
+        the pre-update snapshot, so a skipped item shows the status that
+        made it ineligible; archived items count as skipped, not missing.
+        """
+        id_array = bindparam("ids", list(ids), type_=ARRAY(Integer))
+        decided = (
+            update(ApprovalItem)
+            .where(ApprovalItem.status == ApprovalStatus.PENDING)
+            .where(ApprovalItem.id == func.any(id_array))
+            .values(**_decision(status, decision_by, decision_reason))
+            .returning(*ApprovalItem.__table__.c)
+            .cte("decided")
+        )
+        requested = (
+            select(
+                func.unnest(id_array).label("id"),
+                func.generate_subscripts(id_array, 1).label("pos"),
+            )
+            .cte("requested")
+        )
+        items = _with_archive()
+        stmt = (
+            select(
+                requested.c.id.label("requested_id"),
+                items.status.label("previous_status"),
+                *decided.c,
+            )
+            .select_from(requested)
+            .outerjoin(items, items.id == requested.c.id)
+            .outerjoin(decided, decided.c.id == requested.c.id)
+            .order_by(requested.c.pos)
+        )
+        res = await self.session.execute(stmt)
+        return res.all()
+
+    async def decide_matching(
+        self,
+        *,
+        status: ApprovalStatus,
+        decision_by: str,
+        decision_reason: Optional[str],
+        limit: int,
+        type: Optional[str] = None,
+        requested_by: Optional[str] = None,
+        assigned_to: Optional[str] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+    ) -> Sequence[ApprovalItem]:
+        """Decide up to ``limit`` PENDING items matching the filters, oldest first.
+
+        Rows another transaction holds are skipped rather than waited for.
+        """
+        target = select(ApprovalItem.id).where(
+            ApprovalItem.status == ApprovalStatus.PENDING
+        )
+        if type is not None:
+            target = target.where(ApprovalItem.type == type)
+        if requested_by is not None:
+            target = target.where(ApprovalItem.requested_by == requested_by)
+        if assigned_to is not None:
+            target = target.where(ApprovalItem.assigned_to == assigned_to)
+        if created_after is not None:
+            target = target.where(ApprovalItem.created_at >= created_after)
+        if created_before is not None:
+            target = target.where(ApprovalItem.created_at <= created_before)
+        target = (
+            target.order_by(ApprovalItem.created_at, ApprovalItem.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+
+        stmt = (
+            update(ApprovalItem)
+            .where(ApprovalItem.id.in_(target.scalar_subquery()))
+            .values(**_decision(status, decision_by, decision_reason))
+            .returning(ApprovalItem)
+            .execution_options(synchronize_session=False)
+        )
+        res = await self.session.execute(stmt)
+        return sorted(res.scalars().all(), key=lambda item: (item.created_at, item.id))
+
+    async def notify(self, events: Sequence[dict[str, Any]]) -> None:
+        """NOTIFY every event on the approvals channel, in one round trip.
+
+        Postgres delivers them when the surrounding transaction commits (and
+        drops them if it rolls back), so listeners never see a change that
+        did not happen.
+        """
+        if not events:
+            return
+        payload = func.unnest(
+            bindparam("payloads", [json.dumps(e) for e in events], type_=ARRAY(Text))
+        ).column_valued("payload")
+        await self.session.execute(
+            select(func.pg_notify(literal(APPROVAL_EVENTS_CHANNEL), payload))
+        )
+
+    async def archive_decided(self, *, decided_before: datetime, limit: int) -> int:
+        """Move up to ``limit`` items decided before ``decided_before`` to the archive.
+
+        One statement: the DELETE ... RETURNING feeds the archive INSERT, so
+        an item is in exactly one of the tables at any time. Rows other
+        transactions hold are skipped. Returns the number moved.
+        """
+        # tells the stats trigger these deletes are moves (transaction-local)
+        await self.session.execute(
+            select(func.set_config("approvals.archiving", "on", True))
+        )
+        target = (
+            select(ApprovalItem.id)
+            .where(ApprovalItem.status != ApprovalStatus.PENDING)
+            .where(ApprovalItem.decision_at < decided_before)
+            .order_by(ApprovalItem.decision_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        columns = [c.name for c in ApprovalItem.__table__.c]
+        moved = (
+            delete(ApprovalItem)
+            .where(ApprovalItem.id.in_(target.scalar_subquery()))
+            .returning(*ApprovalItem.__table__.c)
+            .cte("moved")
+        )
+        stmt = (
+            insert(ApprovalItemArchive)
+            .from_select(columns, select(*(moved.c[name] for name in columns)))
+            .add_cte(moved)
+            .returning(ApprovalItemArchive.id)
+        )
+        res = await self.session.execute(stmt)
+        moved_ids = res.scalars().all()
+        await self.session.execute(
+            select(func.set_config("approvals.archiving", "off", True))
+        )
+        return len(moved_ids)
+
+
+def _with_archive() -> type[ApprovalItem]:
+    """ApprovalItem over approval_items UNION ALL approval_items_archive.
+
+    Filters and ORDER BY ... LIMIT on it are pushed into both branches, so
+    each table is read through its own indexes.
+    """
+    columns = [c.name for c in ApprovalItem.__table__.c]
+    both = union_all(
+        select(*ApprovalItem.__table__.c),
+        select(*(ApprovalItemArchive.__table__.c[name] for name in columns)),
+    ).subquery("approval_items_all")
+    return aliased(ApprovalItem, both)
+
+
+def _decision(
+    status: ApprovalStatus, decision_by: str, decision_reason: Optional[str]
+) -> dict[str, Any]:
+    return {
+        "status": status,
+        "decision_by": decision_by,
+        "decision_reason": decision_reason,
+        "decision_at": func.now(),
+        "updated_at": func.now(),
+    }
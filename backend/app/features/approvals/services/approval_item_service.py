@@ -1,12 +1,31 @@
 from __future__ import annotations
 
+import asyncio
+import base64
+import json
+from collections import Counter
+from contextlib import AsyncExitStack
 from datetime import datetime, timezone
 from typing import Optional, Sequence
 
+from app.core.cache import LRUCache
+from app.features.approvals.domain.events import ApprovalEventKind, approval_event
 from app.features.approvals.domain.models import ApprovalItem, ApprovalStatus
-from app.features.approvals.domain.schemas import ApprovalItemCreate
+from app.features.approvals.domain.schemas import (
+    ApprovalAssigneeCount,
+    ApprovalItemBatchResult,
+    ApprovalItemBulkApprove,
+    ApprovalItemBulkResult,
+    ApprovalItemCreate,
+    ApprovalItemRead,
+    ApprovalItemSkipped,
+    ApprovalItemStats,
+    ApprovalTypeCount,
+)
 from app.features.approvals.repo.approval_item_repo import ApprovalItemRepo
+from app.features.approvals.services.event_hub import ApprovalEventHub
 from fastapi import HTTPException
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -15,18 +34,41 @@ class ApprovalItemService:
         self.session = session
         self.repo = ApprovalItemRepo(session)
 
-    async def create(self, payload: ApprovalItemCreate) -> ApprovalItem:
-        item = ApprovalItem(
-            title=payload.title,
-            description=payload.description,
-            type=payload.type,
-            payload_json=payload.payload_json,
-            status=ApprovalStatus.PENDING,
-            requested_by=payload.requested_by,
-            assigned_to=payload.assigned_to,
+    async def create(self, payload: ApprovalItemCreate) -> tuple[ApprovalItem, bool]:
+        """The new item and True, or the item an earlier create with the same
+        idempotency key made and False."""
+        created, existing = await self._create_many([payload])
+        return (created[0], True) if created else (existing[0], False)
+
+    async def create_batch(
+        self, payloads: Sequence[ApprovalItemCreate]
+    ) -> ApprovalItemBatchResult:
+        created, existing = await self._create_many(payloads)
+        return ApprovalItemBatchResult(
+            created=[ApprovalItemRead.model_validate(i) for i in created],
+            existing=[ApprovalItemRead.model_validate(i) for i in existing],
         )
+
+    async def _create_many(
+        self, payloads: Sequence[ApprovalItemCreate]
+    ) -> tuple[Sequence[ApprovalItem], Sequence[ApprovalItem]]:
+        # one INSERT for the whole batch; keys seen before are skipped by the
+        # unique index and their original items read back instead
+        rows = [{**p.model_dump(), "status": ApprovalStatus.PENDING} for p in payloads]
         async with self.session.begin():
-            return await self.repo.create(item)
+            created = await self.repo.insert_many(rows)
+            await self.repo.notify([approval_event("created", i) for i in created])
+            created_keys = {(i.requested_by, i.idempotency_key) for i in created}
+            keys = dict.fromkeys(
+                (p.requested_by, p.idempotency_key)
+                for p in payloads
+                if p.idempotency_key is not None
+            )
+            duplicate_keys = [key for key in keys if key not in created_keys]
+            existing: Sequence[ApprovalItem] = []
+            if duplicate_keys:
+                existing = await self.repo.get_by_idempotency_keys(duplicate_keys)
+        return created, existing
 
     async def get(self, item_id: int) -> ApprovalItem:
         item = await self.repo.get(item_id)
@@ -34,6 +76,36 @@ class ApprovalItemService:
             raise HTTPException(status_code=404, detail="ApprovalItem not found")
         return item
 
+    async def wait(
+        self, item_id: int, *, timeout_s: float, events: ApprovalEventHub
+    ) -> ApprovalItem:
+        """The item once decided, or as it stands (PENDING) after ``timeout_s``.
+
+        Parks on the event hub rather than re-reading: a waiting request costs
+        an idle coroutine and no database connection.
+        """
+        async with AsyncExitStack() as stack:
+            try:
+                decided = await stack.enter_async_context(
+                    events.decision_waiter(item_id)
+                )
+            except (SQLAlchemyError, OSError) as e:
+                # the LISTEN connection could not be opened; errors reading the
+                # item itself are not the hub's and propagate as they are
+                raise HTTPException(
+                    status_code=503, detail="Approval events unavailable"
+                ) from e
+            item = await self.get(item_id)
+            if item.status != ApprovalStatus.PENDING:
+                return item
+            # end the read transaction so the pooled connection is not held while parked
+            await self.session.rollback()
+            try:
+                await asyncio.wait_for(decided, timeout_s)
+            except TimeoutError:
+                pass
+        return await self.get(item_id)
+
     async def list(
         self,
         *,
@@ -42,16 +114,61 @@ class ApprovalItemService:
         created_after: Optional[datetime],
         created_before: Optional[datetime],
         limit: int,
-        offset: int,
-    ) -> Sequence[ApprovalItem]:
-        return await self.repo.list(
+        offset: int = 0,
+        cursor: Optional[str] = None,
+    ) -> tuple[Sequence[ApprovalItem], Optional[str]]:
+        """One page plus the cursor for the next one (None on the last page)."""
+        if cursor is not None and offset:
+            raise HTTPException(
+                status_code=422, detail="Use either cursor or offset, not both"
+            )
+        # one extra row tells whether another page exists
+        items = await self.repo.list(
             status=status,
             type=type,
             created_after=created_after,
             created_before=created_before,
-            limit=limit,
+            limit=limit + 1,
             offset=offset,
+            after=decode_cursor(cursor) if cursor is not None else None,
+        )
+        if len(items) <= limit:
+            return items, None
+        items = items[:limit]
+        return items, encode_cursor(items[-1])
+
+    async def stats(
+        self,
+        *,
+        status: ApprovalStatus,
+        cache: Optional[LRUCache[ApprovalStatus, ApprovalItemStats]] = None,
+    ) -> ApprovalItemStats:
+        """Counts by type and by assignee, from the trigger-maintained counters.
+
+        Reads one row per (type, assigned_to) pair in use, however many items
+        there are. ``cache`` (short TTL) absorbs dashboard refreshes.
+        """
+        if cache is not None and (hit := cache.get(status)) is not None:
+            return hit
+        by_type: Counter[str] = Counter()
+        by_assignee: Counter[str] = Counter()
+        for row in await self.repo.stats(status):
+            by_type[row.type] += row.count
+            by_assignee[row.assigned_to] += row.count
+        stats = ApprovalItemStats(
+            status=status,
+            total=sum(by_type.values()),
+            by_type=[
+                ApprovalTypeCount(type=t, count=n) for t, n in by_type.most_common()
+            ],
+            by_assigned_to=[
+                ApprovalAssigneeCount(assigned_to=a or None, count=n)
+                for a, n in by_assignee.most_common()
+            ],
         )
+        if cache is not None:
+            cache.put(status, stats)
+        return stats
 
     async def approve(self, 
                       item_id: int, 
@@ -69,6 +186,7 @@ class ApprovalItemService:
             item.decision_by = decision_by
             item.decision_reason = decision_reason
             item.decision_at = datetime.now(timezone.utc)
+            await self.repo.notify([approval_event("approved", item)])
 
         await self.session.refresh(item)
         return item
@@ -89,6 +207,70 @@ class ApprovalItemService:
             item.decision_by = decision_by
             item.decision_reason = decision_reason
             item.decision_at = datetime.now(timezone.utc)
+            await self.repo.notify([approval_event("rejected", item)])
 
         await self.session.refresh(item)
         return item
+
+    async def decide_many(
+        self, payload: ApprovalItemBulkApprove, *, status: ApprovalStatus
+    ) -> ApprovalItemBulkResult:
+        """Approve or reject many PENDING items in one statement and one transaction.
+
+        Items that are missing or no longer PENDING are reported, not failed on.
+        """
+        kind: ApprovalEventKind = (
+            "approved" if status == ApprovalStatus.APPROVED else "rejected"
+        )
+        async with self.session.begin():
+            if payload.filter is not None:
+                items = await self.repo.decide_matching(
+                    status=status,
+                    decision_by=payload.decision_by,
+                    decision_reason=payload.decision_reason,
+                    limit=payload.limit,
+                    **payload.filter.model_dump(),
+                )
+                await self.repo.notify([approval_event(kind, i) for i in items])
+                return ApprovalItemBulkResult(
+                    updated=[ApprovalItemRead.model_validate(i) for i in items]
+                )
+
+            # the schema requires ids when there is no filter
+            rows = await self.repo.decide_ids(
+                list(dict.fromkeys(payload.ids or [])),
+                status=status,
+                decision_by=payload.decision_by,
+                decision_reason=payload.decision_reason,
+            )
+            await self.repo.notify(
+                [approval_event(kind, row) for row in rows if row.id is not None]
+            )
+
+        result = ApprovalItemBulkResult(updated=[])
+        for row in rows:
+            if row.id is not None:
+                result.updated.append(ApprovalItemRead.model_validate(dict(row._mapping)))
+            elif row.previous_status is None:
+                result.not_found.append(row.requested_id)
+            else:
+                # PENDING here means a concurrent request decided it first
+                result.already_decided.append(
+                    ApprovalItemSkipped(id=row.requested_id, status=row.previous_status)
+                )
+        return result
+
+
+def encode_cursor(item: ApprovalItem) -> str:
+    raw = json.dumps([item.created_at.isoformat(), item.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        created_at, item_id = json.loads(
+            base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        )
+        return datetime.fromisoformat(created_at), int(item_id)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
@@ -0,0 +1,95 @@
+"""Approval archiver: moves long-decided approval items to approval_items_archive.
+
+Run with ``python -m app.features.approvals.services.archiver``. Batches are
+moved until none are left, then the archiver sleeps for ``interval_s``. Any
+number of archivers can run, because each batch skips rows another one holds
+(``FOR UPDATE SKIP LOCKED``).
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import signal
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import settings
+from app.features.approvals.repo.approval_item_repo import ApprovalItemRepo
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+
+class ApprovalArchiver:
+    def __init__(
+        self,
+        *,
+        session_factory: async_sessionmaker[AsyncSession],
+        archive_after: timedelta = timedelta(days=30),
+        batch_size: int = 1000,
+        interval_s: float = 300.0,
+    ) -> None:
+        self._session_factory = session_factory
+        self._archive_after = archive_after
+        self._batch_size = batch_size
+        self._interval_s = interval_s
+
+    async def run_once(self) -> int:
+        """Move one batch, in its own transaction. Returns the number of items moved."""
+        decided_before = datetime.now(timezone.utc) - self._archive_after
+        async with self._session_factory() as session:
+            moved = await ApprovalItemRepo(session).archive_decided(
+                decided_before=decided_before, limit=self._batch_size
+            )
+            await session.commit()
+        return moved
+
+    async def run(self, stop: asyncio.Event) -> None:
+        logger.info(
+            "approval archiver starting (archive after %s)", self._archive_after
+        )
+        while not stop.is_set():
+            total = 0
+            try:
+                # short transactions: each batch commits before the next is taken
+                while not stop.is_set():
+                    moved = await self.run_once()
+                    total += moved
+                    if moved < self._batch_size:
+                        break
+            except Exception:
+                logger.exception("approval archiver: batch failed")
+            if total:
+                logger.info("approval archiver: moved %d items", total)
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(stop.wait(), timeout=self._interval_s)
+
+
+async def _main() -> None:
+    from app.db.session_async import AsyncSessionLocal, engine
+
+    archiver = ApprovalArchiver(
+        session_factory=AsyncSessionLocal,
+        archive_after=timedelta(days=settings.approval_archive_after_days),
+        batch_size=settings.approval_archive_batch_size,
+        interval_s=settings.approval_archive_interval_s,
+    )
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    try:
+        await archiver.run(stop)
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Collection, Optional
+
+from app.features.approvals.domain.events import APPROVAL_EVENTS_CHANNEL
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+_DECISIONS = frozenset({"approved", "rejected"})
+
+# sent to a subscriber that may have missed events (it fell behind, or the
+# LISTEN connection was re-established): re-read GET /approvals to catch up
+RESYNC: dict[str, Any] = {"event": "resync"}
+
+_CLOSED = object()
+
+
+class ApprovalEventSubscription:
+    """One client's filtered view of the approval events.
+
+    Events are buffered up to ``queue_size``; a subscriber that falls
+    further behind loses its backlog and gets a single RESYNC instead, so a
+    slow client never holds memory or delays anyone else.
+    """
+
+    def __init__(
+        self,
+        hub: ApprovalEventHub,
+        *,
+        types: Optional[Collection[str]],
+        assigned_to: Optional[str],
+        queue_size: int,
+    ) -> None:
+        self._hub = hub
+        self.types = frozenset(types) if types else None
+        self.assigned_to = assigned_to
+        self._queue: asyncio.Queue[Any] = asyncio.Queue(maxsize=queue_size)
+        self.closed = False
+
+    def matches(self, event: dict[str, Any]) -> bool:
+        if event is RESYNC:
+            return True
+        if self.types is not None and event.get("type") not in self.types:
+            return False
+        return self.assigned_to is None or event.get("assigned_to") == self.assigned_to
+
+    def offer(self, event: Any) -> None:
+        if self.closed:
+            return
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            _drain(self._queue)
+            self._queue.put_nowait(_CLOSED if event is _CLOSED else RESYNC)
+
+    async def events(
+        self, *, heartbeat_s: Optional[float] = None
+    ) -> AsyncIterator[Optional[dict[str, Any]]]:
+        """Yield events until closed; None every ``heartbeat_s`` seconds of silence."""
+        while True:
+            try:
+                event = await asyncio.wait_for(self._queue.get(), heartbeat_s)
+            except TimeoutError:
+                yield None
+                continue
+            if event is _CLOSED:
+                return
+            yield event
+
+    def close(self) -> None:
+        """Unsubscribe; a consumer blocked in ``events`` stops. Safe to call twice."""
+        if self.closed:
+            return
+        self.offer(_CLOSED)
+        self.closed = True
+        self._hub.unsubscribe(self)
+
+
+class ApprovalEventHub:
+    """Fans approval NOTIFY events out to in-process subscribers.
+
+    One LISTEN connection per API process, whatever the number of SSE and
+    WebSocket clients: it is opened with the first subscription and kept for
+    the life of the hub. If it drops, it is re-opened (every
+    ``reconnect_delay_s`` until that works) and subscribers get a RESYNC.
+
+    It also keeps the registry behind GET /approvals/{id}/wait: one future
+    per parked request, keyed by item id and resolved by that item's
+    decision event.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        *,
+        queue_size: int = 100,
+        reconnect_delay_s: float = 1.0,
+    ) -> None:
+        self._engine = engine
+        self._queue_size = queue_size
+        self._reconnect_delay_s = reconnect_delay_s
+        self._subscribers: set[ApprovalEventSubscription] = set()
+        self._waiters: dict[int, set[asyncio.Future[None]]] = {}
+        self._conn: Optional[AsyncConnection] = None
+        self._driver_conn: Any = None
+        self._lock = asyncio.Lock()
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    async def subscribe(
+        self,
+        *,
+        types: Optional[Collection[str]] = None,
+        assigned_to: Optional[str] = None,
+    ) -> ApprovalEventSubscription:
+        """Events for items of one of ``types`` and/or assigned to ``assigned_to``
+        (None matches all). Raises if the LISTEN connection cannot be opened."""
+        await self._ensure_listening()
+        sub = ApprovalEventSubscription(
+            self, types=types, assigned_to=assigned_to, queue_size=self._queue_size
+        )
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: ApprovalEventSubscription) -> None:
+        """Stop fanning events out to ``sub``; use ``sub.close()`` to also end it."""
+        self._subscribers.discard(sub)
+
+    @asynccontextmanager
+    async def decision_waiter(
+        self, item_id: int
+    ) -> AsyncIterator[asyncio.Future[None]]:
+        """A future resolved when ``item_id`` is approved or rejected.
+
+        It is also resolved on a RESYNC or when the hub closes, since a
+        decision may have been missed: the caller should re-read the item
+        rather than assume it was decided. Register before reading the item
+        so a decision committed in between is not lost.
+        """
+        await self._ensure_listening()
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(item_id, set()).add(waiter)
+        try:
+            yield waiter
+        finally:
+            waiters = self._waiters.get(item_id)
+            if waiters is not None:
+                waiters.discard(waiter)
+                if not waiters:
+                    del self._waiters[item_id]
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+        for sub in list(self._subscribers):
+            sub.close()
+        self._wake_waiters()
+        async with self._lock:
+            await self._disconnect()
+
+    def publish(self, event: dict[str, Any]) -> None:
+        for sub in list(self._subscribers):
+            if sub.matches(event):
+                sub.offer(event)
+        if event is RESYNC:
+            self._wake_waiters()
+        elif event.get("event") in _DECISIONS:
+            self._wake_waiters(event.get("id"))
+
+    def _wake_waiters(self, item_id: Optional[int] = None) -> None:
+        if item_id is None:
+            waiters = [w for ws in self._waiters.values() for w in ws]
+        else:
+            waiters = list(self._waiters.get(item_id, ()))
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    async def _ensure_listening(self) -> None:
+        if self._closed:
+            raise RuntimeError("ApprovalEventHub is closed")
+        if self._driver_conn is not None:
+            return
+        async with self._lock:
+            if self._driver_conn is None:
+                await self._connect()
+
+    async def _connect(self) -> None:
+        conn = await self._engine.connect()
+        try:
+            raw = await conn.get_raw_connection()
+            # LISTEN runs on the asyncpg connection directly: it has to stay
+            # outside any transaction for notifications to be delivered
+            driver_conn = raw.driver_connection
+            if driver_conn is None:
+                raise RuntimeError("approval events: no driver connection")
+            await driver_conn.add_listener(APPROVAL_EVENTS_CHANNEL, self._on_notify)
+            driver_conn.add_termination_listener(self._on_terminated)
+        except BaseException:
+            await conn.close()
+            raise
+        self._conn, self._driver_conn = conn, driver_conn
+
+    async def _disconnect(self) -> None:
+        conn, driver_conn = self._conn, self._driver_conn
+        self._conn = self._driver_conn = None
+        if conn is None:
+            return
+        try:
+            driver_conn.remove_termination_listener(self._on_terminated)
+            if not driver_conn.is_closed():
+                await driver_conn.remove_listener(
+                    APPROVAL_EVENTS_CHANNEL, self._on_notify
+                )
+        except Exception:
+            logger.warning("approval events: UNLISTEN failed", exc_info=True)
+            await conn.invalidate()
+        await conn.close()
+
+    def _on_notify(self, _conn: Any, _pid: int, _channel: str, payload: str) -> None:
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning("approval events: bad payload %r", payload)
+            return
+        self.publish(event)
+
+    def _on_terminated(self, _conn: Any) -> None:
+        if self._closed or self._reconnect_task is not None:
+            return
+        logger.warning("approval events: LISTEN connection lost, reconnecting")
+        self._reconnect_task = asyncio.get_running_loop().create_task(
+            self._reconnect(), name="approval-events-reconnect"
+        )
+
+    async def _reconnect(self) -> None:
+        try:
+            async with self._lock:
+                if self._conn is not None:
+                    await self._conn.invalidate()
+                await self._disconnect()
+                while not self._closed:
+                    try:
+                        await self._connect()
+                        break
+                    except Exception:
+                        logger.warning(
+                            "approval events: reconnect failed", exc_info=True
+                        )
+                        await asyncio.sleep(self._reconnect_delay_s)
+            # anything sent while the connection was down is gone
+            self.publish(RESYNC)
+        finally:
+            self._reconnect_task = None
+
+
+def _drain(queue: asyncio.Queue[Any]) -> None:
+    while True:
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
@@ -1,22 +1,187 @@
 from __future__ import annotations
 
-from app.features.rag.services.ingestion.docling_parser import DoclingPdfParser
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from app.core.config import settings
+from app.db.session_async import get_session_factory
+from app.features.rag.domain.models import model_precision
+from app.features.rag.repo import embeddings
+from app.features.rag.services.embedding.cache import EmbeddingCache
+from app.features.rag.services.embedding.pipeline import EmbeddingPipeline
+from app.features.rag.services.embedding.providers import (
+    EmbeddingProvider,
+    StubEmbeddingProvider,
+)
+from app.features.rag.services.generation.llm import FakeLLMClient, LLMClient
+from app.features.rag.services.generation.service import AnswerService
+from app.features.rag.services.ingestion.parser_pool import ProcessPoolPdfParser
 from app.features.rag.services.ingestion.service import PdfIngestionService
+from app.features.rag.services.query_log.sink import QueryLogSink
+from app.features.rag.services.retrieval.cache import RetrievalCache
+from app.features.rag.services.retrieval.rerank import (
+    CrossEncoderReranker,
+    LexicalReranker,
+    Reranker,
+    RerankStage,
+)
+from app.features.rag.services.retrieval.service import RetrievalService
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 
-def get_pdf_ingestion_service() -> PdfIngestionService:
-    # TEMP embedding stub — replace with OpenAI/OpenRouter later
-    def fake_embed(texts: list[str]) -> list[list[float]]:
-        # deterministic, schema-valid vectors (1536)
-        out = []
-        for t in texts:
-            h = hash(t)
-            out.append([(h % 997) / 997.0] * 1536)
-        return out
+@lru_cache(maxsize=1)
+def get_embedding_provider() -> EmbeddingProvider:
+    # TEMP: deterministic local stub — swap for an OpenAI/OpenRouter provider later
+    return StubEmbeddingProvider(model_version="stub-1536", dim=1536)
+
+
+@lru_cache(maxsize=1)
+def get_llm_client() -> LLMClient:
+    # TEMP: canned local answers — swap for a hosted LLM client later
+    return FakeLLMClient()
+
+
+@lru_cache(maxsize=1)
+def get_embedding_pipeline() -> EmbeddingPipeline:
+    return EmbeddingPipeline(
+        get_embedding_provider(),
+        max_batch_size=settings.embedding_batch_size,
+        max_batch_tokens=settings.embedding_batch_max_tokens,
+        concurrency=settings.embedding_concurrency,
+        max_retries=settings.embedding_max_retries,
+        backoff_base_s=settings.embedding_retry_backoff_s,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_embedding_cache() -> EmbeddingCache | None:
+    if not settings.embedding_cache_enabled:
+        return None
+    return EmbeddingCache(lru_size=settings.embedding_cache_lru_size)
+
+
+@lru_cache(maxsize=1)
+def get_pdf_parser() -> ProcessPoolPdfParser:
+    # process-wide: the pool (and each worker's DocumentConverter) outlives requests
+    return ProcessPoolPdfParser(
+        max_workers=settings.docling_parser_workers,
+        max_tasks_per_child=settings.docling_parser_max_tasks_per_child,
+        eager_load=settings.docling_eager_load,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_retrieval_cache() -> RetrievalCache | None:
+    if not settings.rag_query_cache_enabled:
+        return None
+    return RetrievalCache(
+        vector_size=settings.rag_query_vector_cache_size,
+        vector_ttl_s=settings.rag_query_vector_cache_ttl_s,
+        result_size=settings.rag_result_cache_size,
+        result_ttl_s=settings.rag_result_cache_ttl_s,
+        version_check_s=settings.rag_corpus_version_check_s,
+    )
+
 
+@lru_cache(maxsize=1)
+def get_reranker() -> RerankStage | None:
+    # process-wide: the thread pool (and a loaded cross-encoder) outlive requests
+    if settings.rag_reranker == "off":
+        return None
+    reranker: Reranker
+    if settings.rag_reranker == "cross_encoder":
+        reranker = CrossEncoderReranker(settings.rag_rerank_model)
+    else:
+        reranker = LexicalReranker()
+    return RerankStage(
+        reranker,
+        executor=ThreadPoolExecutor(
+            max_workers=settings.rag_rerank_workers, thread_name_prefix="rerank"
+        ),
+        batch_size=settings.rag_rerank_batch_size,
+        budget_s=settings.rag_rerank_budget_ms / 1000,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_query_log() -> QueryLogSink | None:
+    # process-wide buffer, drained by the API lifespan on shutdown
+    if not settings.query_log_enabled:
+        return None
+    return QueryLogSink(
+        get_session_factory(),
+        max_batch=settings.query_log_batch_size,
+        flush_interval_s=settings.query_log_flush_interval_s,
+        max_pending=settings.query_log_max_pending,
+        block_when_full=settings.query_log_block_when_full,
+        put_timeout_s=settings.query_log_put_timeout_s,
+        bulk_insert_method=settings.rag_bulk_insert_method,
+    )
+
+
+def get_pdf_ingestion_service() -> PdfIngestionService:
     return PdfIngestionService(
-        parser=DoclingPdfParser(),
-        embed_fn=fake_embed,
-        embedding_model_version="stub-1536",
+        parser=get_pdf_parser(),
+        embedder=get_embedding_pipeline(),
+        embedding_cache=get_embedding_cache(),
+        bulk_insert_method=settings.rag_bulk_insert_method,
+        chunk_max_tokens=settings.rag_chunk_max_tokens,
+        chunk_overlap_tokens=settings.rag_chunk_overlap_tokens,
+        write_batch_size=settings.ingestion_write_batch_size,
+        queue_depth=settings.ingestion_queue_depth,
+        parse_window_pages=settings.ingestion_parse_window_pages,
         pipeline_version="v0",
     )
+
+
+def get_retrieval_service(
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_session_factory),
+) -> RetrievalService:
+    provider = get_embedding_provider()
+    return RetrievalService(
+        provider=provider,
+        default_ef_search=settings.rag_hnsw_ef_search,
+        default_probes=settings.rag_ivfflat_probes,
+        session_factory=session_factory,
+        hybrid_candidates=settings.rag_hybrid_candidates,
+        cache=get_retrieval_cache(),
+        iterative_scan=settings.rag_hnsw_iterative_scan,
+        precision=model_precision(provider.model_version),
+        rerank_oversample=settings.rag_rerank_oversample,
+        reranker=get_reranker(),
+        rerank_candidates=settings.rag_rerank_candidates,
+    )
+
+
+def get_answer_service(
+    retrieval: RetrievalService = Depends(get_retrieval_service),
+    llm: LLMClient = Depends(get_llm_client),
+    query_log: QueryLogSink | None = Depends(get_query_log),
+) -> AnswerService:
+    return AnswerService(
+        retrieval=retrieval,
+        llm=llm,
+        query_log=query_log,
+        max_context_chars=settings.rag_answer_max_context_chars,
+        max_tokens=settings.rag_answer_max_tokens,
+    )
+
+
+async def check_vector_search() -> None:
+    """Fail startup on a database that can't serve the configured vector search."""
+    models = list(settings.rag_embedding_dims)
+    async with get_session_factory()() as session:
+        missing = await embeddings.missing_model_indexes(session, models)
+        version = await embeddings.vector_extension_version(session)
+    if missing:
+        # without them every search on those models is a sequential scan
+        raise RuntimeError(
+            "Missing HNSW indexes (add a migration for rag_embedding_dims / "
+            f"rag_vector_precision): {', '.join(missing)}"
+        )
+    if settings.rag_hnsw_iterative_scan != "off" and (version or ()) < (0, 8):
+        raise RuntimeError(
+            f"rag_hnsw_iterative_scan={settings.rag_hnsw_iterative_scan!r} needs "
+            "pgvector >= 0.8; set it to 'off' on this server"
+        )
@@ -1,19 +1,42 @@
 # backend/app/api/rag.py
 from __future__ import annotations
 
+import uuid
+from datetime import datetime, timezone
+from typing import Literal, Optional
+
+from app.core.config import settings
 from app.db.session_async import get_session
-from app.features.rag.api.deps import get_pdf_ingestion_service
+from app.features.rag.api.deps import (
+    get_answer_service,
+    get_pdf_ingestion_service,
+    get_pdf_parser,
+    get_query_log,
+    get_retrieval_service,
+)
 from app.features.rag.domain.schemas import (
     AnswerResponseDTO,
     ChunkDTO,
+    ConverterStatsDTO,
     DocumentDTO,
     FeedbackCreateDTO,
+    IngestionBatchCreateDTO,
+    IngestionBatchDTO,
     IngestionRunDTO,
+    ParserStatusDTO,
 )
+from app.features.rag.repo import ingestion_runs
+from app.features.rag.services.generation.service import AnswerService
+from app.features.rag.services.ingestion import converter_registry
+from app.features.rag.services.ingestion.parser_pool import ProcessPoolPdfParser
 from app.features.rag.services.ingestion.service import PdfIngestionService
+from app.features.rag.services.query_log.sink import QueryLogSink
+from app.features.rag.services.retrieval.service import RetrievalService
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.background import BackgroundTask
 
 router = APIRouter(tags=["rag"])
 
@@ -70,27 +93,95 @@ async def create_ingestion_run(
     session: AsyncSession = Depends(get_session),
     svc: PdfIngestionService = Depends(get_pdf_ingestion_service),
 ) -> IngestionRunDTO:
-    run_id = await svc.ingest_pdf(
+    # Only enqueue here; parsing/embedding happens in the ingestion worker.
+    run_id = await svc.enqueue(
         session=session,
         source_uri=payload.source_uri,
         requested_by=payload.stats_json.get("requested_by", "unknown"),
     )
 
-    # re-fetch to return canonical DB state
-    from app.features.rag.repo.ingestion_runs import get_by_run_id
-
-    run = await get_by_run_id(session, run_id=run_id)
-
-    return IngestionRunDTO(
-        run_id=run.run_id,
-        pipeline_version=run.pipeline_version,
-        source_type=run.source_type,
-        source_uri=run.source_uri,
-        status=run.status,
-        stats_json=run.stats_json,
-        error_message=run.error_message,
-        started_at=run.started_at,
-        finished_at=run.finished_at,
+    run = await ingestion_runs.get_by_run_id(session, run_id=run_id)
+    return IngestionRunDTO.model_validate(run)
+
+
+@router.get(
+    "/ingestion-runs/{run_id}",
+    response_model=IngestionRunDTO,
+)
+async def get_ingestion_run(
+    run_id: str,
+    session: AsyncSession = Depends(get_session),
+) -> IngestionRunDTO:
+    run = await ingestion_runs.find_by_run_id(session, run_id=run_id)
+    if run is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="IngestionRun not found"
+        )
+    return IngestionRunDTO.model_validate(run)
+
+
+@router.post(
+    "/ingestion-batches",
+    response_model=IngestionBatchDTO,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_ingestion_batch(
+    payload: IngestionBatchCreateDTO,
+    session: AsyncSession = Depends(get_session),
+    svc: PdfIngestionService = Depends(get_pdf_ingestion_service),
+) -> IngestionBatchDTO:
+    # One parent run plus a queued child run per distinct document;
+    # workers fan out over them.
+    run_id = await svc.enqueue_batch(
+        session=session,
+        source_uris=payload.source_uris,
+        globs=payload.globs,
+        requested_by=payload.requested_by,
+        max_documents=settings.ingestion_batch_max_documents,
+    )
+    progress = await svc.batch_progress(session=session, run_id=run_id)
+    if progress is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Ingestion batch not found"
+        )
+    return progress
+
+
+@router.get(
+    "/ingestion-batches/{run_id}",
+    response_model=IngestionBatchDTO,
+)
+async def get_ingestion_batch(
+    run_id: str,
+    session: AsyncSession = Depends(get_session),
+    svc: PdfIngestionService = Depends(get_pdf_ingestion_service),
+) -> IngestionBatchDTO:
+    progress = await svc.batch_progress(session=session, run_id=run_id)
+    if progress is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Ingestion batch not found"
+        )
+    return progress
+
+
+@router.get(
+    "/parser/status",
+    response_model=ParserStatusDTO,
+)
+async def get_parser_status(
+    parser: ProcessPoolPdfParser = Depends(get_pdf_parser),
+) -> ParserStatusDTO:
+    # model load/warmup timings for this process and for each live pool process
+    return ParserStatusDTO(
+        eager_load=settings.docling_eager_load,
+        pool_workers=settings.docling_parser_workers,
+        api_process=ConverterStatsDTO.model_validate(
+            converter_registry.stats().as_dict()
+        ),
+        pool_processes=[
+            ConverterStatsDTO.model_validate(report)
+            for report in await parser.refresh_stats()
+        ],
     )
 
 
@@ -98,6 +189,27 @@ class RagQueryRequest(BaseModel):
     query_text: str
     embedding_model_version: str = Field(..., max_length=64)
     top_k: int = Field(default=8, ge=1, le=50)
+    metric: Literal["cosine", "inner_product"] = "cosine"
+    # ANN recall/latency knobs; server defaults apply when omitted
+    ef_search: Optional[int] = Field(default=None, ge=1, le=1000)
+    probes: Optional[int] = Field(default=None, ge=1, le=1000)
+    # "hybrid" fuses keyword (full-text) and vector rankings with weighted
+    # reciprocal rank fusion
+    mode: Literal["vector", "keyword", "hybrid"] = "vector"
+    vector_weight: float = Field(default=1.0, ge=0.0)
+    keyword_weight: float = Field(default=1.0, ge=0.0)
+    rrf_k: int = Field(default=60, ge=1, le=1000)
+    # optional filters, applied inside the vector/keyword scans rather than after them
+    doc_ids: Optional[list[str]] = Field(default=None, max_length=1000)
+    source_types: Optional[list[str]] = Field(default=None, max_length=32)
+    ingested_after: Optional[datetime] = None
+    ingested_before: Optional[datetime] = None
+    # rerank stage (when the server has one): None = on; candidates over-fetched for it
+    rerank: Optional[bool] = None
+    rerank_candidates: Optional[int] = Field(default=None, ge=1, le=200)
+
+    def retrieval_params(self) -> dict:
+        return self.model_dump(exclude={"query_text", "embedding_model_version"})
 
 
 @router.post(
@@ -105,16 +217,75 @@ class RagQueryRequest(BaseModel):
     response_model=AnswerResponseDTO,
     status_code=status.HTTP_200_OK,
 )
-def rag_query(payload: RagQueryRequest) -> AnswerResponseDTO:
-    # Contract-first: return a valid shape even before generation exists.
+async def rag_query(
+    payload: RagQueryRequest,
+    session: AsyncSession = Depends(get_session),
+    retrieval: RetrievalService = Depends(get_retrieval_service),
+    query_log: QueryLogSink | None = Depends(get_query_log),
+) -> AnswerResponseDTO:
+    params = payload.retrieval_params()
+    trace: dict = {}
+    citations = await retrieval.retrieve(
+        session=session,
+        query_text=payload.query_text,
+        embedding_model_version=payload.embedding_model_version,
+        trace=trace,
+        **params,
+    )
+    session_id = uuid.uuid4().hex
+    if query_log is not None:
+        # buffered: written in bulk by the sink, not in this request's transaction
+        await query_log.log_session(
+            session_id=session_id,
+            query_text=payload.query_text,
+            embedding_model_version=payload.embedding_model_version,
+            citations=citations,
+        )
+        await query_log.log_retrieval(
+            retrieval_id=session_id,
+            query_text=payload.query_text,
+            embedding_model_version=payload.embedding_model_version,
+            top_k=payload.top_k,
+            results=citations,
+            params=params,
+            trace=trace,
+        )
+    # Retrieval only for now: /query/stream generates answers.
     return AnswerResponseDTO(
-        session_id="stub",
+        session_id=session_id,
         query_text=payload.query_text,
         answer_text=None,
         embedding_model_version=payload.embedding_model_version,
         answer_model_version=None,
-        citations=[],
-        created_at=None,
+        citations=citations,
+        created_at=datetime.now(timezone.utc),
+    )
+
+
+@router.post("/query/stream")
+async def rag_query_stream(
+    payload: RagQueryRequest,
+    session: AsyncSession = Depends(get_session),
+    answers: AnswerService = Depends(get_answer_service),
+) -> StreamingResponse:
+    """Retrieve, then stream the answer as Server-Sent Events.
+
+    Events: ``citations`` (once, before any token), ``token`` (text deltas),
+    then ``done`` or ``error``. The query session is stored after the stream
+    ends, so the first byte only waits for retrieval.
+    """
+    draft = await answers.start(
+        session=session,
+        query_text=payload.query_text,
+        embedding_model_version=payload.embedding_model_version,
+        **payload.retrieval_params(),
+    )
+    return StreamingResponse(
+        answers.events(draft),
+        media_type="text/event-stream",
+        # no proxy buffering, or tokens arrive in lumps
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(answers.persist, draft),
     )
 
 
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Literal, Optional
 
+from app.core.config import settings
 from app.db.base import Base
 
 # If you're using pgvector-python:
@@ -12,6 +13,7 @@ from sqlalchemy import (
     JSON,
     BigInteger,
     Boolean,
+    Computed,
     DateTime,
     ForeignKey,
     Index,
@@ -20,9 +22,15 @@ from sqlalchemy import (
     Text,
     UniqueConstraint,
     func,
+    text,
 )
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+# text search configuration baked into document_chunks.content_tsv; keyword
+# queries must parse with the same one or stemming will not line up
+TEXT_SEARCH_CONFIG = "english"
+
 
 class Document(Base):
     __tablename__ = "documents"
@@ -66,6 +74,14 @@ class DocumentChunk(Base):
 
     ordinal: Mapped[int] = mapped_column(Integer, nullable=False)  # stable per-doc ordering
     content: Mapped[str] = mapped_column(Text, nullable=False)
+    # sha256 of content; re-ingestion diffs on this to keep unchanged chunks/embeddings
+    content_sha256: Mapped[Optional[str]] = mapped_column(String(64))
+    # keyword search; generated by Postgres, never written by the app
+    content_tsv: Mapped[Any] = mapped_column(
+        TSVECTOR,
+        Computed(f"to_tsvector('{TEXT_SEARCH_CONFIG}', content)", persisted=True),
+        deferred=True,
+    )
 
     # chunk metadata for deterministic deeplinks
     start_ref: Mapped[Optional[str]] = mapped_column(String(128))  # e.g., heading id, or page anchor
@@ -81,10 +97,78 @@ class DocumentChunk(Base):
     embeddings: Mapped[list["ChunkEmbedding"]] = relationship(back_populates="chunk", cascade="all, delete-orphan")
 
     __table_args__ = (
-        UniqueConstraint("doc_id", "ordinal", name="uq_document_chunks_doc_id_ordinal"),
+        # deferred so re-ingestion can shift ordinals of kept chunks in one transaction
+        UniqueConstraint(
+            "doc_id",
+            "ordinal",
+            name="uq_document_chunks_doc_id_ordinal",
+            deferrable=True,
+            initially="DEFERRED",
+        ),
+        Index("ix_document_chunks_content_tsv", "content_tsv", postgresql_using="gin"),
     )
 
 
+def model_index_name(embedding_model_version: str, ops: str) -> str:
+    """Name of the partial HNSW index for one model and operator class."""
+    slug = "".join(c if c.isalnum() else "_" for c in embedding_model_version.lower())
+    # Postgres truncates identifiers at 63 bytes
+    return f"ix_chunk_embeddings_hnsw_{ops}_{slug}"[:63]
+
+
+# per-model HNSW index flavours: name suffix -> (indexed expression, operator class).
+# "half" and "bit" index quantized copies of the vector (2x and 32x smaller than
+# "full"); searches over them re-rank their candidates on the stored float32 vector.
+INDEX_FLAVOURS = {
+    "cosine": ("embedding::vector({dim})", "vector_cosine_ops"),
+    "ip": ("embedding::vector({dim})", "vector_ip_ops"),
+    "half_cosine": ("embedding::halfvec({dim})", "halfvec_cosine_ops"),
+    "half_ip": ("embedding::halfvec({dim})", "halfvec_ip_ops"),
+    "bit_hamming": (
+        "binary_quantize(embedding::vector({dim}))::bit({dim})",
+        "bit_hamming_ops",
+    ),
+}
+
+VectorPrecision = Literal["full", "half", "binary"]
+
+# the flavours each first-pass precision searches; a model is indexed for its
+# own precision only (settings.rag_vector_precision), so every HNSW graph kept
+# is one its searches use
+PRECISION_INDEX_FLAVOURS: dict[VectorPrecision, tuple[str, ...]] = {
+    "full": ("cosine", "ip"),
+    "half": ("half_cosine", "half_ip"),
+    "binary": ("bit_hamming",),
+}
+
+
+def model_precision(embedding_model_version: str) -> VectorPrecision:
+    """The first-pass precision, and so the HNSW indexes, of one model."""
+    return settings.rag_vector_precision.get(embedding_model_version, "full")
+
+
+def _model_indexes() -> list[Index]:
+    # One partial HNSW index per model and flavour of its precision. HNSW needs
+    # a fixed dimension, so each indexes the column cast to that model's size,
+    # and queries must filter on the model and use the same expression to
+    # match it.
+    indexes = []
+    for model, dim in settings.rag_embedding_dims.items():
+        where = text("embedding_model_version = '{}'".format(model.replace("'", "''")))
+        for ops in PRECISION_INDEX_FLAVOURS[model_precision(model)]:
+            expr, opclass = INDEX_FLAVOURS[ops]
+            indexes.append(
+                Index(
+                    model_index_name(model, ops),
+                    text(f"({expr.format(dim=int(dim))}) {opclass}"),
+                    postgresql_using="hnsw",
+                    postgresql_with={"m": 16, "ef_construction": 64},
+                    postgresql_where=where,
+                )
+            )
+    return indexes
+
+
 class ChunkEmbedding(Base):
     __tablename__ = "chunk_embeddings"
 
@@ -99,15 +183,71 @@ class ChunkEmbedding(Base):
 
     embedding_model_version: Mapped[str] = mapped_column(String(64), nullable=False)
 
-    # Decide a single dimension for MVP (make it config-driven later)
-    embedding: Mapped[list[float]] = mapped_column(Vector(1536), nullable=False)
+    # any dimension; settings.rag_embedding_dims fixes it per model for indexing
+    embedding: Mapped[list[float]] = mapped_column(Vector(), nullable=False)
+
+    # copied from the chunk's document so retrieval filters run inside the ANN scan
+    doc_id: Mapped[str] = mapped_column(String(128), nullable=False)
+    source_type: Mapped[str] = mapped_column(String(32), nullable=False)
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
 
     chunk: Mapped["DocumentChunk"] = relationship(back_populates="embeddings")
 
     __table_args__ = (
-        UniqueConstraint("chunk_id", "embedding_model_version", name="uq_chunk_embeddings_chunk_model"),
+        UniqueConstraint(
+            "chunk_id",
+            "embedding_model_version",
+            name="uq_chunk_embeddings_chunk_model",
+        ),
+        # selective filters (one document, a rare source type) are cheaper as an
+        # exact scan over these than as a filtered ANN scan
+        Index("ix_chunk_embeddings_model_doc_id", "embedding_model_version", "doc_id"),
+        Index(
+            "ix_chunk_embeddings_model_source_type",
+            "embedding_model_version",
+            "source_type",
+        ),
+        *_model_indexes(),
+    )
+
+
+class EmbeddingCacheEntry(Base):
+    """Content-addressed embeddings: identical text is embedded once per model."""
+
+    __tablename__ = "embedding_cache"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+
+    content_sha256: Mapped[str] = mapped_column(String(64), nullable=False)
+    embedding_model_version: Mapped[str] = mapped_column(String(64), nullable=False)
+    embedding: Mapped[list[float]] = mapped_column(Vector(), nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+    __table_args__ = (
+        UniqueConstraint(
+            "content_sha256",
+            "embedding_model_version",
+            name="uq_embedding_cache_sha_model",
+        ),
+    )
+
+
+class CorpusVersion(Base):
+    """Single-row counter bumped whenever ingestion changes the searchable corpus.
+
+    Retrieval caches key on it, so a bump invalidates every cached result.
+    """
+
+    __tablename__ = "corpus_version"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)  # always 1
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
     )
 
 
@@ -129,6 +269,38 @@ class IngestionRun(Base):
     started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
     finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
 
+    # job queue lease: set by the worker that claimed the run, refreshed by heartbeat
+    claimed_by: Mapped[Optional[str]] = mapped_column(String(64))
+    claimed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    attempts: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+
+    # batch ingestion: children point at their batch's parent run (source_type "batch").
+    # run_id is unique through an index, not a constraint, so the FK is added after
+    # the table (and that index) exist, as in migration 4a6c0e2b8d51
+    parent_run_id: Mapped[Optional[str]] = mapped_column(
+        String(64),
+        ForeignKey(
+            "ingestion_runs.run_id",
+            ondelete="CASCADE",
+            use_alter=True,
+            name="ingestion_runs_parent_run_id_fkey",
+        ),
+        index=True,
+    )
+    # sha256 of the source file's bytes, recorded before parsing to skip duplicates
+    file_sha256: Mapped[Optional[str]] = mapped_column(String(64), index=True)
+
+    __table_args__ = (
+        # only queued runs are ever scanned by workers; keep that index tiny
+        Index(
+            "ix_ingestion_runs_queue",
+            "started_at",
+            postgresql_where=text("status = 'STARTED'"),
+        ),
+    )
+
 
 class RetrievalLog(Base):
     __tablename__ = "retrieval_logs"
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Any, Optional
 
-from pydantic import BaseModel, Field, HttpUrl
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class DocumentDTO(BaseModel):
@@ -32,6 +32,7 @@ class ChunkDTO(BaseModel):
 
 
 class IngestionRunDTO(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
     run_id: str = Field(..., max_length=64)
     pipeline_version: str = Field(..., max_length=64)
     source_type: Optional[str] = Field(default=None, max_length=32)
@@ -41,6 +42,34 @@ class IngestionRunDTO(BaseModel):
     error_message: Optional[str] = None
     started_at: Optional[datetime] = None
     finished_at: Optional[datetime] = None
+    parent_run_id: Optional[str] = Field(default=None, max_length=64)
+    file_sha256: Optional[str] = Field(default=None, max_length=64)
+
+
+class IngestionBatchCreateDTO(BaseModel):
+    # explicit paths/URIs and/or glob patterns (``**`` recurses) on the ingestion hosts
+    source_uris: list[str] = Field(default_factory=list)
+    globs: list[str] = Field(default_factory=list)
+    requested_by: str = "unknown"
+
+
+class IngestionBatchDTO(BaseModel):
+    run_id: str = Field(..., max_length=64)
+    pipeline_version: str = Field(..., max_length=64)
+    status: str = Field(..., max_length=16)
+    error_message: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    total: int
+    queued: int
+    running: int
+    succeeded: int
+    failed: int
+    duplicates: int  # skipped: same file bytes as another run (included in succeeded)
+    chunk_count: int
+    elapsed_seconds: float
+    documents_per_minute: Optional[float] = None
+    eta_seconds: Optional[float] = None
 
 
 class RetrievalResultDTO(BaseModel):
@@ -48,6 +77,8 @@ class RetrievalResultDTO(BaseModel):
     doc_id: str
     score: float
     snippet: Optional[str] = None
+    # the whole chunk, for the reranker and the answer prompt; never serialized
+    content: Optional[str] = Field(default=None, exclude=True)
     source_uri: Optional[str] = None
     deep_link: Optional[str] = None
     metadata_json: dict[str, Any] = Field(default_factory=dict)
@@ -68,3 +99,19 @@ class FeedbackCreateDTO(BaseModel):
     rating: Optional[int] = Field(default=None, ge=1, le=5)
     is_helpful: Optional[bool] = None
     comment: Optional[str] = None
+
+
+class ConverterStatsDTO(BaseModel):
+    pid: int
+    loaded: bool
+    loaded_at: Optional[datetime] = None
+    load_seconds: Optional[float] = None
+    warmed_up: bool
+    warmup_seconds: Optional[float] = None
+
+
+class ParserStatusDTO(BaseModel):
+    eager_load: bool
+    pool_workers: int
+    api_process: ConverterStatsDTO
+    pool_processes: list[ConverterStatsDTO] = Field(default_factory=list)
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import json
+from typing import Any, AsyncIterator, Callable, Literal
+
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import JSON, Table, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+BulkInsertMethod = Literal["copy", "executemany"]
+
+# bytes handed to COPY per chunk; bounds memory for 100k-row documents
+_COPY_CHUNK_BYTES = 1 << 20
+
+
+async def insert_rows(
+    session: AsyncSession,
+    *,
+    table: Table,
+    rows: list[dict[str, Any]],
+    method: BulkInsertMethod = "copy",
+) -> None:
+    """Insert many rows without building ORM objects.
+
+    ``copy`` streams CSV through asyncpg's COPY protocol (fastest; vectors are
+    sent as text literals so no per-connection codec is needed). Any other
+    driver, or ``executemany``, uses a Core INSERT that SQLAlchemy batches
+    into multi-row VALUES statements.
+    """
+    if not rows:
+        return
+    conn = await session.connection()
+    if method == "copy" and conn.dialect.driver == "asyncpg":
+        columns = list(rows[0].keys())
+        raw = await conn.get_raw_connection()
+        # None only once the connection was invalidated; the INSERT then fails loudly
+        if raw.driver_connection is not None:
+            await raw.driver_connection.copy_to_table(
+                table.name,
+                source=_csv_chunks(table, columns, rows),
+                columns=columns,
+                format="csv",
+            )
+            return
+    await session.execute(insert(table), rows)
+
+
+async def _csv_chunks(
+    table: Table, columns: list[str], rows: list[dict[str, Any]]
+) -> AsyncIterator[bytes]:
+    encoders = [_encoder_for(table, c) for c in columns]
+    buf: list[str] = []
+    size = 0
+    for row in rows:
+        fields = (enc(row[c]) for c, enc in zip(columns, encoders, strict=True))
+        line = ",".join(fields) + "\n"
+        buf.append(line)
+        size += len(line)
+        if size >= _COPY_CHUNK_BYTES:
+            yield "".join(buf).encode("utf-8")
+            buf, size = [], 0
+    if buf:
+        yield "".join(buf).encode("utf-8")
+
+
+def _encoder_for(table: Table, column: str) -> Callable[[Any], str]:
+    col_type = table.c[column].type
+    if isinstance(col_type, Vector):
+        return lambda v: _csv_field(
+            None if v is None else "[" + ",".join(str(float(x)) for x in v) + "]"
+        )
+    if isinstance(col_type, JSON):
+        return lambda v: _csv_field(None if v is None else json.dumps(v))
+    return _csv_field
+
+
+def _csv_field(value: Any) -> str:
+    # unquoted empty = NULL in COPY ... CSV; strings are always quoted so "" stays ""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+    return '"' + str(value).replace('"', '""') + '"'
@@ -1,6 +1,12 @@
 from __future__ import annotations
 
-from app.features.rag.domain.models import DocumentChunk
+from datetime import datetime
+from typing import Sequence
+
+from app.features.rag.domain.models import TEXT_SEARCH_CONFIG, Document, DocumentChunk
+from app.features.rag.repo.bulk import BulkInsertMethod, insert_rows
+from sqlalchemy import Row, Text, bindparam, cast, delete, func, literal, select, update
+from sqlalchemy.dialects.postgresql import REGCONFIG
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -14,3 +20,130 @@ async def bulk_create(
     session.add_all(objs)
     await session.flush()
     return objs
+
+
+async def bulk_insert(
+    session: AsyncSession,
+    *,
+    doc_id: str,
+    rows: list[dict],
+    method: BulkInsertMethod = "copy",
+) -> None:
+    """Like bulk_create, minus the ORM unit of work; nothing is returned."""
+    await insert_rows(
+        session,
+        table=DocumentChunk.__table__,
+        rows=[{"doc_id": doc_id, **r} for r in rows],
+        method=method,
+    )
+
+
+async def list_ordinals(session: AsyncSession, *, doc_id: str) -> dict[str, int]:
+    """chunk_id -> ordinal for every chunk currently stored for ``doc_id``."""
+    q = select(DocumentChunk.chunk_id, DocumentChunk.ordinal).where(
+        DocumentChunk.doc_id == doc_id
+    )
+    return {chunk_id: ordinal for chunk_id, ordinal in (await session.execute(q)).all()}
+
+
+async def park_ordinals(session: AsyncSession, *, doc_id: str) -> None:
+    """Move every stored chunk of ``doc_id`` to a distinct negative ordinal.
+
+    A re-ingestion then assigns final ordinals batch by batch without ever
+    colliding with a chunk that has not been renumbered (or deleted) yet.
+    Chunks still parked by a failed run are renumbered along with the rest,
+    so they stay negative too.
+    """
+    order = (DocumentChunk.ordinal, DocumentChunk.id)
+    position = func.row_number().over(order_by=order)
+    parked = (
+        select(DocumentChunk.id, (-position).label("ordinal"))
+        .where(DocumentChunk.doc_id == doc_id)
+        .subquery()
+    )
+    await session.execute(
+        update(DocumentChunk)
+        .where(DocumentChunk.id == parked.c.id)
+        .values(ordinal=parked.c.ordinal)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def delete_parked(session: AsyncSession, *, doc_id: str) -> int:
+    """Delete the chunks a re-ingestion never reassigned; returns how many."""
+    result = await session.execute(
+        delete(DocumentChunk)
+        .where(DocumentChunk.doc_id == doc_id)
+        .where(DocumentChunk.ordinal < 0)
+        .returning(DocumentChunk.id)
+    )
+    return len(result.all())
+
+
+async def update_ordinals(session: AsyncSession, *, ordinals: dict[str, int]) -> None:
+    if not ordinals:
+        return
+    table = DocumentChunk.__table__
+    stmt = (
+        update(table)
+        .where(table.c.chunk_id == bindparam("b_chunk_id"))
+        .values(ordinal=bindparam("b_ordinal"))
+    )
+    await session.execute(
+        stmt,
+        [
+            {"b_chunk_id": chunk_id, "b_ordinal": ordinal}
+            for chunk_id, ordinal in ordinals.items()
+        ],
+    )
+
+
+async def keyword_search(
+    session: AsyncSession,
+    *,
+    query_text: str,
+    top_k: int,
+    doc_ids: Sequence[str] | None = None,
+    source_types: Sequence[str] | None = None,
+    ingested_after: datetime | None = None,
+    ingested_before: datetime | None = None,
+) -> Sequence[Row]:
+    """Full-text search over chunk content, best match first (GIN on content_tsv).
+
+    Any query term may match (terms are OR-ed, unlike plainto_tsquery), so a
+    question that merely mentions an error code still finds it; ts_rank_cd
+    with length normalization puts chunks matching more terms, closer
+    together, first.
+    """
+    config = literal(TEXT_SEARCH_CONFIG).cast(REGCONFIG)
+    tsquery = func.to_tsquery(
+        config,
+        func.replace(cast(func.plainto_tsquery(config, query_text), Text), "&", "|"),
+    )
+    rank = func.ts_rank_cd(DocumentChunk.content_tsv, tsquery, 1)
+    q = (
+        select(
+            DocumentChunk.chunk_id,
+            DocumentChunk.doc_id,
+            DocumentChunk.content,
+            DocumentChunk.start_ref,
+            DocumentChunk.page_start,
+            DocumentChunk.page_end,
+            DocumentChunk.metadata_json,
+            Document.source_uri,
+            rank.label("rank"),
+        )
+        .join(Document, Document.doc_id == DocumentChunk.doc_id)
+        .where(DocumentChunk.content_tsv.bool_op("@@")(tsquery))
+        .order_by(rank.desc(), DocumentChunk.id)
+        .limit(top_k)
+    )
+    if doc_ids:
+        q = q.where(DocumentChunk.doc_id.in_(doc_ids))
+    if source_types:
+        q = q.where(Document.source_type.in_(source_types))
+    if ingested_after is not None:
+        q = q.where(DocumentChunk.created_at >= ingested_after)
+    if ingested_before is not None:
+        q = q.where(DocumentChunk.created_at < ingested_before)
+    return (await session.execute(q)).all()
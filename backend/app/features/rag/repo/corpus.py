@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from app.features.rag.domain.models import CorpusVersion
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+_ROW_ID = 1
+
+
+async def get_version(session: AsyncSession) -> int:
+    q = select(CorpusVersion.version).where(CorpusVersion.id == _ROW_ID)
+    return (await session.execute(q)).scalar_one_or_none() or 0
+
+
+async def bump_version(session: AsyncSession) -> int:
+    """Increment the corpus version in the caller's transaction; return the new one."""
+    stmt = (
+        insert(CorpusVersion)
+        .values(id=_ROW_ID, version=1)
+        .on_conflict_do_update(
+            index_elements=[CorpusVersion.id],
+            set_={"version": CorpusVersion.version + 1, "updated_at": func.now()},
+        )
+        .returning(CorpusVersion.version)
+    )
+    return (await session.execute(stmt)).scalar_one()
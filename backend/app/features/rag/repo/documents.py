@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from app.features.rag.domain.models import Document
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
 
 
 async def get_by_doc_id(session: AsyncSession, *, doc_id: str) -> Document | None:
@@ -10,6 +13,27 @@ async def get_by_doc_id(session: AsyncSession, *, doc_id: str) -> Document | Non
     return (await session.execute(q)).scalar_one_or_none()
 
 
+@asynccontextmanager
+async def ingest_lock(
+    bind: AsyncEngine | AsyncConnection, *, doc_id: str
+) -> AsyncIterator[None]:
+    """Serialize concurrent ingestions of the same document.
+
+    Ingestion commits once per batch, so a transaction-scoped lock would be
+    released after the first batch. This holds a session-level advisory lock
+    on a dedicated connection for the whole block instead. ``bind`` is a
+    session's bind; the lock connection comes from its engine.
+    """
+    engine = bind.engine if isinstance(bind, AsyncConnection) else bind
+    key = func.hashtext(doc_id)
+    async with engine.connect() as conn:
+        await conn.execute(select(func.pg_advisory_lock(key)))
+        try:
+            yield
+        finally:
+            await conn.execute(select(func.pg_advisory_unlock(key)))
+
+
 async def create(
     session: AsyncSession,
     *,
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from typing import Any
+
+from app.features.rag.domain.models import EmbeddingCacheEntry
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# keep IN (...) lists and multi-row VALUES well below the bind-parameter limit
+_LOOKUP_CHUNK = 1_000
+
+
+async def get_many(
+    session: AsyncSession,
+    *,
+    hashes: list[str],
+    embedding_model_version: str,
+) -> dict[str, Any]:
+    found: dict[str, Any] = {}
+    for i in range(0, len(hashes), _LOOKUP_CHUNK):
+        q = (
+            select(EmbeddingCacheEntry.content_sha256, EmbeddingCacheEntry.embedding)
+            .where(
+                EmbeddingCacheEntry.embedding_model_version == embedding_model_version
+            )
+            .where(
+                EmbeddingCacheEntry.content_sha256.in_(hashes[i : i + _LOOKUP_CHUNK])
+            )
+        )
+        for sha, vec in (await session.execute(q)).all():
+            found[sha] = vec
+    return found
+
+
+async def put_many(session: AsyncSession, *, rows: list[dict]) -> None:
+    if not rows:
+        return
+    for i in range(0, len(rows), _LOOKUP_CHUNK):
+        stmt = insert(EmbeddingCacheEntry).values(rows[i : i + _LOOKUP_CHUNK])
+        # another worker may have cached the same text meanwhile; either copy is fine
+        stmt = stmt.on_conflict_do_nothing(constraint="uq_embedding_cache_sha_model")
+        await session.execute(stmt)
@@ -1,13 +1,209 @@
 from __future__ import annotations
 
-from app.features.rag.domain.models import ChunkEmbedding
+from datetime import datetime
+from typing import Any, Literal, Sequence
+
+from app.features.rag.domain.models import (
+    PRECISION_INDEX_FLAVOURS,
+    ChunkEmbedding,
+    Document,
+    DocumentChunk,
+    VectorPrecision,
+    model_index_name,
+    model_precision,
+)
+from app.features.rag.repo.bulk import BulkInsertMethod, insert_rows
+from pgvector.sqlalchemy import BIT, HALFVEC, Vector
+from sqlalchemy import ColumnElement, Row, bindparam, cast, func, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+DistanceMetric = Literal["cosine", "inner_product"]
+
 
 async def bulk_create(
     session: AsyncSession,
     *,
+    doc_id: str,
+    source_type: str,
     rows: list[dict],
 ) -> None:
-    session.add_all([ChunkEmbedding(**r) for r in rows])
+    session.add_all(
+        [ChunkEmbedding(doc_id=doc_id, source_type=source_type, **r) for r in rows]
+    )
     await session.flush()
+
+
+async def bulk_insert(
+    session: AsyncSession,
+    *,
+    doc_id: str,
+    source_type: str,
+    rows: list[dict],
+    method: BulkInsertMethod = "copy",
+) -> None:
+    await insert_rows(
+        session,
+        table=ChunkEmbedding.__table__,
+        rows=[{"doc_id": doc_id, "source_type": source_type, **r} for r in rows],
+        method=method,
+    )
+
+
+async def embedded_chunk_ids(
+    session: AsyncSession,
+    *,
+    doc_id: str,
+    embedding_model_version: str,
+) -> set[str]:
+    q = (
+        select(ChunkEmbedding.chunk_id)
+        .join(DocumentChunk, DocumentChunk.chunk_id == ChunkEmbedding.chunk_id)
+        .where(DocumentChunk.doc_id == doc_id)
+        .where(ChunkEmbedding.embedding_model_version == embedding_model_version)
+    )
+    return set((await session.execute(q)).scalars().all())
+
+
+async def set_search_params(
+    session: AsyncSession,
+    *,
+    ef_search: int,
+    probes: int,
+    iterative_scan: str = "off",
+) -> None:
+    # is_local=true scopes every knob to the current transaction only
+    knobs = [
+        func.set_config("hnsw.ef_search", str(ef_search), True),
+        func.set_config("ivfflat.probes", str(probes), True),
+    ]
+    if iterative_scan != "off":
+        # unknown before pgvector 0.8, so only set when asked for
+        knobs.append(func.set_config("hnsw.iterative_scan", iterative_scan, True))
+    await session.execute(select(*knobs))
+
+
+async def vector_extension_version(session: AsyncSession) -> tuple[int, ...] | None:
+    q = text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+    version = (await session.execute(q)).scalar_one_or_none()
+    if version is None:
+        return None
+    return tuple(int(p) for p in version.split(".") if p.isdigit())
+
+
+async def missing_model_indexes(
+    session: AsyncSession, models: Sequence[str]
+) -> list[str]:
+    """Partial HNSW indexes the given models' precisions search but that don't exist."""
+    expected = [
+        model_index_name(model, ops)
+        for model in models
+        for ops in PRECISION_INDEX_FLAVOURS[model_precision(model)]
+    ]
+    q = text("SELECT indexname FROM pg_indexes WHERE indexname = ANY(:names)")
+    found = set((await session.execute(q, {"names": expected})).scalars().all())
+    return [name for name in expected if name not in found]
+
+
+async def search(
+    session: AsyncSession,
+    *,
+    query_vector: list[float],
+    embedding_model_version: str,
+    dim: int,
+    top_k: int,
+    metric: DistanceMetric = "cosine",
+    precision: VectorPrecision = "full",
+    candidates: int | None = None,
+    doc_ids: Sequence[str] | None = None,
+    source_types: Sequence[str] | None = None,
+    ingested_after: datetime | None = None,
+    ingested_before: datetime | None = None,
+) -> Sequence[Row]:
+    """Nearest chunks for one model, filtered by document, source type or ingest time.
+
+    The scan matches that model's partial HNSW index: the column is cast to
+    ``dim`` exactly as the index expression is, and the model name is inlined
+    as a literal (a bound parameter can't prove the index predicate). Filters
+    use columns of chunk_embeddings itself, so Postgres applies them while
+    walking the graph, and an iterative scan keeps going until ``top_k`` rows
+    pass them.
+
+    With ``precision`` "half" or "binary" the graph walk uses the quantized
+    index instead and keeps ``candidates`` rows, which are then re-ranked by
+    their exact distance on the stored float32 vectors. The returned distance
+    is always the exact one.
+    """
+    embedding = cast(ChunkEmbedding.embedding, Vector(dim))
+    # typed, so overloaded functions like binary_quantize() can resolve
+    query = cast(
+        bindparam("query_vector", query_vector, type_=Vector(dim)), Vector(dim)
+    )
+    distance = _distance(embedding, query, metric)
+
+    if precision == "full":
+        first_pass, keep = distance, top_k
+    elif precision == "half":
+        first_pass = _distance(
+            cast(ChunkEmbedding.embedding, HALFVEC(dim)),
+            cast(query, HALFVEC(dim)),
+            metric,
+        )
+        keep = max(candidates or top_k, top_k)
+    else:
+        # Hamming distance between sign bits approximates either metric well
+        # enough to pick candidates; the exact metric then re-ranks them
+        first_pass = cast(func.binary_quantize(embedding), BIT(dim)).hamming_distance(
+            cast(func.binary_quantize(query), BIT(dim))
+        )
+        keep = max(candidates or top_k, top_k)
+
+    scan = (
+        select(ChunkEmbedding.chunk_id, distance.label("distance"))
+        .where(
+            ChunkEmbedding.embedding_model_version
+            == bindparam(
+                "embedding_model_version", embedding_model_version, literal_execute=True
+            )
+        )
+        .order_by(first_pass)
+        .limit(keep)
+    )
+    if doc_ids:
+        scan = scan.where(ChunkEmbedding.doc_id.in_(doc_ids))
+    if source_types:
+        scan = scan.where(ChunkEmbedding.source_type.in_(source_types))
+    if ingested_after is not None:
+        scan = scan.where(ChunkEmbedding.created_at >= ingested_after)
+    if ingested_before is not None:
+        scan = scan.where(ChunkEmbedding.created_at < ingested_before)
+    nearest = scan.subquery()
+
+    # re-rank on the exact distance: a no-op reorder for "full" (bar relaxed_order
+    # iterative scans, which may emit slightly out of order), the real ranking otherwise
+    q = (
+        select(
+            nearest.c.chunk_id,
+            DocumentChunk.doc_id,
+            DocumentChunk.content,
+            DocumentChunk.start_ref,
+            DocumentChunk.page_start,
+            DocumentChunk.page_end,
+            DocumentChunk.metadata_json,
+            Document.source_uri,
+            nearest.c.distance,
+        )
+        .join(DocumentChunk, DocumentChunk.chunk_id == nearest.c.chunk_id)
+        .join(Document, Document.doc_id == DocumentChunk.doc_id)
+        .order_by(nearest.c.distance, nearest.c.chunk_id)
+        .limit(top_k)
+    )
+    return (await session.execute(q)).all()
+
+
+def _distance(
+    embedding: ColumnElement[Any], query: ColumnElement[Any], metric: DistanceMetric
+) -> ColumnElement[float]:
+    if metric == "cosine":
+        return embedding.cosine_distance(query)
+    # pgvector returns the *negative* inner product so that ASC order is best-first
+    return embedding.max_inner_product(query)
@@ -1,11 +1,16 @@
 from __future__ import annotations
 
-from datetime import datetime
-from sqlalchemy import select
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Row, func, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.features.rag.domain.enums import IngestionStatus
 from app.features.rag.domain.models import IngestionRun
+from app.features.rag.repo.bulk import BulkInsertMethod, insert_rows
+
+# source_type of a batch's parent run; parents only aggregate their children
+BATCH_SOURCE_TYPE = "batch"
 
 
 async def create(
@@ -15,6 +20,7 @@ async def create(
     pipeline_version: str,
     source_type: str | None,
     source_uri: str | None,
+    stats_json: dict | None = None,
 ) -> IngestionRun:
     run = IngestionRun(
         run_id=run_id,
@@ -22,12 +28,32 @@ async def create(
         source_type=source_type,
         source_uri=source_uri,
         status=IngestionStatus.STARTED.value,
+        stats_json=stats_json or {},
     )
     session.add(run)
     await session.flush()
     return run
 
 
+async def create_many(
+    session: AsyncSession,
+    *,
+    rows: list[dict],
+    method: BulkInsertMethod = "copy",
+) -> None:
+    """Queue many runs at once (a batch's children); rows need run_id,
+    pipeline_version, source_type, source_uri and optionally parent_run_id."""
+    await insert_rows(
+        session,
+        table=IngestionRun.__table__,
+        rows=[
+            {"status": IngestionStatus.STARTED.value, "stats_json": {}, **r}
+            for r in rows
+        ],
+        method=method,
+    )
+
+
 async def mark_succeeded(session: AsyncSession, *, run_id: str, stats_json: dict) -> None:
     run = await get_by_run_id(session, run_id=run_id)
     run.status = IngestionStatus.SUCCEEDED.value
@@ -48,3 +74,158 @@ async def get_by_run_id(session: AsyncSession, *, run_id: str) -> IngestionRun:
     q = select(IngestionRun).where(IngestionRun.run_id == run_id)
     run = (await session.execute(q)).scalar_one()
     return run
+
+
+async def find_by_run_id(session: AsyncSession, *, run_id: str) -> IngestionRun | None:
+    q = select(IngestionRun).where(IngestionRun.run_id == run_id)
+    return (await session.execute(q)).scalar_one_or_none()
+
+
+async def claim_next(
+    session: AsyncSession,
+    *,
+    worker_id: str,
+    lease_timeout_s: float,
+) -> IngestionRun | None:
+    """Lease the oldest queued run; concurrent workers skip rows already locked.
+
+    A run whose lease expired (worker died mid-job) becomes claimable again.
+    The caller must commit to release the row lock.
+    """
+    q = (
+        select(IngestionRun)
+        .where(IngestionRun.status == IngestionStatus.STARTED.value)
+        .where(
+            or_(
+                IngestionRun.claimed_at.is_(None),
+                IngestionRun.claimed_at
+                < datetime.now(timezone.utc) - timedelta(seconds=lease_timeout_s),
+            )
+        )
+        # batch parents finish when their children do; there is nothing to process
+        .where(
+            or_(
+                IngestionRun.source_type.is_(None),
+                IngestionRun.source_type != BATCH_SOURCE_TYPE,
+            )
+        )
+        # a batch's children share one started_at; id keeps them in manifest order
+        .order_by(IngestionRun.started_at, IngestionRun.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    run = (await session.execute(q)).scalar_one_or_none()
+    if run is None:
+        return None
+    run.claimed_by = worker_id
+    run.claimed_at = datetime.now(timezone.utc)
+    run.attempts = run.attempts + 1
+    await session.flush()
+    return run
+
+
+async def heartbeat(session: AsyncSession, *, run_id: str, worker_id: str) -> None:
+    await session.execute(
+        update(IngestionRun)
+        .where(IngestionRun.run_id == run_id)
+        .where(IngestionRun.claimed_by == worker_id)
+        .values(claimed_at=datetime.now(timezone.utc))
+    )
+
+
+async def lock_file_checksum(session: AsyncSession, *, file_sha256: str) -> None:
+    """Serialize duplicate checks for the same file bytes until commit/rollback."""
+    await session.execute(
+        select(func.pg_advisory_xact_lock(func.hashtext(file_sha256)))
+    )
+
+
+async def find_by_file_sha256(
+    session: AsyncSession,
+    *,
+    file_sha256: str,
+    pipeline_version: str,
+    exclude_run_id: str,
+) -> IngestionRun | None:
+    """Oldest run that ingested (or is ingesting) these exact file bytes."""
+    q = (
+        select(IngestionRun)
+        .where(IngestionRun.file_sha256 == file_sha256)
+        .where(IngestionRun.pipeline_version == pipeline_version)
+        .where(IngestionRun.run_id != exclude_run_id)
+        .where(
+            IngestionRun.status.in_(
+                [IngestionStatus.STARTED.value, IngestionStatus.SUCCEEDED.value]
+            )
+        )
+        .order_by(IngestionRun.started_at)
+        .limit(1)
+    )
+    return (await session.execute(q)).scalar_one_or_none()
+
+
+async def set_file_sha256(
+    session: AsyncSession, *, run_id: str, file_sha256: str
+) -> None:
+    await session.execute(
+        update(IngestionRun)
+        .where(IngestionRun.run_id == run_id)
+        .values(file_sha256=file_sha256)
+    )
+
+
+async def batch_counts(session: AsyncSession, *, parent_run_id: str) -> Row:
+    """One-row aggregate over a batch's children."""
+    started = IngestionRun.status == IngestionStatus.STARTED.value
+    q = select(
+        func.count().label("total"),
+        func.count().filter(started, IngestionRun.claimed_by.is_(None)).label("queued"),
+        func.count()
+        .filter(started, IngestionRun.claimed_by.is_not(None))
+        .label("running"),
+        func.count()
+        .filter(IngestionRun.status == IngestionStatus.SUCCEEDED.value)
+        .label("succeeded"),
+        func.count()
+        .filter(IngestionRun.status == IngestionStatus.FAILED.value)
+        .label("failed"),
+        func.count()
+        .filter(IngestionRun.stats_json["duplicate_of"].as_string().is_not(None))
+        .label("duplicates"),
+        func.coalesce(
+            func.sum(IngestionRun.stats_json["chunk_count"].as_integer()), 0
+        ).label("chunk_count"),
+    ).where(IngestionRun.parent_run_id == parent_run_id)
+    return (await session.execute(q)).one()
+
+
+async def finish_batch_if_done(session: AsyncSession, *, parent_run_id: str) -> None:
+    """Close a batch's parent run once none of its children is still queued or running.
+
+    The parent row lock makes concurrent finishers take turns; each re-counts
+    after its own child was committed, so the last one always sees the batch done.
+    """
+    q = (
+        select(IngestionRun)
+        .where(IngestionRun.run_id == parent_run_id)
+        .with_for_update()
+    )
+    parent = (await session.execute(q)).scalar_one()
+    if parent.status != IngestionStatus.STARTED.value:
+        return
+    counts = await batch_counts(session, parent_run_id=parent_run_id)
+    if counts.queued or counts.running:
+        return
+    if counts.failed:
+        parent.status = IngestionStatus.FAILED.value
+        parent.error_message = f"{counts.failed} of {counts.total} documents failed"
+    else:
+        parent.status = IngestionStatus.SUCCEEDED.value
+    parent.stats_json = {
+        **parent.stats_json,
+        "succeeded": counts.succeeded,
+        "failed": counts.failed,
+        "duplicates": counts.duplicates,
+        "chunk_count": counts.chunk_count,
+    }
+    parent.finished_at = datetime.now(timezone.utc)
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from app.features.rag.domain.models import RagQuerySession, RetrievalLog
+from app.features.rag.repo.bulk import BulkInsertMethod, insert_rows
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def insert_sessions(
+    session: AsyncSession,
+    *,
+    rows: list[dict],
+    method: BulkInsertMethod = "copy",
+) -> None:
+    await insert_rows(
+        session, table=RagQuerySession.__table__, rows=rows, method=method
+    )
+
+
+async def insert_retrievals(
+    session: AsyncSession,
+    *,
+    rows: list[dict],
+    method: BulkInsertMethod = "copy",
+) -> None:
+    await insert_rows(session, table=RetrievalLog.__table__, rows=rows, method=method)
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import hashlib
+from array import array
+from typing import Any
+
+from app.core.cache import LRUCache
+from app.features.rag.repo import embedding_cache
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .pipeline import EmbeddingPipeline
+
+
+def content_sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Content-addressed embedding cache: in-process LRU in front of Postgres.
+
+    Keys are ``(sha256(text), embedding_model_version)``. Only texts missing
+    from both levels reach the embedding provider; their vectors are written
+    back so later documents (and other workers) reuse them.
+    """
+
+    def __init__(self, *, lru_size: int = 20_000) -> None:
+        # float32 arrays: ~6 KB per 1536-d entry instead of ~50 KB as a list of floats
+        self._lru: LRUCache[tuple[str, str], array] = LRUCache(lru_size)
+
+    async def lookup(
+        self,
+        session: AsyncSession,
+        hashes: list[str],
+        *,
+        embedding_model_version: str,
+    ) -> tuple[dict[str, Any], dict[str, int]]:
+        """Vectors already known for ``hashes`` (LRU first, then Postgres)."""
+        model = embedding_model_version
+        resolved: dict[str, Any] = {}
+        for sha in hashes:
+            hit = self._lru.get((sha, model))
+            if hit is not None:
+                resolved[sha] = hit.tolist()
+        lru_hits = len(resolved)
+
+        pending = list(dict.fromkeys(sha for sha in hashes if sha not in resolved))
+        from_db = await embedding_cache.get_many(
+            session, hashes=pending, embedding_model_version=model
+        )
+        resolved.update(from_db)
+        self.remember(from_db, embedding_model_version=model)
+
+        misses = len({sha for sha in hashes if sha not in resolved})
+        stats = {
+            "embedding_cache_lru_hits": lru_hits,
+            "embedding_cache_db_hits": len(from_db),
+            "embedding_cache_misses": misses,
+        }
+        return resolved, stats
+
+    def remember(
+        self, vectors: dict[str, Any], *, embedding_model_version: str
+    ) -> None:
+        for sha, v in vectors.items():
+            self._lru.put((sha, embedding_model_version), array("f", v))
+
+    async def persist(
+        self,
+        session: AsyncSession,
+        vectors: dict[str, Any],
+        *,
+        embedding_model_version: str,
+    ) -> None:
+        await embedding_cache.put_many(
+            session,
+            rows=[
+                {
+                    "content_sha256": sha,
+                    "embedding_model_version": embedding_model_version,
+                    "embedding": v,
+                }
+                for sha, v in vectors.items()
+            ],
+        )
+
+    async def embed(
+        self,
+        session: AsyncSession,
+        texts: list[str],
+        *,
+        embedder: EmbeddingPipeline,
+    ) -> tuple[list[Any], dict[str, int]]:
+        model = embedder.model_version
+        hashes = [content_sha256(t) for t in texts]
+        resolved, stats = await self.lookup(
+            session, hashes, embedding_model_version=model
+        )
+
+        fresh = await self.embed_misses(hashes, texts, resolved, embedder=embedder)
+        await self.persist(session, fresh, embedding_model_version=model)
+        resolved.update(fresh)
+        return [resolved[sha] for sha in hashes], stats
+
+    async def embed_misses(
+        self,
+        hashes: list[str],
+        texts: list[str],
+        resolved: dict[str, Any],
+        *,
+        embedder: EmbeddingPipeline,
+    ) -> dict[str, Any]:
+        """Embed each distinct text not in ``resolved`` once; returns sha -> vector."""
+        text_by_sha = dict(zip(hashes, texts, strict=True))
+        misses = [sha for sha in dict.fromkeys(hashes) if sha not in resolved]
+        if not misses:
+            return {}
+        vectors = await embedder.embed([text_by_sha[sha] for sha in misses])
+        fresh = dict(zip(misses, vectors, strict=True))
+        self.remember(fresh, embedding_model_version=embedder.model_version)
+        return fresh
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+from typing import Iterator
+
+from .providers import EmbeddingError, EmbeddingProvider
+
+logger = logging.getLogger(__name__)
+
+# Transient failures worth retrying besides an explicit retryable EmbeddingError.
+_RETRYABLE = (asyncio.TimeoutError, ConnectionError, OSError)
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 chars/token for English; good enough to keep requests under provider limits
+    return max(1, len(text) // 4)
+
+
+def iter_batches(
+    texts: list[str], *, max_batch_size: int, max_batch_tokens: int
+) -> Iterator[tuple[int, int]]:
+    """Yield ``[start, end)`` slices bounded by item count and estimated tokens.
+
+    A single text larger than the token budget still gets its own batch; the
+    provider decides whether to truncate or reject it.
+    """
+    start = 0
+    tokens = 0
+    for i, text in enumerate(texts):
+        t = estimate_tokens(text)
+        if i > start and (i - start >= max_batch_size or tokens + t > max_batch_tokens):
+            yield start, i
+            start, tokens = i, 0
+        tokens += t
+    if start < len(texts):
+        yield start, len(texts)
+
+
+class EmbeddingPipeline:
+    """Micro-batches texts and embeds them with bounded concurrency.
+
+    Output order always matches input order, whatever order batches finish in.
+    """
+
+    def __init__(
+        self,
+        provider: EmbeddingProvider,
+        *,
+        max_batch_size: int = 64,
+        max_batch_tokens: int = 8_000,
+        concurrency: int = 4,
+        max_retries: int = 3,
+        backoff_base_s: float = 0.5,
+        backoff_max_s: float = 8.0,
+    ) -> None:
+        self.provider = provider
+        self._max_batch_size = max_batch_size
+        self._max_batch_tokens = max_batch_tokens
+        self._concurrency = concurrency
+        self._max_retries = max_retries
+        self._backoff_base_s = backoff_base_s
+        self._backoff_max_s = backoff_max_s
+
+    @property
+    def model_version(self) -> str:
+        return self.provider.model_version
+
+    @property
+    def dim(self) -> int:
+        return self.provider.dim
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        out: list[list[float] | None] = [None] * len(texts)
+        sem = asyncio.Semaphore(self._concurrency)
+
+        async def run(start: int, end: int) -> None:
+            async with sem:
+                vectors = await self._embed_with_retry(texts[start:end])
+            out[start:end] = vectors
+
+        await asyncio.gather(
+            *(
+                run(start, end)
+                for start, end in iter_batches(
+                    texts,
+                    max_batch_size=self._max_batch_size,
+                    max_batch_tokens=self._max_batch_tokens,
+                )
+            )
+        )
+        return out  # type: ignore[return-value]
+
+    async def _embed_with_retry(self, batch: list[str]) -> list[list[float]]:
+        attempt = 0
+        while True:
+            try:
+                vectors = await self.provider.embed(batch)
+                break
+            except Exception as e:
+                retryable = isinstance(e, _RETRYABLE) or (
+                    isinstance(e, EmbeddingError) and e.retryable
+                )
+                if not retryable or attempt >= self._max_retries:
+                    raise
+                delay = min(self._backoff_max_s, self._backoff_base_s * 2**attempt)
+                # jitter so parallel batches don't retry in lockstep
+                delay *= random.uniform(0.5, 1.0)
+                logger.warning(
+                    "embedding batch of %d failed (%s); retry %d in %.2fs",
+                    len(batch),
+                    e,
+                    attempt + 1,
+                    delay,
+                )
+                await asyncio.sleep(delay)
+                attempt += 1
+
+        if len(vectors) != len(batch):
+            raise ValueError("embedding provider returned wrong number of vectors")
+        if any(len(v) != self.provider.dim for v in vectors):
+            raise ValueError(
+                f"embedding provider vectors must be length {self.provider.dim}"
+            )
+        return vectors
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import hashlib
+import inspect
+import math
+import random
+from typing import Awaitable, Callable, Protocol, Union
+
+EmbedFn = Callable[[list[str]], Union[list[list[float]], Awaitable[list[list[float]]]]]
+
+
+class EmbeddingError(Exception):
+    """Provider failure; ``retryable`` tells the pipeline to back off and retry."""
+
+    def __init__(self, message: str, *, retryable: bool = True) -> None:
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class EmbeddingProvider(Protocol):
+    model_version: str
+    dim: int
+
+    async def embed(self, texts: list[str]) -> list[list[float]]: ...
+
+
+class StubEmbeddingProvider:
+    """Deterministic local provider for dev/tests: same text -> same unit vector."""
+
+    def __init__(self, *, model_version: str = "stub-1536", dim: int = 1536) -> None:
+        self.model_version = model_version
+        self.dim = dim
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        return [self._vector(t) for t in texts]
+
+    def _vector(self, text: str) -> list[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+        rng = random.Random(seed)
+        v = [rng.gauss(0.0, 1.0) for _ in range(self.dim)]
+        norm = math.sqrt(sum(x * x for x in v)) or 1.0
+        return [x / norm for x in v]
+
+
+class CallableEmbeddingProvider:
+    """Adapts a plain (sync or async) ``embed_fn`` to the provider interface."""
+
+    def __init__(self, fn: EmbedFn, *, model_version: str, dim: int = 1536) -> None:
+        self._fn = fn
+        self.model_version = model_version
+        self.dim = dim
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        result = self._fn(texts)
+        return await result if inspect.isawaitable(result) else result
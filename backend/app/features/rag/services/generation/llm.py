@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import asyncio
+import re
+from typing import AsyncIterator, Protocol
+
+_TOKEN = re.compile(r"\S+\s*")
+
+
+class LLMClient(Protocol):
+    model_version: str
+
+    def stream(self, prompt: str, *, max_tokens: int) -> AsyncIterator[str]:
+        """Yield the completion for ``prompt`` as text deltas, as each one arrives."""
+        ...
+
+
+class FakeLLMClient:
+    """Local stand-in for dev/tests: streams a fixed answer word by word.
+
+    ``delay_s`` spaces the deltas out, to exercise streaming clients.
+    """
+
+    def __init__(
+        self,
+        *,
+        answer: str = (
+            "This is a placeholder answer from the local fake LLM; "
+            "see the cited passages."
+        ),
+        model_version: str = "fake-llm",
+        delay_s: float = 0.0,
+    ) -> None:
+        self.model_version = model_version
+        self._answer = answer
+        self._delay_s = delay_s
+        self.prompts: list[str] = []
+
+    async def stream(self, prompt: str, *, max_tokens: int) -> AsyncIterator[str]:
+        self.prompts.append(prompt)
+        for token in _TOKEN.findall(self._answer)[:max_tokens]:
+            if self._delay_s:
+                await asyncio.sleep(self._delay_s)
+            yield token
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from app.features.rag.domain.schemas import RetrievalResultDTO
+
+SYSTEM_PROMPT = (
+    "Answer the question using only the numbered sources below. Cite sources as [n]. "
+    "If the sources do not contain the answer, say so."
+)
+
+
+def build_prompt(
+    query_text: str, citations: list[RetrievalResultDTO], *, max_context_chars: int
+) -> str:
+    """Numbered sources, best first, then the query.
+
+    Sources are whole chunks; only the one that crosses ``max_context_chars``
+    is cut, and none follow it.
+    """
+    sources: list[str] = []
+    used = 0
+    for i, c in enumerate(citations, start=1):
+        passage = (c.content or c.snippet or "").strip()
+        if not passage:
+            continue
+        room = max_context_chars - used
+        if room <= 0:
+            break
+        label = c.source_uri or c.doc_id
+        sources.append(f"[{i}] ({label})\n{passage[:room]}")
+        used += len(passage)
+    context = "\n\n".join(sources) if sources else "(no sources found)"
+    return f"{SYSTEM_PROMPT}\n\nSources:\n{context}\n\nQuestion: {query_text}\nAnswer:"
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import json
+import logging
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator
+
+from app.features.rag.domain.schemas import RetrievalResultDTO
+from app.features.rag.services.query_log.sink import QueryLogSink
+from app.features.rag.services.retrieval.service import RetrievalService
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .llm import LLMClient
+from .prompt import build_prompt
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class AnswerDraft:
+    """One streamed answer: filled in while streaming, saved once the stream ends."""
+
+    session_id: str
+    query_text: str
+    embedding_model_version: str
+    answer_model_version: str
+    citations: list[RetrievalResultDTO]
+    retrieval_params: dict[str, Any]
+    trace: dict[str, Any]
+    prompt: str
+    parts: list[str] = field(default_factory=list)
+    finish_reason: str | None = None  # "stop" | "error" | None (client went away)
+
+    @property
+    def answer_text(self) -> str | None:
+        return "".join(self.parts) or None
+
+
+class AnswerService:
+    """Retrieval-augmented answers streamed as Server-Sent Events.
+
+    ``start`` does the retrieval while the request can still fail with a
+    normal HTTP error; ``events`` then streams the LLM output, and ``persist``
+    hands the finished session and its retrieval to the query log once the
+    stream is over.
+    """
+
+    def __init__(
+        self,
+        *,
+        retrieval: RetrievalService,
+        llm: LLMClient,
+        query_log: QueryLogSink | None = None,
+        max_context_chars: int = 12_000,
+        max_tokens: int = 512,
+    ) -> None:
+        self._retrieval = retrieval
+        self._llm = llm
+        self._query_log = query_log
+        self._max_context_chars = max_context_chars
+        self._max_tokens = max_tokens
+
+    async def start(
+        self,
+        *,
+        session: AsyncSession,
+        query_text: str,
+        embedding_model_version: str,
+        **retrieval_params: Any,
+    ) -> AnswerDraft:
+        trace: dict[str, Any] = {}
+        citations = await self._retrieval.retrieve(
+            session=session,
+            query_text=query_text,
+            embedding_model_version=embedding_model_version,
+            trace=trace,
+            **retrieval_params,
+        )
+        return AnswerDraft(
+            session_id=uuid.uuid4().hex,
+            query_text=query_text,
+            embedding_model_version=embedding_model_version,
+            answer_model_version=self._llm.model_version,
+            citations=citations,
+            retrieval_params=retrieval_params,
+            trace=trace,
+            prompt=build_prompt(
+                query_text, citations, max_context_chars=self._max_context_chars
+            ),
+        )
+
+    async def events(self, draft: AnswerDraft) -> AsyncIterator[str]:
+        # citations first: the client can render sources before the first token
+        yield _sse(
+            "citations",
+            {
+                "session_id": draft.session_id,
+                "citations": [c.model_dump(mode="json") for c in draft.citations],
+            },
+        )
+        try:
+            async for delta in self._llm.stream(
+                draft.prompt, max_tokens=self._max_tokens
+            ):
+                draft.parts.append(delta)
+                yield _sse("token", {"text": delta})
+        except Exception as e:
+            # headers are long gone: report in-band, keep what was generated
+            logger.exception("answer stream %s failed", draft.session_id)
+            draft.finish_reason = "error"
+            yield _sse("error", {"session_id": draft.session_id, "detail": str(e)})
+            return
+        draft.finish_reason = "stop"
+        yield _sse(
+            "done",
+            {
+                "session_id": draft.session_id,
+                "answer_model_version": draft.answer_model_version,
+                "finish_reason": draft.finish_reason,
+            },
+        )
+
+    async def persist(self, draft: AnswerDraft) -> None:
+        if self._query_log is None:
+            return
+        await self._query_log.log_session(
+            session_id=draft.session_id,
+            query_text=draft.query_text,
+            embedding_model_version=draft.embedding_model_version,
+            citations=draft.citations,
+            answer_text=draft.answer_text,
+            answer_model_version=draft.answer_model_version,
+            finish_reason=draft.finish_reason,
+        )
+        await self._query_log.log_retrieval(
+            retrieval_id=draft.session_id,
+            query_text=draft.query_text,
+            embedding_model_version=draft.embedding_model_version,
+            top_k=draft.retrieval_params.get("top_k", len(draft.citations)),
+            results=draft.citations,
+            params=draft.retrieval_params,
+            trace=draft.trace,
+        )
+
+
+def _sse(event: str, data: dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
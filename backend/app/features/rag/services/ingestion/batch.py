@@ -0,0 +1,125 @@
+"""Batch ingestion: expand a manifest into one queued run per document.
+
+    python -m app.features.rag.services.ingestion.batch /data/a.pdf /data/b.pdf
+    python -m app.features.rag.services.ingestion.batch --glob '/data/manuals/**/*.pdf'
+    python -m app.features.rag.services.ingestion.batch --manifest uris.txt --workers 8
+
+Creates a parent run with one child run per distinct source. With
+``--workers N`` (the default) this process also drains the queue with N
+concurrent jobs until the batch finishes; ``--workers 0`` only enqueues and
+leaves the work to the deployed ingestion workers. Progress is printed as it
+goes and is available at ``GET /rag/ingestion-batches/{run_id}``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import glob
+import logging
+import os
+from typing import Iterable
+
+from app.core.config import settings
+
+
+def expand_manifest(source_uris: Iterable[str], globs: Iterable[str]) -> list[str]:
+    """Explicit sources, then glob matches (sorted); duplicates dropped, order kept."""
+    found = list(source_uris)
+    for pattern in globs:
+        found.extend(
+            p for p in sorted(glob.glob(pattern, recursive=True)) if os.path.isfile(p)
+        )
+    return list(dict.fromkeys(u.strip() for u in found if u.strip()))
+
+
+async def _main(args: argparse.Namespace) -> None:
+    from app.db.session_async import AsyncSessionLocal, engine
+    from app.features.rag.api.deps import get_pdf_ingestion_service, get_pdf_parser
+
+    from .worker import IngestionWorker
+
+    source_uris = list(args.sources)
+    if args.manifest:
+        with open(args.manifest, encoding="utf-8") as f:
+            source_uris.extend(f.read().splitlines())
+
+    service = get_pdf_ingestion_service()
+    async with AsyncSessionLocal() as session:
+        run_id = await service.enqueue_batch(
+            session=session,
+            source_uris=source_uris,
+            globs=args.glob,
+            requested_by=args.requested_by,
+            max_documents=settings.ingestion_batch_max_documents,
+        )
+    print(f"batch {run_id} queued")
+
+    stop = asyncio.Event()
+    worker_task = None
+    if args.workers > 0:
+        worker = IngestionWorker(
+            service=service,
+            session_factory=AsyncSessionLocal,
+            concurrency=args.workers,
+            poll_interval_s=settings.ingestion_worker_poll_interval_s,
+            lease_timeout_s=settings.ingestion_lease_timeout_s,
+            max_attempts=settings.ingestion_max_attempts,
+        )
+        await get_pdf_parser().warmup()
+        worker_task = asyncio.create_task(worker.run(stop))
+
+    try:
+        while True:
+            async with AsyncSessionLocal() as session:
+                progress = await service.batch_progress(session=session, run_id=run_id)
+            if progress is None:
+                print(f"batch {run_id} not found")
+                break
+            done = progress.succeeded + progress.failed
+            print(
+                f"{progress.status:<9} {done}/{progress.total} done "
+                f"({progress.failed} failed, {progress.duplicates} duplicates, "
+                f"{progress.running} running) "
+                f"{progress.documents_per_minute or 0:.1f} docs/min"
+                + (f", eta {progress.eta_seconds:.0f}s" if progress.eta_seconds else "")
+            )
+            if progress.status != "STARTED" or worker_task is None:
+                break
+            await asyncio.sleep(args.progress_interval)
+    finally:
+        stop.set()
+        if worker_task is not None:
+            await worker_task
+            get_pdf_parser().shutdown()
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Queue (and optionally process) a batch of PDFs."
+    )
+    parser.add_argument("sources", nargs="*", help="paths or URIs to ingest")
+    parser.add_argument(
+        "--glob",
+        action="append",
+        default=[],
+        help="glob pattern; ** recurses (repeatable)",
+    )
+    parser.add_argument("--manifest", help="file with one path or URI per line")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.ingestion_worker_concurrency,
+        help="concurrent jobs run by this process; 0 = enqueue only",
+    )
+    parser.add_argument("--requested-by", default=os.environ.get("USER", "cli"))
+    parser.add_argument("--progress-interval", type=float, default=5.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,201 @@
 from __future__ import annotations
 
 import re
+from dataclasses import dataclass
+from typing import Iterable, Iterator
 
+from app.features.rag.services.embedding.pipeline import estimate_tokens
 
-def chunk_markdown(md: str, *, max_chars: int = 2_000, overlap: int = 200) -> list[str]:
+from .docling_parser import Block
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+@dataclass(frozen=True)
+class Chunk:
+    text: str
+    start_ref: str | None
+    end_ref: str | None
+    page_start: int | None
+    page_end: int | None
+    headings: tuple[str, ...] = ()
+
+
+def blocks_from_markdown(md: str) -> Iterator[Block]:
+    """Fallback structure for parsers that only return markdown."""
     md = re.sub(r"\n{3,}", "\n\n", md).strip()
-    if not md:
-        return []
-    out: list[str] = []
-    i = 0
-    while i < len(md):
-        j = min(len(md), i + max_chars)
-        out.append(md[i:j].strip())
-        if j == len(md):
+    for i, part in enumerate(p.strip() for p in md.split("\n\n")):
+        if not part:
+            continue
+        ref = f"#/md/{i}"
+        heading = re.match(r"^(#{1,6})\s+(.*)$", part)
+        if heading and "\n" not in part:
+            yield Block(kind="heading", text=part, ref=ref, level=len(heading.group(1)))
+        elif all(
+            line.lstrip().startswith("|") or set(line.strip()) <= set("-|: ")
+            for line in part.splitlines()
+        ):
+            yield Block(kind="table", text=part, ref=ref)
+        else:
+            yield Block(kind="paragraph", text=part, ref=ref)
+
+
+class Chunker:
+    """Pack document blocks into chunks of at most ``max_tokens``, incrementally.
+
+    Blocks are never cut mid-word: a heading starts a new chunk, tables and
+    paragraphs stay whole unless a single block exceeds the budget (then it is
+    split by rows or sentences). When a section spills into the next chunk,
+    that chunk opens with the trailing sentences of the previous one, up to
+    ``overlap_tokens`` and only as far as the next block leaves room. Headings
+    and overlaps count against ``max_tokens`` like any other text.
+
+    Blocks can arrive in any number of ``feed`` calls (e.g. one per parsed page
+    window); only the chunk being built is held in memory.
+    """
+
+    def __init__(self, *, max_tokens: int = 512, overlap_tokens: int = 64) -> None:
+        self._max_tokens = max_tokens
+        self._overlap_tokens = overlap_tokens
+        self._headings: list[tuple[int, str]] = []
+        self._current: list[Block] = []
+        self._has_content = False
+
+    def feed(self, block: Block) -> Iterator[Chunk]:
+        if block.kind == "heading":
+            yield from self._flush()
+            while self._headings and self._headings[-1][0] >= block.level:
+                self._headings.pop()
+            self._headings.append((block.level, block.text.lstrip("# ").strip()))
+            self._current, self._has_content = [block], False
+            return
+
+        if self._has_content and not self._fits([*self._current, block]):
+            last = self._current[-1]
+            yield from self._flush()
+            # the overlap only gets the room the new block leaves
+            room = self._max_tokens - estimate_tokens(block.text)
+            overlap = _overlap_block(last, min(self._overlap_tokens, room))
+            fits = overlap is not None and self._fits([overlap, block])
+            self._current = [overlap] if overlap is not None and fits else []
+            self._has_content = False
+
+        if not self._fits([*self._current, block]):
+            # only a heading or an overlap leads the chunk: a block that fits on
+            # its own goes without it (the heading stays in the heading path)
+            lead = [b for b in self._current if b.kind == "heading"]
+            self._current = []
+            if not self._fits([block]):
+                # too big for any chunk: split it, with the heading leading the
+                # first piece if there is room
+                for piece in _split_block(block, self._max_tokens):
+                    blocks = [*lead, piece] if self._fits([*lead, piece]) else [piece]
+                    yield _make_chunk(blocks, self._heading_path())
+                    lead = []
+                self._has_content = False
+                return
+
+        self._current.append(block)
+        self._has_content = True
+
+    def finish(self) -> Iterator[Chunk]:
+        yield from self._flush()
+        self._current, self._has_content = [], False
+
+    def _fits(self, blocks: list[Block]) -> bool:
+        # measured on the joined chunk text, separators included
+        return estimate_tokens(_join(blocks)) <= self._max_tokens
+
+    def _flush(self) -> Iterator[Chunk]:
+        if self._has_content:
+            yield _make_chunk(self._current, self._heading_path())
+
+    def _heading_path(self) -> tuple[str, ...]:
+        return tuple(h for _, h in self._headings)
+
+
+def iter_chunks(
+    blocks: Iterable[Block],
+    *,
+    max_tokens: int = 512,
+    overlap_tokens: int = 64,
+) -> Iterator[Chunk]:
+    """Lazily chunk a block stream; see ``Chunker``."""
+    chunker = Chunker(max_tokens=max_tokens, overlap_tokens=overlap_tokens)
+    for block in blocks:
+        yield from chunker.feed(block)
+    yield from chunker.finish()
+
+
+def _make_chunk(blocks: list[Block], headings: tuple[str, ...]) -> Chunk:
+    pages = [b.page for b in blocks if b.page is not None]
+    return Chunk(
+        text=_join(blocks),
+        start_ref=blocks[0].ref,
+        end_ref=blocks[-1].ref,
+        page_start=min(pages) if pages else None,
+        page_end=max(pages) if pages else None,
+        headings=headings,
+    )
+
+
+def _join(blocks: list[Block]) -> str:
+    return "\n\n".join(b.text for b in blocks)
+
+
+def _overlap_block(block: Block, budget: int) -> Block | None:
+    if budget <= 0 or block.kind in ("table", "heading"):
+        return None
+    tail: list[str] = []
+    used = 0
+    for sentence in reversed(_SENTENCE_END.split(block.text)):
+        t = estimate_tokens(sentence)
+        if used + t > budget:
             break
-        i = max(0, j - overlap)
-    return [c for c in out if c]
+        tail.insert(0, sentence)
+        used += t
+    if not tail:
+        # one long sentence: fall back to its trailing words
+        words = block.text.split()
+        tail = words[-max(1, budget * 4 // 5):] if words else []
+    text = " ".join(tail).strip()
+    if not text:
+        return None
+    return Block(kind="overlap", text=text, ref=block.ref, page=block.page)
+
+
+def _split_block(block: Block, max_tokens: int) -> Iterator[Block]:
+    if block.kind == "table":
+        lines = block.text.splitlines()
+        header, rows = lines[:2], lines[2:]
+        yield from _pack_units(
+            block, rows, max_tokens, sep="\n", prefix="\n".join(header)
+        )
+        return
+    units = _SENTENCE_END.split(block.text)
+    if any(estimate_tokens(u) > max_tokens for u in units):
+        units = block.text.split()
+    yield from _pack_units(block, units, max_tokens, sep=" ")
+
+
+def _pack_units(
+    block: Block, units: list[str], max_tokens: int, *, sep: str, prefix: str = ""
+) -> Iterator[Block]:
+    buf: list[str] = []
+    for unit in units:
+        # measured on the piece text, prefix and separators included
+        grown = _piece(block, [*buf, unit], sep, prefix)
+        if buf and estimate_tokens(grown.text) > max_tokens:
+            yield _piece(block, buf, sep, prefix)
+            buf = []
+        buf.append(unit)
+    if buf:
+        yield _piece(block, buf, sep, prefix)
+
+
+def _piece(block: Block, units: list[str], sep: str, prefix: str) -> Block:
+    body = sep.join(units)
+    text = f"{prefix}\n{body}" if prefix else body
+    return Block(
+        kind=block.kind, text=text, ref=block.ref, page=block.page, level=block.level
+    )
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+from docling.datamodel.base_models import InputFormat
+from docling.document_converter import DocumentConverter
+
+# Process-wide DocumentConverter. Building one is cheap, but the layout/OCR
+# models behind it load on first use and take seconds, so every parser in the
+# process shares this instance instead of paying that cost per request.
+_converter: DocumentConverter | None = None
+_lock = threading.Lock()
+
+
+@dataclass
+class ConverterStats:
+    pid: int
+    loaded: bool = False
+    loaded_at: datetime | None = None
+    load_seconds: float | None = None
+    warmed_up: bool = False
+    warmup_seconds: float | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+_stats = ConverterStats(pid=os.getpid())
+
+
+def get_converter() -> DocumentConverter:
+    global _converter
+    if _converter is None:
+        with _lock:
+            if _converter is None:
+                started = time.perf_counter()
+                _converter = DocumentConverter()
+                _stats.load_seconds = time.perf_counter() - started
+                _stats.loaded_at = datetime.now(timezone.utc)
+                _stats.loaded = True
+    return _converter
+
+
+def warmup() -> ConverterStats:
+    """Load the PDF pipeline models now rather than on the first conversion."""
+    converter = get_converter()
+    with _lock:
+        if not _stats.warmed_up:
+            started = time.perf_counter()
+            converter.initialize_pipeline(InputFormat.PDF)
+            _stats.warmup_seconds = time.perf_counter() - started
+            _stats.warmed_up = True
+    return stats()
+
+
+def stats() -> ConverterStats:
+    return ConverterStats(**asdict(_stats))
@@ -1,23 +1,100 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import Any, Awaitable, Iterator, Protocol, Union, runtime_checkable
 
-from docling.document_converter import DocumentConverter
+import pypdfium2
+
+from . import converter_registry
+
+PageRange = tuple[int, int]  # 1-based, inclusive
+
+
+@dataclass(frozen=True)
+class Block:
+    """One structural element of a parsed document, in reading order."""
+
+    kind: str  # heading | paragraph | list_item | table | code | overlap
+    text: str
+    ref: str | None = None  # Docling self_ref, e.g. "#/texts/12"; used for deep links
+    page: int | None = None
+    level: int = 0  # heading depth; 0 for non-headings
 
 
 @dataclass(frozen=True)
 class ParsedDoc:
     markdown: str
     title: str | None
+    blocks: tuple[Block, ...] = ()
+
+
+class PdfParser(Protocol):
+    def parse(self, source_uri: str) -> Union[ParsedDoc, Awaitable[ParsedDoc]]: ...
+
+
+@runtime_checkable
+class PagedPdfParser(PdfParser, Protocol):
+    """A parser that can convert a PDF a few pages at a time."""
+
+    def page_count(
+        self, source_uri: str
+    ) -> Union[int | None, Awaitable[int | None]]: ...
+
+    def parse(
+        self, source_uri: str, page_range: PageRange | None = None
+    ) -> Union[ParsedDoc, Awaitable[ParsedDoc]]: ...
+
+
+# page furniture repeats on every page and only adds noise to chunks
+_SKIPPED_LABELS = {"page_header", "page_footer"}
+_HEADING_LABELS = {"title", "section_header"}
 
 
 class DoclingPdfParser:
-    def __init__(self) -> None:
-        self._converter = DocumentConverter()
+    def page_count(self, source_uri: str) -> int | None:
+        try:
+            pdf = pypdfium2.PdfDocument(source_uri)
+        except Exception:
+            # remote URL or unreadable locally: let Docling take the whole file
+            return None
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
 
-    def parse(self, source_uri: str) -> ParsedDoc:
-        result = self._converter.convert(source_uri)
+    def parse(self, source_uri: str, page_range: PageRange | None = None) -> ParsedDoc:
+        converter = converter_registry.get_converter()
+        if page_range is None:
+            result = converter.convert(source_uri)
+        else:
+            result = converter.convert(source_uri, page_range=page_range)
         doc = result.document
         md = doc.export_to_markdown()
         title = getattr(getattr(doc, "metadata", None), "title", None)
-        return ParsedDoc(markdown=md, title=title)
+        return ParsedDoc(markdown=md, title=title, blocks=tuple(_iter_blocks(doc)))
+
+
+def _iter_blocks(doc: Any) -> Iterator[Block]:
+    # ``doc`` is a DoclingDocument; items are read defensively across versions
+    for item, _depth in doc.iterate_items():
+        label = getattr(getattr(item, "label", None), "value", None)
+        if label in _SKIPPED_LABELS:
+            continue
+        prov = getattr(item, "prov", None)
+        page = prov[0].page_no if prov else None
+        ref = getattr(item, "self_ref", None)
+
+        if label == "table":
+            text = item.export_to_markdown(doc=doc)
+            kind, level = "table", 0
+        elif label in _HEADING_LABELS:
+            text = getattr(item, "text", "")
+            kind = "heading"
+            level = 1 if label == "title" else getattr(item, "level", 1) + 1
+        else:
+            text = getattr(item, "text", "")
+            kind = label if label in ("list_item", "code") else "paragraph"
+            level = 0
+
+        if text and text.strip():
+            yield Block(kind=kind, text=text.strip(), ref=ref, page=page, level=level)
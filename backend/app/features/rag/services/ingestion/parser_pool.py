@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, TypeVar, cast
+
+from . import converter_registry
+from .docling_parser import DoclingPdfParser, PagedPdfParser, PageRange, ParsedDoc
+
+T = TypeVar("T")
+
+# One parser per pool process; the DocumentConverter behind it comes from the
+# process-wide converter_registry, so model loading happens once per process.
+_worker_parser: PagedPdfParser = DoclingPdfParser()
+
+
+def _init_worker(
+    parser_factory: Callable[[], PagedPdfParser], eager_load: bool
+) -> None:
+    global _worker_parser
+    _worker_parser = parser_factory()
+    if eager_load:
+        converter_registry.warmup()
+
+
+def _worker_stats() -> dict[str, Any]:
+    return converter_registry.stats().as_dict()
+
+
+def _parse_in_worker(source_uri: str, page_range: PageRange | None) -> ParsedDoc:
+    # called in the pool process: a synchronous parser is the only kind that fits
+    return cast(ParsedDoc, _worker_parser.parse(source_uri, page_range))
+
+
+def _page_count_in_worker(source_uri: str) -> int | None:
+    return cast("int | None", _worker_parser.page_count(source_uri))
+
+
+class ProcessPoolPdfParser:
+    """Awaitable PdfParser that runs Docling conversions in a process pool.
+
+    Parsing is CPU-bound and holds the GIL, so a thread pool would still stall
+    the event loop; separate processes let several PDFs convert in parallel.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_workers: int = 2,
+        max_tasks_per_child: int | None = None,
+        eager_load: bool = False,
+        parser_factory: Callable[[], PagedPdfParser] = DoclingPdfParser,
+    ) -> None:
+        # ``parser_factory`` is pickled to the pool processes: a module-level
+        # callable that builds a synchronous parser there
+        self._parser_factory = parser_factory
+        self._max_workers = max_workers
+        self._max_tasks_per_child = max_tasks_per_child
+        self._eager_load = eager_load
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        # last stats reported by each pool process, keyed by pid
+        self._worker_stats: dict[int, dict[str, Any]] = {}
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn, not fork: forking a process that owns an event loop,
+                # DB connections or torch threads is unsafe
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self._max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self._parser_factory, self._eager_load),
+                    max_tasks_per_child=self._max_tasks_per_child,
+                )
+            return self._pool
+
+    def _discard_pool(self, pool: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+                self._worker_stats.clear()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    async def parse(
+        self, source_uri: str, page_range: PageRange | None = None
+    ) -> ParsedDoc:
+        return await self._submit(_parse_in_worker, source_uri, page_range)
+
+    async def page_count(self, source_uri: str) -> int | None:
+        return await self._submit(_page_count_in_worker, source_uri)
+
+    async def _submit(self, fn: Callable[..., T], *args: Any) -> T:
+        pool = self._get_pool()
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(pool, fn, *args)
+        except BrokenProcessPool:
+            # a worker died (e.g. OOM on a huge PDF); start fresh for the next job
+            self._discard_pool(pool)
+            raise
+
+    async def warmup(self) -> list[dict[str, Any]]:
+        """Start the pool with every process loading its Docling models first.
+
+        Eager loading happens in the pool initializer, so each process the pool
+        starts, including replacements for recycled or crashed ones, is warm
+        before it takes a PDF. Call this before the first parse; processes
+        already running keep loading on first use.
+        """
+        self._eager_load = True
+        return await self._probe(self._get_pool())
+
+    async def refresh_stats(self) -> list[dict[str, Any]]:
+        if self._pool is None:
+            return []
+        return await self._probe(self._pool)
+
+    async def _probe(self, pool: ProcessPoolExecutor) -> list[dict[str, Any]]:
+        # max_workers concurrent probes make the pool start all its processes,
+        # but one process may answer several, so some can go unreported
+        loop = asyncio.get_running_loop()
+        reports = await asyncio.gather(
+            *(
+                loop.run_in_executor(pool, _worker_stats)
+                for _ in range(self._max_workers)
+            )
+        )
+        for report in reports:
+            self._worker_stats[report["pid"]] = report
+        return list(self._worker_stats.values())
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+            self._worker_stats.clear()
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
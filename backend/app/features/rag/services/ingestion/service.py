@@ -1,40 +1,102 @@
 from __future__ import annotations
 
+import asyncio
 import hashlib
-import uuid
-from typing import Callable
 import inspect
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Iterator, TypeVar
 
-from app.features.rag.repo import chunks, documents, embeddings, ingestion_runs
+from app.features.rag.domain.schemas import IngestionBatchDTO
+from app.features.rag.repo import chunks, corpus, documents, embeddings, ingestion_runs
+from app.features.rag.repo.bulk import BulkInsertMethod
+from app.features.rag.services.embedding.cache import EmbeddingCache, content_sha256
+from app.features.rag.services.embedding.pipeline import EmbeddingPipeline
+from app.features.rag.services.embedding.providers import (
+    CallableEmbeddingProvider,
+    EmbedFn,
+)
+from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from .chunking import chunk_markdown
-from .docling_parser import DoclingPdfParser
+from .batch import expand_manifest
+from .chunking import Chunk, Chunker, blocks_from_markdown
+from .docling_parser import Block, PagedPdfParser, PageRange, ParsedDoc, PdfParser
+
+T = TypeVar("T")
+
 
-EmbedFn = Callable[[list[str]], list[list[float]]]
+def document_id_for(source_uri: str) -> str:
+    return hashlib.sha256(source_uri.encode("utf-8")).hexdigest()[:32]
+
+
+def file_sha256(source_uri: str) -> str | None:
+    """sha256 of a local file's bytes; None for URLs and missing paths."""
+    path = Path(source_uri)
+    if not path.is_file():
+        return None
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        while block := f.read(1 << 20):
+            h.update(block)
+    return h.hexdigest()
 
 
 class PdfIngestionService:
     def __init__(
         self,
         *,
-        parser: DoclingPdfParser,
-        embed_fn: EmbedFn,
-        embedding_model_version: str,
+        parser: PdfParser,
+        embedder: EmbeddingPipeline | None = None,
+        embed_fn: EmbedFn | None = None,
+        embedding_model_version: str | None = None,
+        embedding_cache: EmbeddingCache | None = None,
+        bulk_insert_method: BulkInsertMethod = "copy",
+        chunk_max_tokens: int = 512,
+        chunk_overlap_tokens: int = 64,
+        write_batch_size: int = 256,
+        queue_depth: int = 2,
+        parse_window_pages: int = 0,
         pipeline_version: str = "v0",
     ) -> None:
+        if embedder is None:
+            # plain embed_fn (sync or async) gets the default batching pipeline
+            if embed_fn is None or embedding_model_version is None:
+                raise ValueError(
+                    "PdfIngestionService needs an embedder"
+                    " or embed_fn + embedding_model_version"
+                )
+            embedder = EmbeddingPipeline(
+                CallableEmbeddingProvider(
+                    embed_fn, model_version=embedding_model_version
+                )
+            )
         self._parser = parser
-        self._embed_fn = embed_fn
-        self._embedding_model_version = embedding_model_version
+        self._embedder = embedder
+        self._embedding_cache = embedding_cache
+        self._bulk_insert_method = bulk_insert_method
+        self._chunk_max_tokens = chunk_max_tokens
+        self._chunk_overlap_tokens = chunk_overlap_tokens
+        self._write_batch_size = write_batch_size
+        self._queue_depth = queue_depth
+        self._parse_window_pages = parse_window_pages
+        self._embedding_model_version = (
+            embedding_model_version or embedder.model_version
+        )
         self._pipeline_version = pipeline_version
 
-    async def ingest_pdf(
+    async def enqueue(
         self,
         *,
         session: AsyncSession,
         source_uri: str,
         requested_by: str,
     ) -> str:
+        """Record a STARTED run for a worker to pick up; returns its run_id."""
         run_id = uuid.uuid4().hex
         await ingestion_runs.create(
             session,
@@ -42,72 +104,558 @@ class PdfIngestionService:
             pipeline_version=self._pipeline_version,
             source_type="pdf",
             source_uri=source_uri,
+            stats_json={
+                "requested_by": requested_by,
+                "source_uri": source_uri,
+                "pipeline_version": self._pipeline_version,
+            },
+        )
+        await session.commit()
+        return run_id
+
+    async def ingest_pdf(
+        self,
+        *,
+        session: AsyncSession,
+        source_uri: str,
+        requested_by: str,
+    ) -> str:
+        """Enqueue and process inline (scripts/tests); the API only enqueues."""
+        run_id = await self.enqueue(
+            session=session, source_uri=source_uri, requested_by=requested_by
+        )
+        await self.process_run(session=session, run_id=run_id)
+        return run_id
+
+    async def enqueue_batch(
+        self,
+        *,
+        session: AsyncSession,
+        source_uris: list[str],
+        globs: list[str],
+        requested_by: str,
+        max_documents: int | None = None,
+    ) -> str:
+        """Record a batch parent run plus one queued child per distinct source.
+
+        Children are processed by the regular ingestion workers.
+        """
+        # a recursive glob over a large share can take a while; keep it off the loop
+        manifest = await asyncio.to_thread(expand_manifest, source_uris, globs)
+        if not manifest:
+            raise HTTPException(status_code=422, detail="Manifest matched no documents")
+        if max_documents is not None and len(manifest) > max_documents:
+            raise HTTPException(
+                status_code=422,
+                detail=(
+                    f"Manifest has {len(manifest)} documents; "
+                    f"the limit is {max_documents}"
+                ),
+            )
+
+        parent_run_id = uuid.uuid4().hex
+        await ingestion_runs.create(
+            session,
+            run_id=parent_run_id,
+            pipeline_version=self._pipeline_version,
+            source_type=ingestion_runs.BATCH_SOURCE_TYPE,
+            source_uri=None,
+            stats_json={
+                "requested_by": requested_by,
+                "pipeline_version": self._pipeline_version,
+                "documents": len(manifest),
+                "globs": globs,
+            },
+        )
+        await ingestion_runs.create_many(
+            session,
+            rows=[
+                {
+                    "run_id": uuid.uuid4().hex,
+                    "pipeline_version": self._pipeline_version,
+                    "source_type": "pdf",
+                    "source_uri": source_uri,
+                    "parent_run_id": parent_run_id,
+                    "stats_json": {
+                        "requested_by": requested_by,
+                        "source_uri": source_uri,
+                        "pipeline_version": self._pipeline_version,
+                    },
+                }
+                for source_uri in manifest
+            ],
+            method=self._bulk_insert_method,
         )
+        await session.commit()
+        return parent_run_id
 
-        stats: dict = {"requested_by": requested_by, "source_uri": source_uri, "pipeline_version": self._pipeline_version}
+    async def batch_progress(
+        self, *, session: AsyncSession, run_id: str
+    ) -> IngestionBatchDTO | None:
+        parent = await ingestion_runs.find_by_run_id(session, run_id=run_id)
+        if parent is None or parent.source_type != ingestion_runs.BATCH_SOURCE_TYPE:
+            return None
+        counts = await ingestion_runs.batch_counts(session, parent_run_id=run_id)
 
+        elapsed = (
+            (parent.finished_at or datetime.now(timezone.utc)) - parent.started_at
+        ).total_seconds()
+        done = counts.succeeded + counts.failed
+        rate = done / elapsed if elapsed > 0 and done else None
+        remaining = counts.queued + counts.running
+        return IngestionBatchDTO(
+            run_id=parent.run_id,
+            pipeline_version=parent.pipeline_version,
+            status=parent.status,
+            error_message=parent.error_message,
+            started_at=parent.started_at,
+            finished_at=parent.finished_at,
+            total=counts.total,
+            queued=counts.queued,
+            running=counts.running,
+            succeeded=counts.succeeded,
+            failed=counts.failed,
+            duplicates=counts.duplicates,
+            chunk_count=counts.chunk_count,
+            elapsed_seconds=round(elapsed, 3),
+            documents_per_minute=round(rate * 60, 2) if rate else None,
+            eta_seconds=round(remaining / rate, 1) if rate and remaining else None,
+        )
+
+    async def process_run(self, *, session: AsyncSession, run_id: str) -> None:
+        run = await ingestion_runs.get_by_run_id(session, run_id=run_id)
+        source_uri = run.source_uri
+        parent_run_id = run.parent_run_id
+        stats: dict = dict(run.stats_json or {})
+        # don't sit idle in a transaction while hashing the file or waiting for a lock
+        await session.commit()
+
+        # set once chunks may have been written; failed runs commit their
+        # finished batches too
+        touched_corpus = False
         try:
-            result = self._parser.parse(source_uri)
-            parsed = await result if inspect.isawaitable(result) else result
-
-            checksum = hashlib.sha256(parsed.markdown.encode("utf-8")).hexdigest()
-            doc_id = checksum[:32]
-
-            stats["doc_id"] = doc_id
-
-            existing = await documents.get_by_doc_id(session, doc_id=doc_id)
-            if existing is None:
-                await documents.create(
-                    session,
-                    doc_id=doc_id,
-                    source_type="pdf",
-                    source_uri=source_uri,
-                    title=parsed.title,
-                    checksum=checksum,
-                    metadata_json={"parser": "docling"},
-                    ingestion_pipeline_version=self._pipeline_version,
+            if source_uri is None:
+                raise ValueError(f"Ingestion run {run_id} has no source_uri")
+            duplicate_of = None
+            if parent_run_id is not None:
+                duplicate_of = await self._find_duplicate(
+                    session, run_id=run_id, source_uri=source_uri
                 )
 
-            chunk_texts = chunk_markdown(parsed.markdown)
-            stats["chunk_count"] = len(chunk_texts)
-
-            chunk_rows = []
-            for ordinal, text in enumerate(chunk_texts):
-                chunk_rows.append(
-                    {
-                        "chunk_id": f"{doc_id}:{ordinal}",
-                        "ordinal": ordinal,
-                        "content": text,
-                        "metadata_json": {},
-                    }
+            if duplicate_of is not None:
+                # same bytes as a run that ingested (or is ingesting) them: skip parsing
+                stats["duplicate_of"] = duplicate_of
+                await ingestion_runs.mark_succeeded(
+                    session, run_id=run_id, stats_json=stats
                 )
+                await session.commit()
+            else:
+                # identity follows the source, not the content: an edited file updates
+                # the same document instead of creating a new one
+                doc_id = document_id_for(source_uri)
+                stats["doc_id"] = doc_id
+                async with documents.ingest_lock(session.bind, doc_id=doc_id):
+                    touched_corpus = True
+                    await self._ingest_document(
+                        session, doc_id=doc_id, source_uri=source_uri, stats=stats
+                    )
+                    # invalidates cached retrieval results in every API process
+                    stats["corpus_version"] = await corpus.bump_version(session)
+                    await ingestion_runs.mark_succeeded(
+                        session, run_id=run_id, stats_json=stats
+                    )
+                    await session.commit()
+
+        except Exception as e:
+            # batches already committed stay; the next run for this source
+            # renumbers or deletes whatever this one left behind
+            await session.rollback()
+            if touched_corpus:
+                stats["corpus_version"] = await corpus.bump_version(session)
+            await ingestion_runs.mark_failed(
+                session, run_id=run_id, error_message=str(e), stats_json=stats
+            )
+            await session.commit()
+
+        if parent_run_id is not None:
+            await ingestion_runs.finish_batch_if_done(
+                session, parent_run_id=parent_run_id
+            )
+            await session.commit()
+
+    async def _find_duplicate(
+        self, session: AsyncSession, *, run_id: str, source_uri: str
+    ) -> str | None:
+        """run_id of another run over the same file bytes.
+
+        None if there is none, after claiming the bytes for this run.
+        """
+        sha = await asyncio.to_thread(file_sha256, source_uri)
+        if sha is None:
+            return None
+        # two workers holding identical files must not both decide they are first
+        await ingestion_runs.lock_file_checksum(session, file_sha256=sha)
+        duplicate = await ingestion_runs.find_by_file_sha256(
+            session,
+            file_sha256=sha,
+            pipeline_version=self._pipeline_version,
+            exclude_run_id=run_id,
+        )
+        if duplicate is None:
+            await ingestion_runs.set_file_sha256(
+                session, run_id=run_id, file_sha256=sha
+            )
+        await session.commit()
+        return duplicate.run_id if duplicate is not None else None
+
+    async def _ingest_document(
+        self,
+        session: AsyncSession,
+        *,
+        doc_id: str,
+        source_uri: str,
+        stats: dict,
+    ) -> None:
+        """Stream one document through parse -> chunk -> embed -> write.
 
-            created_chunks = await chunks.bulk_create(session, doc_id=doc_id, rows=chunk_rows)
-
-            # embed (MVP: batch all)
-            vectors = self._embed_fn([c.content for c in created_chunks])
-            if len(vectors) != len(created_chunks):
-                raise ValueError("embed_fn returned wrong number of vectors")
-            if any(len(v) != 1536 for v in vectors):
-                raise ValueError("embed_fn vectors must be length 1536")
-
-            emb_rows = []
-            for c, v in zip(created_chunks, vectors, strict=True):
-                emb_rows.append(
-                    {
-                        "chunk_id": c.chunk_id,
-                        "embedding_model_version": self._embedding_model_version,
-                        "embedding": v,
-                    }
+        Stages are joined by queues of ``queue_depth`` items, so a slow stage
+        back-pressures the earlier ones and only a few batches are ever in
+        memory. The writer commits once per batch; for the whole document only
+        chunk ids are kept.
+        """
+        started = time.perf_counter()
+        if await documents.get_by_doc_id(session, doc_id=doc_id) is None:
+            await documents.create(
+                session,
+                doc_id=doc_id,
+                source_type="pdf",
+                source_uri=source_uri,
+                title=None,
+                checksum=None,
+                metadata_json={"parser": "docling"},
+                ingestion_pipeline_version=self._pipeline_version,
+            )
+        stored = await chunks.list_ordinals(session, doc_id=doc_id)
+        # kept chunks never embedded with this model version need a vector too
+        embedded = await embeddings.embedded_chunk_ids(
+            session,
+            doc_id=doc_id,
+            embedding_model_version=self._embedding_model_version,
+        )
+        if stored:
+            await chunks.park_ordinals(session, doc_id=doc_id)
+        await session.commit()
+
+        run = _DocumentRun(
+            session=session,
+            doc_id=doc_id,
+            source_uri=source_uri,
+            stored=stored,
+            embedded=embedded,
+        )
+        blocks_q: asyncio.Queue[tuple[Block, ...] | None] = asyncio.Queue(
+            maxsize=self._queue_depth
+        )
+        rows_q: asyncio.Queue[list[dict] | None] = asyncio.Queue(
+            maxsize=self._queue_depth
+        )
+        vectors_q: asyncio.Queue[_EmbeddedBatch | None] = asyncio.Queue(
+            maxsize=self._queue_depth
+        )
+        await _run_stages(
+            self._parse_stage(run, blocks_q),
+            self._chunk_stage(run, blocks_q, rows_q),
+            self._embed_stage(run, rows_q, vectors_q),
+            self._write_stage(run, vectors_q),
+        )
+
+        # stored chunks that were never reassigned an ordinal are gone from the source
+        deleted = await chunks.delete_parked(session, doc_id=doc_id)
+        doc = await documents.get_by_doc_id(session, doc_id=doc_id)
+        if doc is None:
+            raise RuntimeError(f"document {doc_id} was deleted while being ingested")
+        doc.title = run.title
+        doc.checksum = run.checksum.hexdigest()
+        doc.ingestion_pipeline_version = self._pipeline_version
+
+        counts = run.counts
+        stats.update(counts)
+        stats.update(run.cache_stats)
+        stats["chunks_unchanged"] = counts["chunk_count"] - counts["chunks_inserted"]
+        stats["chunks_deleted"] = deleted
+        if run.page_count is not None:
+            stats["page_count"] = run.page_count
+        stats["write_commits"] = run.commits
+        stats["stages"] = {name: stage.as_dict() for name, stage in run.stages.items()}
+        stats["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+
+    async def _parse_stage(self, run: _DocumentRun, out: asyncio.Queue) -> None:
+        stage = run.stages["parse"]
+        for page_range in await self._page_windows(run):
+            with stage.busy():
+                parsed = await self._parse_window(run.source_uri, page_range)
+                blocks = parsed.blocks or tuple(blocks_from_markdown(parsed.markdown))
+                run.checksum.update(parsed.markdown.encode("utf-8"))
+                if run.title is None:
+                    run.title = parsed.title
+                stage.count += len(blocks)
+            # the window's markdown is dropped here; only its blocks travel on
+            await out.put(blocks)
+        await out.put(None)
+
+    async def _parse_window(
+        self, source_uri: str, page_range: PageRange | None
+    ) -> ParsedDoc:
+        # windows are only planned for a PagedPdfParser (see _page_windows)
+        if page_range is None or not isinstance(self._parser, PagedPdfParser):
+            return await _resolve(self._parser.parse(source_uri))
+        return await _resolve(self._parser.parse(source_uri, page_range))
+
+    async def _page_windows(self, run: _DocumentRun) -> list[PageRange | None]:
+        if self._parse_window_pages <= 0 or not isinstance(
+            self._parser, PagedPdfParser
+        ):
+            return [None]
+        run.page_count = await _resolve(self._parser.page_count(run.source_uri))
+        if not run.page_count:
+            return [None]
+        size = self._parse_window_pages
+        return [
+            (first, min(first + size - 1, run.page_count))
+            for first in range(1, run.page_count + 1, size)
+        ]
+
+    async def _chunk_stage(
+        self, run: _DocumentRun, inp: asyncio.Queue, out: asyncio.Queue
+    ) -> None:
+        # one Chunker across windows, so chunks and heading paths span page boundaries
+        stage = run.stages["chunk"]
+        chunker = Chunker(
+            max_tokens=self._chunk_max_tokens, overlap_tokens=self._chunk_overlap_tokens
+        )
+        pending: list[dict] = []
+        done = False
+        while not done:
+            blocks = await inp.get()
+            done = blocks is None
+            with stage.busy():
+                produced = (
+                    list(chunker.finish())
+                    if done
+                    else [c for b in blocks for c in chunker.feed(b)]
                 )
+                pending.extend(self._chunk_row(run, c) for c in produced)
+                stage.count += len(produced)
+            while len(pending) >= self._write_batch_size or (done and pending):
+                batch, pending = (
+                    pending[: self._write_batch_size],
+                    pending[self._write_batch_size :],
+                )
+                await out.put(batch)
+        await out.put(None)
 
-            await embeddings.bulk_create(session, rows=emb_rows)
+    def _chunk_row(self, run: _DocumentRun, chunk: Chunk) -> dict:
+        sha = content_sha256(chunk.text)
+        n = run.occurrences[sha] = run.occurrences.get(sha, -1) + 1
+        ordinal, run.next_ordinal = run.next_ordinal, run.next_ordinal + 1
+        return {
+            # content-derived id: an unchanged chunk keeps its id wherever it moves
+            "chunk_id": f"{run.doc_id}:{sha[:24]}:{n}",
+            "ordinal": ordinal,
+            "content": chunk.text,
+            "content_sha256": sha,
+            "start_ref": _ref(chunk.start_ref),
+            "end_ref": _ref(chunk.end_ref),
+            "page_start": chunk.page_start,
+            "page_end": chunk.page_end,
+            "metadata_json": (
+                {"headings": list(chunk.headings)} if chunk.headings else {}
+            ),
+        }
 
-            await ingestion_runs.mark_succeeded(session, run_id=run_id, stats_json=stats)
-            await session.commit()
-            return run_id
+    async def _embed_stage(
+        self, run: _DocumentRun, inp: asyncio.Queue, out: asyncio.Queue
+    ) -> None:
+        stage = run.stages["embed"]
+        while (rows := await inp.get()) is not None:
+            with stage.busy():
+                to_embed = [r for r in rows if r["chunk_id"] not in run.embedded]
+                # micro-batched, concurrent; order matches to_embed
+                vectors, fresh = await self._embed(run, to_embed)
+                stage.count += len(to_embed)
+            await out.put(
+                _EmbeddedBatch(
+                    rows=rows, to_embed=to_embed, vectors=vectors, fresh=fresh
+                )
+            )
+        await out.put(None)
 
-        except Exception as e:
-            await ingestion_runs.mark_failed(session, run_id=run_id, error_message=str(e), stats_json=stats)
-            await session.commit()
-            return run_id
+    async def _embed(
+        self, run: _DocumentRun, rows: list[dict]
+    ) -> tuple[list, dict[str, Any]]:
+        """Vectors for ``rows``, plus the new ones the writer must add to the cache."""
+        if not rows:
+            return [], {}
+        texts = [r["content"] for r in rows]
+        if self._embedding_cache is None:
+            return await self._embedder.embed(texts), {}
+
+        hashes = [r["content_sha256"] for r in rows]
+        # the session is shared with the writer; hold the lock only for the lookup
+        async with run.db:
+            resolved, cache_stats = await self._embedding_cache.lookup(
+                run.session,
+                hashes,
+                embedding_model_version=self._embedding_model_version,
+            )
+        for k, v in cache_stats.items():
+            run.cache_stats[k] = run.cache_stats.get(k, 0) + v
+        fresh = await self._embedding_cache.embed_misses(
+            hashes, texts, resolved, embedder=self._embedder
+        )
+        resolved.update(fresh)
+        return [resolved[sha] for sha in hashes], fresh
+
+    async def _write_stage(self, run: _DocumentRun, inp: asyncio.Queue) -> None:
+        stage = run.stages["write"]
+        while (batch := await inp.get()) is not None:
+            async with run.db:
+                with stage.busy():
+                    await self._write_batch(run, batch)
+                    await run.session.commit()
+                    stage.count += len(batch.rows)
+            run.commits += 1
+
+    async def _write_batch(self, run: _DocumentRun, batch: _EmbeddedBatch) -> None:
+        session = run.session
+        kept = {
+            r["chunk_id"]: r["ordinal"]
+            for r in batch.rows
+            if r["chunk_id"] in run.stored
+        }
+        inserts = [r for r in batch.rows if r["chunk_id"] not in run.stored]
+
+        # every kept chunk was parked, so each one gets its final ordinal back
+        await chunks.update_ordinals(session, ordinals=kept)
+        await chunks.bulk_insert(
+            session, doc_id=run.doc_id, rows=inserts, method=self._bulk_insert_method
+        )
+        if batch.fresh and self._embedding_cache is not None:
+            await self._embedding_cache.persist(
+                session,
+                batch.fresh,
+                embedding_model_version=self._embedding_model_version,
+            )
+        await embeddings.bulk_insert(
+            session,
+            doc_id=run.doc_id,
+            source_type="pdf",
+            rows=[
+                {
+                    "chunk_id": r["chunk_id"],
+                    "embedding_model_version": self._embedding_model_version,
+                    "embedding": v,
+                }
+                for r, v in zip(batch.to_embed, batch.vectors, strict=True)
+            ],
+            method=self._bulk_insert_method,
+        )
+
+        run.counts["chunk_count"] += len(batch.rows)
+        run.counts["chunks_inserted"] += len(inserts)
+        run.counts["chunks_reordered"] += sum(
+            1 for cid, o in kept.items() if run.stored[cid] != o
+        )
+        run.counts["embeddings_created"] += len(batch.to_embed)
+
+
+@dataclass
+class _StageStats:
+    unit: str
+    count: int = 0
+    seconds: float = 0.0
+
+    @contextmanager
+    def busy(self) -> Iterator[None]:
+        # time spent working, not waiting on a neighbouring queue
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds += time.perf_counter() - started
+
+    def as_dict(self) -> dict[str, Any]:
+        rate = self.count / self.seconds if self.seconds else None
+        return {
+            self.unit: self.count,
+            "seconds": round(self.seconds, 3),
+            f"{self.unit}_per_s": round(rate, 1) if rate is not None else None,
+        }
+
+
+@dataclass
+class _DocumentRun:
+    """State one ingestion shares between its pipeline stages."""
+
+    session: AsyncSession
+    doc_id: str
+    source_uri: str
+    stored: dict[str, int]  # chunk_id -> ordinal before this run
+    embedded: set[str]
+    # serializes use of the one session between the embed and write stages
+    db: asyncio.Lock = field(default_factory=asyncio.Lock)
+    occurrences: dict[str, int] = field(default_factory=dict)
+    next_ordinal: int = 0
+    page_count: int | None = None
+    title: str | None = None
+    checksum: Any = field(default_factory=hashlib.sha256)
+    commits: int = 0
+    counts: dict[str, int] = field(
+        default_factory=lambda: dict.fromkeys(
+            (
+                "chunk_count",
+                "chunks_inserted",
+                "chunks_reordered",
+                "embeddings_created",
+            ),
+            0,
+        )
+    )
+    cache_stats: dict[str, int] = field(default_factory=dict)
+    stages: dict[str, _StageStats] = field(
+        default_factory=lambda: {
+            "parse": _StageStats("blocks"),
+            "chunk": _StageStats("chunks"),
+            "embed": _StageStats("embeddings"),
+            "write": _StageStats("chunks"),
+        }
+    )
+
+
+@dataclass
+class _EmbeddedBatch:
+    rows: list[dict]
+    to_embed: list[dict]
+    vectors: list
+    fresh: dict[str, Any]
+
+
+async def _run_stages(*stages: Awaitable[None]) -> None:
+    # unlike TaskGroup, re-raise the first failure itself rather than an ExceptionGroup
+    tasks = [asyncio.ensure_future(s) for s in stages]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def _resolve(value: T | Awaitable[T]) -> T:
+    return await value if inspect.isawaitable(value) else value
+
+
+def _ref(ref: str | None) -> str | None:
+    # DocumentChunk.start_ref/end_ref are String(128)
+    return ref[:128] if ref else None
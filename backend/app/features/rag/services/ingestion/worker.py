@@ -0,0 +1,155 @@
+"""Ingestion worker: drains STARTED runs from the ingestion_runs queue.
+
+Run with ``python -m app.features.rag.services.ingestion.worker``. Any number
+of worker processes can share the queue; ``FOR UPDATE SKIP LOCKED`` ensures a
+run is leased by exactly one of them.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+import signal
+import socket
+import uuid
+
+from app.core.config import settings
+from app.features.rag.repo import ingestion_runs
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from .service import PdfIngestionService
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionWorker:
+    def __init__(
+        self,
+        *,
+        service: PdfIngestionService,
+        session_factory: async_sessionmaker[AsyncSession],
+        concurrency: int = 2,
+        poll_interval_s: float = 1.0,
+        lease_timeout_s: float = 600.0,
+        max_attempts: int = 3,
+        worker_id: str | None = None,
+    ) -> None:
+        self._service = service
+        self._session_factory = session_factory
+        self._concurrency = concurrency
+        self._poll_interval_s = poll_interval_s
+        self._lease_timeout_s = lease_timeout_s
+        self._max_attempts = max_attempts
+        self.worker_id = (
+            worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        )
+
+    async def run_once(self) -> bool:
+        """Claim and process a single run. Returns False when the queue is empty."""
+        async with self._session_factory() as session:
+            run = await ingestion_runs.claim_next(
+                session,
+                worker_id=self.worker_id,
+                lease_timeout_s=self._lease_timeout_s,
+            )
+            if run is None:
+                await session.commit()
+                return False
+            run_id = run.run_id
+            if run.attempts > self._max_attempts:
+                await ingestion_runs.mark_failed(
+                    session,
+                    run_id=run_id,
+                    error_message=f"Gave up after {self._max_attempts} attempts",
+                )
+                await session.commit()
+                if run.parent_run_id is not None:
+                    await ingestion_runs.finish_batch_if_done(
+                        session, parent_run_id=run.parent_run_id
+                    )
+                    await session.commit()
+                return True
+            await session.commit()
+
+        heartbeat = asyncio.create_task(self._heartbeat(run_id))
+        try:
+            async with self._session_factory() as session:
+                await self._service.process_run(session=session, run_id=run_id)
+        finally:
+            heartbeat.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await heartbeat
+        return True
+
+    async def run(self, stop: asyncio.Event) -> None:
+        logger.info(
+            "ingestion worker %s starting (concurrency=%d)",
+            self.worker_id,
+            self._concurrency,
+        )
+        await asyncio.gather(*(self._loop(stop) for _ in range(self._concurrency)))
+
+    async def _loop(self, stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            try:
+                processed = await self.run_once()
+            except Exception:
+                logger.exception("ingestion worker %s: job loop error", self.worker_id)
+                processed = False
+            if not processed:
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(stop.wait(), timeout=self._poll_interval_s)
+
+    async def _heartbeat(self, run_id: str) -> None:
+        # keep the lease fresh so long documents are not re-claimed mid-run
+        interval = max(self._lease_timeout_s / 3, 1.0)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with self._session_factory() as session:
+                    await ingestion_runs.heartbeat(
+                        session, run_id=run_id, worker_id=self.worker_id
+                    )
+                    await session.commit()
+            except Exception:
+                logger.exception(
+                    "ingestion worker %s: heartbeat failed for %s",
+                    self.worker_id,
+                    run_id,
+                )
+
+
+async def _main() -> None:
+    from app.db.session_async import AsyncSessionLocal, engine
+    from app.features.rag.api.deps import get_pdf_ingestion_service, get_pdf_parser
+
+    worker = IngestionWorker(
+        service=get_pdf_ingestion_service(),
+        session_factory=AsyncSessionLocal,
+        concurrency=settings.ingestion_worker_concurrency,
+        poll_interval_s=settings.ingestion_worker_poll_interval_s,
+        lease_timeout_s=settings.ingestion_lease_timeout_s,
+        max_attempts=settings.ingestion_max_attempts,
+    )
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    try:
+        await get_pdf_parser().warmup()
+        await worker.run(stop)
+    finally:
+        get_pdf_parser().shutdown()
+        await engine.dispose()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Literal, Sequence
+
+from app.features.rag.domain.schemas import RetrievalResultDTO
+from app.features.rag.repo import query_logs
+from app.features.rag.repo.bulk import BulkInsertMethod
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+LogKind = Literal["session", "retrieval"]
+
+
+@dataclass
+class QueryLogStats:
+    submitted: int = 0
+    written: int = 0
+    dropped: int = 0  # queue full (or sink closed) when offered
+    failed: int = 0  # lost to a failed bulk insert
+    flushes: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class QueryLogSink:
+    """Buffers rag_queries / retrieval_logs rows and writes them in bulk, off the
+    request path.
+
+    Rows are flushed when ``max_batch`` are waiting or the oldest has waited
+    ``flush_interval_s``, one transaction per flush. At most ``max_pending``
+    rows are held: past that, new rows are dropped and counted, or with
+    ``block_when_full`` the caller waits up to ``put_timeout_s`` for room
+    first (backpressure on a slow database).
+
+    One instance per event loop; the flusher task starts with the first row,
+    and ``close`` drains what is left. Rows stay in the queue until they are
+    taken, synchronously, for a write, so ``flush`` always sees every row that
+    has not been written yet.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        max_batch: int = 500,
+        flush_interval_s: float = 1.0,
+        max_pending: int = 10_000,
+        block_when_full: bool = False,
+        put_timeout_s: float = 0.05,
+        bulk_insert_method: BulkInsertMethod = "copy",
+    ) -> None:
+        self._session_factory = session_factory
+        self._max_batch = max_batch
+        self._flush_interval_s = flush_interval_s
+        self._block_when_full = block_when_full
+        self._put_timeout_s = put_timeout_s
+        self._bulk_insert_method = bulk_insert_method
+        self._queue: asyncio.Queue[tuple[LogKind, dict[str, Any]]] = asyncio.Queue(
+            maxsize=max_pending
+        )
+        # set on every put (and by close), so the flusher can wait for rows
+        # without taking them off the queue
+        self._wakeup = asyncio.Event()
+        self._write_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._closed = False
+        self.stats = QueryLogStats()
+
+    async def log_session(
+        self,
+        *,
+        session_id: str,
+        query_text: str,
+        embedding_model_version: str,
+        citations: list[RetrievalResultDTO],
+        answer_text: str | None = None,
+        answer_model_version: str | None = None,
+        finish_reason: str | None = None,
+    ) -> bool:
+        return await self.put(
+            "session",
+            {
+                "session_id": session_id,
+                "query_text": query_text,
+                "answer_text": answer_text,
+                "answer_model_version": answer_model_version,
+                "embedding_model_version": embedding_model_version,
+                "citations_json": {
+                    "citations": [c.model_dump(mode="json") for c in citations],
+                    "finish_reason": finish_reason,
+                },
+                "created_at": datetime.now(timezone.utc),
+            },
+        )
+
+    async def log_retrieval(
+        self,
+        *,
+        retrieval_id: str,
+        query_text: str,
+        embedding_model_version: str,
+        top_k: int,
+        results: list[RetrievalResultDTO],
+        params: dict[str, Any],
+        trace: dict[str, Any] | None = None,
+    ) -> bool:
+        doc_ids: Sequence[str] = params.get("doc_ids") or ()
+        return await self.put(
+            "retrieval",
+            {
+                "retrieval_id": retrieval_id,
+                "doc_id": doc_ids[0] if len(doc_ids) == 1 else None,
+                "query_text": query_text,
+                "embedding_model_version": embedding_model_version,
+                "top_k": top_k,
+                "results_json": {
+                    "params": jsonable_encoder(params),
+                    "results": [
+                        {"chunk_id": r.chunk_id, "doc_id": r.doc_id, "score": r.score}
+                        for r in results
+                    ],
+                    # cache hit, rerank stage timing, ...
+                    "trace": trace or {},
+                },
+                "created_at": datetime.now(timezone.utc),
+            },
+        )
+
+    async def put(self, kind: LogKind, row: dict[str, Any]) -> bool:
+        """Queue one row; False if it was dropped."""
+        if self._closed:
+            self.stats.dropped += 1
+            return False
+        self._ensure_started()
+        try:
+            if self._block_when_full:
+                await asyncio.wait_for(
+                    self._queue.put((kind, row)), self._put_timeout_s
+                )
+            else:
+                self._queue.put_nowait((kind, row))
+        except (asyncio.QueueFull, TimeoutError):
+            self.stats.dropped += 1
+            return False
+        self.stats.submitted += 1
+        self._wakeup.set()
+        return True
+
+    async def flush(self) -> None:
+        """Write everything submitted so far."""
+        # waits out a flusher write in progress, so its rows are in too
+        await self._write(self._take(self._queue.qsize()))
+
+    async def close(self, timeout_s: float = 10.0) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._task is not None:
+            self._wakeup.set()
+            try:
+                await asyncio.wait_for(self._task, timeout_s)
+            except TimeoutError:
+                logger.warning("query log: drain timed out after %.1fs", timeout_s)
+        await self.flush()
+
+    def _ensure_started(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="query-log-flusher")
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while not (self._closed and self._queue.empty()):
+            if self._queue.empty():
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            # the oldest row waits at most flush_interval_s for a batch to fill
+            deadline = loop.time() + self._flush_interval_s
+            while self._queue.qsize() < self._max_batch and not self._closed:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except TimeoutError:
+                    break
+            await self._write(self._take(self._max_batch))
+
+    def _take(self, n: int) -> list[tuple[LogKind, dict[str, Any]]]:
+        batch: list[tuple[LogKind, dict[str, Any]]] = []
+        while len(batch) < n:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    async def _write(self, batch: list[tuple[LogKind, dict[str, Any]]]) -> None:
+        sessions = [row for kind, row in batch if kind == "session"]
+        retrievals = [row for kind, row in batch if kind == "retrieval"]
+        async with self._write_lock:
+            if not batch:
+                return
+            try:
+                async with self._session_factory() as session:
+                    if sessions:
+                        await query_logs.insert_sessions(
+                            session, rows=sessions, method=self._bulk_insert_method
+                        )
+                    if retrievals:
+                        await query_logs.insert_retrievals(
+                            session, rows=retrievals, method=self._bulk_insert_method
+                        )
+                    await session.commit()
+            except Exception:
+                # logs are best effort: count the loss and keep the sink going
+                logger.exception("query log: failed to write %d rows", len(batch))
+                self.stats.failed += len(batch)
+                return
+            self.stats.written += len(batch)
+            self.stats.flushes += 1
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import hashlib
+import time
+from array import array
+from typing import Hashable, Sequence
+
+from app.core.cache import LRUCache
+from app.features.rag.domain.schemas import RetrievalResultDTO
+from app.features.rag.repo import corpus
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .params import SearchParams
+
+
+def normalize_query(query_text: str) -> str:
+    return " ".join(query_text.casefold().split())
+
+
+def vector_hash(vector: Sequence[float]) -> str:
+    return hashlib.sha256(array("f", vector).tobytes()).hexdigest()
+
+
+class RetrievalCache:
+    """Two in-process levels in front of /rag/query.
+
+    1. (normalized query text, embedding_model_version) -> query vector
+    2. (corpus version, vector hash, top_k, search params) -> result list
+
+    Both are LRU with a TTL. Results are keyed on the corpus version, which
+    ingestion bumps on every run that touches chunks; it is re-read from
+    Postgres at most every ``version_check_s`` seconds, which bounds how long
+    a result can outlive the corpus it came from.
+    """
+
+    def __init__(
+        self,
+        *,
+        vector_size: int = 10_000,
+        vector_ttl_s: float | None = 3600.0,
+        result_size: int = 2_000,
+        result_ttl_s: float | None = 300.0,
+        version_check_s: float = 2.0,
+    ) -> None:
+        # float32 arrays, like the embedding cache: ~6 KB per 1536-d vector
+        self._vectors: LRUCache[tuple[str, str], array] = LRUCache(
+            vector_size, ttl_s=vector_ttl_s
+        )
+        self._results: LRUCache[Hashable, list[RetrievalResultDTO]] = LRUCache(
+            result_size, ttl_s=result_ttl_s
+        )
+        self._version_check_s = version_check_s
+        self._version: int | None = None
+        self._version_checked_at = float("-inf")
+
+    def get_query_vector(
+        self, query_text: str, embedding_model_version: str
+    ) -> list[float] | None:
+        hit = self._vectors.get((normalize_query(query_text), embedding_model_version))
+        return hit.tolist() if hit is not None else None
+
+    def put_query_vector(
+        self, query_text: str, embedding_model_version: str, vector: Sequence[float]
+    ) -> None:
+        self._vectors.put(
+            (normalize_query(query_text), embedding_model_version), array("f", vector)
+        )
+
+    async def corpus_version(self, session: AsyncSession) -> int:
+        now = time.monotonic()
+        if (
+            self._version is None
+            or now - self._version_checked_at >= self._version_check_s
+        ):
+            version = await corpus.get_version(session)
+            if self._version is not None and version != self._version:
+                # every cached result belongs to an older corpus; free them now
+                self._results.clear()
+            self._version, self._version_checked_at = version, now
+        return self._version
+
+    @staticmethod
+    def result_key(
+        *,
+        corpus_version: int,
+        query_vector: Sequence[float] | None,
+        query_text: str,
+        embedding_model_version: str,
+        params: SearchParams,
+    ) -> Hashable:
+        # the text only matters when the keyword side runs; vector-only queries
+        # that embed identically share an entry
+        text = normalize_query(query_text) if params.mode != "vector" else None
+        vec = vector_hash(query_vector) if query_vector is not None else None
+        return (corpus_version, vec, text, embedding_model_version, params)
+
+    def get_results(self, key: Hashable) -> list[RetrievalResultDTO] | None:
+        hit = self._results.get(key)
+        return list(hit) if hit is not None else None
+
+    def put_results(self, key: Hashable, results: list[RetrievalResultDTO]) -> None:
+        self._results.put(key, list(results))
+
+    def clear(self) -> None:
+        self._vectors.clear()
+        self._results.clear()
+        self._version = None
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Literal
+
+from app.features.rag.repo.embeddings import DistanceMetric, VectorPrecision
+
+RetrievalMode = Literal["vector", "keyword", "hybrid"]
+
+
+@dataclass(frozen=True)
+class SearchFilters:
+    # sorted tuples, so equal filters hash equal
+    doc_ids: tuple[str, ...] | None = None
+    source_types: tuple[str, ...] | None = None
+    ingested_after: datetime | None = None
+    ingested_before: datetime | None = None
+
+
+@dataclass(frozen=True)
+class SearchParams:
+    """Everything but the query that shapes a result list.
+
+    Frozen, so it hashes: the result cache keys on it as is.
+    """
+
+    top_k: int
+    metric: DistanceMetric
+    ef_search: int | None
+    probes: int | None
+    precision: VectorPrecision
+    mode: RetrievalMode
+    vector_weight: float
+    keyword_weight: float
+    rrf_k: int
+    rerank_candidates: int  # 0 = no rerank stage
+    filters: SearchFilters = SearchFilters()
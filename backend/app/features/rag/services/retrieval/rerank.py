@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import re
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Protocol
+
+from app.features.rag.domain.schemas import RetrievalResultDTO
+
+_WORD = re.compile(r"\w+")
+
+# scores one batch of passages, higher is better; blocking, runs on a worker thread
+BatchScorer = Callable[[list[str]], list[float]]
+
+
+class Reranker(Protocol):
+    name: str
+
+    def prepare(self, query: str, passages: list[str]) -> BatchScorer:
+        """A scorer for batches of ``passages``, all on one scale.
+
+        Statistics over the whole candidate set are computed here, once, so a
+        passage scores the same whichever batch it lands in. Blocking; runs on
+        a worker thread.
+        """
+        ...
+
+
+class LexicalReranker:
+    """BM25 over the candidate set: cheap, dependency-free, good at exact terms."""
+
+    name = "lexical-bm25"
+
+    def __init__(self, *, k1: float = 1.2, b: float = 0.75) -> None:
+        self._k1 = k1
+        self._b = b
+
+    def prepare(self, query: str, passages: list[str]) -> BatchScorer:
+        terms = set(_tokens(query))
+        docs = [Counter(_tokens(p)) for p in passages]
+        avg_len = sum(sum(d.values()) for d in docs) / (len(docs) or 1) or 1.0
+        df = Counter(t for d in docs for t in terms if t in d)
+        idf = {
+            t: math.log(1 + (len(docs) - df[t] + 0.5) / (df[t] + 0.5)) for t in terms
+        }
+        return partial(self._score, idf, avg_len)
+
+    def _score(
+        self, idf: dict[str, float], avg_len: float, passages: list[str]
+    ) -> list[float]:
+        scores = []
+        for p in passages:
+            d = Counter(_tokens(p))
+            norm = self._k1 * (1 - self._b + self._b * sum(d.values()) / avg_len)
+            scores.append(
+                sum(
+                    w * d[t] * (self._k1 + 1) / (d[t] + norm)
+                    for t, w in idf.items()
+                    if d[t]
+                )
+            )
+        return scores
+
+
+class CrossEncoderReranker:
+    """Local sentence-transformers cross-encoder, loaded on first use.
+
+    Needs the ``rerank`` extra (``pip install .[rerank]``).
+    """
+
+    def __init__(self, model_name: str, *, device: str | None = None) -> None:
+        self.name = model_name
+        self._device = device
+        self._model: Any = None
+
+    def prepare(self, query: str, passages: list[str]) -> BatchScorer:
+        # each (query, passage) pair is scored on its own: nothing to precompute
+        return partial(self.score, query)
+
+    def score(self, query: str, passages: list[str]) -> list[float]:
+        if self._model is None:
+            from sentence_transformers import CrossEncoder
+
+            self._model = CrossEncoder(self.name, device=self._device)
+        return [float(s) for s in self._model.predict([(query, p) for p in passages])]
+
+
+class RerankStage:
+    """Scores retrieval candidates in batches on a thread pool, within a time budget.
+
+    The reranker is prepared once over every candidate's full text, then
+    batches are submitted best-first (retrieval order) and scored in
+    parallel. Whatever has not finished when ``budget_s`` runs out is not
+    waited for. Only the leading run of finished batches is reordered by
+    rerank score; everything from the first unfinished (or failed) batch on
+    follows in retrieval order, so a slow reranker degrades to plain
+    retrieval instead of a slow response, and never promotes a worse hit
+    over a better one it did not get to score.
+    """
+
+    def __init__(
+        self,
+        reranker: Reranker,
+        *,
+        executor: ThreadPoolExecutor,
+        batch_size: int = 16,
+        budget_s: float = 0.3,
+    ) -> None:
+        self.reranker = reranker
+        self._executor = executor
+        self._batch_size = batch_size
+        self._budget_s = budget_s
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def rerank(
+        self,
+        query_text: str,
+        candidates: list[RetrievalResultDTO],
+        *,
+        top_k: int,
+    ) -> tuple[list[RetrievalResultDTO], dict[str, Any]]:
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        passages = [c.content or c.snippet or "" for c in candidates]
+        starts = range(0, len(candidates), self._batch_size)
+        futures: list[asyncio.Future[list[float]]] = []
+        done: set[asyncio.Future[list[float]]] = set()
+        over_budget, failed = len(starts), 0
+        if candidates:
+            prepared = loop.run_in_executor(
+                self._executor, self.reranker.prepare, query_text, passages
+            )
+            ready, _ = await asyncio.wait([prepared], timeout=self._budget_s)
+            if not ready:
+                prepared.cancel()
+            elif prepared.exception() is not None:
+                over_budget, failed = 0, 1
+            else:
+                scorer = prepared.result()
+                futures = [
+                    loop.run_in_executor(
+                        self._executor, scorer, passages[i : i + self._batch_size]
+                    )
+                    for i in starts
+                ]
+                left = self._budget_s - (time.perf_counter() - started)
+                done, pending = await asyncio.wait(futures, timeout=max(left, 0))
+                # drops queued batches; one already running finishes unobserved
+                for f in pending:
+                    f.cancel()
+                over_budget = len(pending)
+                failed = sum(1 for f in done if f.exception() is not None)
+
+        # only a prefix of the retrieval order is reordered, so a batch that
+        # missed the budget never has later (worse) candidates put above it
+        scored: list[tuple[float, int, RetrievalResultDTO]] = []
+        for start, f in zip(starts, futures, strict=False):
+            if f not in done or f.exception() is not None:
+                break
+            batch = candidates[start : start + self._batch_size]
+            for i, (c, s) in enumerate(zip(batch, f.result(), strict=True)):
+                scored.append((s, start + i, c))
+        unscored = candidates[len(scored) :]
+        scored.sort(key=lambda t: (-t[0], t[1]))
+
+        results = []
+        for rank, (s, retrieval_rank, c) in enumerate(scored, start=1):
+            meta = {
+                **c.metadata_json,
+                "rerank_score": s,
+                "rerank_rank": rank,
+                "retrieval_rank": retrieval_rank + 1,
+            }
+            results.append(c.model_copy(update={"metadata_json": meta}))
+        results.extend(unscored)
+
+        timing = {
+            "reranker": self.reranker.name,
+            "candidates": len(candidates),
+            "scored": len(scored),
+            "batches": len(starts),
+            "batches_over_budget": over_budget,
+            "batches_failed": failed,
+            "budget_s": self._budget_s,
+            "seconds": round(time.perf_counter() - started, 4),
+        }
+        return results[:top_k], timing
+
+
+def _tokens(text: str) -> list[str]:
+    return _WORD.findall(text.casefold())
@@ -0,0 +1,380 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Sequence
+
+from app.features.rag.domain.schemas import RetrievalResultDTO
+from app.features.rag.repo import chunks, embeddings
+from app.features.rag.repo.embeddings import DistanceMetric, VectorPrecision
+from app.features.rag.services.embedding.providers import EmbeddingProvider
+from fastapi import HTTPException
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from .cache import RetrievalCache
+from .params import RetrievalMode, SearchFilters, SearchParams
+from .rerank import RerankStage
+
+SNIPPET_CHARS = 500
+
+class RetrievalService:
+    def __init__(
+        self,
+        *,
+        provider: EmbeddingProvider,
+        default_ef_search: int = 40,
+        default_probes: int = 10,
+        session_factory: async_sessionmaker[AsyncSession] | None = None,
+        hybrid_candidates: int = 50,
+        cache: RetrievalCache | None = None,
+        iterative_scan: str = "off",
+        precision: VectorPrecision = "full",
+        rerank_oversample: int = 4,
+        reranker: RerankStage | None = None,
+        rerank_candidates: int = 50,
+    ) -> None:
+        self._provider = provider
+        self._embedding_model_version = provider.model_version
+        self._default_ef_search = default_ef_search
+        self._default_probes = default_probes
+        self._iterative_scan = iterative_scan
+        self._precision = precision
+        self._rerank_oversample = rerank_oversample
+        # hybrid mode runs its two queries concurrently on sessions from here;
+        # without one they run back to back on the request session
+        self._session_factory = session_factory
+        self._hybrid_candidates = hybrid_candidates
+        self._cache = cache
+        self._reranker = reranker
+        self._rerank_candidates = rerank_candidates
+
+    async def embed_query(self, query_text: str) -> list[float]:
+        if self._cache is not None:
+            hit = self._cache.get_query_vector(
+                query_text, self._embedding_model_version
+            )
+            if hit is not None:
+                return hit
+        # a single short text: no need for the batching pipeline
+        vector = (await self._provider.embed([query_text]))[0]
+        if self._cache is not None:
+            self._cache.put_query_vector(
+                query_text, self._embedding_model_version, vector
+            )
+        return vector
+
+    async def retrieve(
+        self,
+        *,
+        session: AsyncSession,
+        query_text: str,
+        embedding_model_version: str,
+        top_k: int,
+        metric: DistanceMetric = "cosine",
+        ef_search: int | None = None,
+        probes: int | None = None,
+        mode: RetrievalMode = "vector",
+        vector_weight: float = 1.0,
+        keyword_weight: float = 1.0,
+        rrf_k: int = 60,
+        doc_ids: Sequence[str] | None = None,
+        source_types: Sequence[str] | None = None,
+        ingested_after: datetime | None = None,
+        ingested_before: datetime | None = None,
+        rerank: bool | None = None,
+        rerank_candidates: int | None = None,
+        trace: dict[str, Any] | None = None,
+    ) -> list[RetrievalResultDTO]:
+        """Best ``top_k`` chunks for the query.
+
+        With a reranker configured (and ``rerank`` not False), the search
+        over-fetches ``rerank_candidates`` rows and the rerank stage picks
+        the top_k. ``trace``, if given, receives timings for the query log.
+        """
+        if embedding_model_version != self._embedding_model_version:
+            raise HTTPException(
+                status_code=422,
+                detail=(
+                    "No query embedder for "
+                    f"embedding_model_version={embedding_model_version}"
+                ),
+            )
+
+        query_vector = await self.embed_query(query_text) if mode != "keyword" else None
+        params = SearchParams(
+            top_k=top_k,
+            metric=metric,
+            ef_search=ef_search,
+            probes=probes,
+            precision=self._precision,
+            mode=mode,
+            vector_weight=vector_weight,
+            keyword_weight=keyword_weight,
+            rrf_k=rrf_k,
+            rerank_candidates=(
+                max(top_k, rerank_candidates or self._rerank_candidates)
+                if self._reranker is not None and rerank is not False
+                else 0
+            ),
+            filters=SearchFilters(
+                doc_ids=tuple(sorted(set(doc_ids))) if doc_ids else None,
+                source_types=tuple(sorted(set(source_types))) if source_types else None,
+                ingested_after=ingested_after,
+                ingested_before=ingested_before,
+            ),
+        )
+        if self._cache is None:
+            return await self._search(
+                session,
+                query_text=query_text,
+                query_vector=query_vector,
+                params=params,
+                trace=trace,
+            )
+
+        key = self._cache.result_key(
+            corpus_version=await self._cache.corpus_version(session),
+            query_vector=query_vector,
+            query_text=query_text,
+            embedding_model_version=embedding_model_version,
+            params=params,
+        )
+        results = self._cache.get_results(key)
+        if trace is not None:
+            trace["cache_hit"] = results is not None
+        if results is None:
+            results = await self._search(
+                session,
+                query_text=query_text,
+                query_vector=query_vector,
+                params=params,
+                trace=trace,
+            )
+            self._cache.put_results(key, results)
+        return results
+
+    async def _search(
+        self,
+        session: AsyncSession,
+        *,
+        query_text: str,
+        query_vector: list[float] | None,
+        params: SearchParams,
+        trace: dict[str, Any] | None,
+    ) -> list[RetrievalResultDTO]:
+        if not params.rerank_candidates or self._reranker is None:
+            return await self._candidates(
+                session,
+                query_text=query_text,
+                query_vector=query_vector,
+                params=params,
+                top_k=params.top_k,
+            )
+        candidates = await self._candidates(
+            session,
+            query_text=query_text,
+            query_vector=query_vector,
+            params=params,
+            top_k=params.rerank_candidates,
+        )
+        results, timing = await self._reranker.rerank(
+            query_text, candidates, top_k=params.top_k
+        )
+        if trace is not None:
+            trace["rerank"] = timing
+        return results
+
+    async def _candidates(
+        self,
+        session: AsyncSession,
+        *,
+        query_text: str,
+        query_vector: list[float] | None,
+        params: SearchParams,
+        top_k: int,
+    ) -> list[RetrievalResultDTO]:
+        filters = params.filters
+        if params.mode == "keyword":
+            rows = await self._keyword_search(
+                session, query_text=query_text, top_k=top_k, filters=filters
+            )
+            return [_result(r, score=float(r.rank)) for r in rows]
+        if query_vector is None:
+            raise ValueError(f"{params.mode} retrieval needs a query vector")
+
+        if params.mode == "vector":
+            rows = await self._vector_search(
+                session, query_vector=query_vector, params=params, top_k=top_k
+            )
+            return [_result(r, score=_score(r.distance, params.metric)) for r in rows]
+
+        # hybrid: both lists go deeper than top_k so fusion has overlap to work with
+        depth = max(top_k, self._hybrid_candidates)
+        vector_search = self._with_session(
+            session,
+            lambda s: self._vector_search(
+                s, query_vector=query_vector, params=params, top_k=depth
+            ),
+        )
+        keyword_search = self._with_session(
+            session,
+            lambda s: self._keyword_search(
+                s, query_text=query_text, top_k=depth, filters=filters
+            ),
+        )
+        if self._session_factory is not None:
+            vector_rows, keyword_rows = await asyncio.gather(
+                vector_search, keyword_search
+            )
+        else:
+            vector_rows, keyword_rows = await vector_search, await keyword_search
+
+        fused = reciprocal_rank_fusion(
+            [
+                (vector_rows, params.vector_weight),
+                (keyword_rows, params.keyword_weight),
+            ],
+            k=params.rrf_k,
+        )
+        return [
+            _result(
+                hit.row,
+                score=hit.score,
+                extra={"vector_rank": hit.ranks[0], "keyword_rank": hit.ranks[1]},
+            )
+            for hit in fused[:top_k]
+        ]
+
+    async def _with_session(
+        self,
+        session: AsyncSession,
+        search: Callable[[AsyncSession], Awaitable[Sequence[Row]]],
+    ) -> Sequence[Row]:
+        if self._session_factory is None:
+            return await search(session)
+        async with self._session_factory() as own:
+            return await search(own)
+
+    async def _vector_search(
+        self,
+        session: AsyncSession,
+        *,
+        query_vector: list[float],
+        params: SearchParams,
+        top_k: int,
+    ) -> Sequence[Row]:
+        precision = params.precision
+        # quantized scans over-fetch, then re-rank exactly down to top_k
+        candidates = top_k if precision == "full" else top_k * self._rerank_oversample
+        # HNSW never returns more than ef_search rows, so keep it >= the rows asked for
+        await embeddings.set_search_params(
+            session,
+            ef_search=max(params.ef_search or self._default_ef_search, candidates),
+            probes=params.probes or self._default_probes,
+            iterative_scan=self._iterative_scan,
+        )
+        filters = params.filters
+        rows = await embeddings.search(
+            session,
+            query_vector=query_vector,
+            embedding_model_version=self._embedding_model_version,
+            dim=self._provider.dim,
+            top_k=top_k,
+            metric=params.metric,
+            precision=precision,
+            candidates=candidates,
+            doc_ids=filters.doc_ids,
+            source_types=filters.source_types,
+            ingested_after=filters.ingested_after,
+            ingested_before=filters.ingested_before,
+        )
+        # release the read transaction that carried the SET LOCAL knobs
+        await session.rollback()
+        return rows
+
+    async def _keyword_search(
+        self,
+        session: AsyncSession,
+        *,
+        query_text: str,
+        top_k: int,
+        filters: SearchFilters,
+    ) -> Sequence[Row]:
+        rows = await chunks.keyword_search(
+            session,
+            query_text=query_text,
+            top_k=top_k,
+            doc_ids=filters.doc_ids,
+            source_types=filters.source_types,
+            ingested_after=filters.ingested_after,
+            ingested_before=filters.ingested_before,
+        )
+        await session.rollback()
+        return rows
+
+
+@dataclass
+class FusedHit:
+    row: Row
+    score: float = 0.0
+    ranks: list[int | None] = field(default_factory=list)  # 1-based rank per input list
+
+
+def reciprocal_rank_fusion(
+    ranked_lists: list[tuple[Sequence[Row], float]],
+    *,
+    k: int = 60,
+) -> list[FusedHit]:
+    """Merge best-first lists of rows (keyed by chunk_id) by weighted RRF.
+
+    Each list adds ``weight / (k + rank)`` for every chunk it contains. Only
+    ranks are used, never the lists' own scores, so a ts_rank and a cosine
+    distance never have to be put on one scale.
+    """
+    hits: dict[str, FusedHit] = {}
+    for i, (rows, weight) in enumerate(ranked_lists):
+        for rank, row in enumerate(rows, start=1):
+            hit = hits.get(row.chunk_id)
+            if hit is None:
+                hit = hits[row.chunk_id] = FusedHit(
+                    row=row, ranks=[None] * len(ranked_lists)
+                )
+            hit.ranks[i] = rank
+            hit.score += weight / (k + rank)
+    # stable sort: ties keep first-seen order, i.e. the first list wins
+    return sorted(hits.values(), key=lambda h: -h.score)
+
+
+def _result(r: Row, *, score: float, extra: dict | None = None) -> RetrievalResultDTO:
+    return RetrievalResultDTO(
+        chunk_id=r.chunk_id,
+        doc_id=r.doc_id,
+        score=score,
+        snippet=r.content[:SNIPPET_CHARS],
+        content=r.content,
+        source_uri=r.source_uri,
+        deep_link=_deep_link(r.source_uri, r.page_start),
+        metadata_json={
+            **(r.metadata_json or {}),
+            "start_ref": r.start_ref,
+            "page_start": r.page_start,
+            "page_end": r.page_end,
+            **(extra or {}),
+        },
+    )
+
+
+def _score(distance: float, metric: DistanceMetric) -> float:
+    if metric == "cosine":
+        return 1.0 - float(distance)
+    return -float(distance)
+
+
+def _deep_link(source_uri: str | None, page_start: int | None) -> str | None:
+    if not source_uri:
+        return None
+    if page_start is None:
+        return source_uri
+    return f"{source_uri}#page={page_start}"
@@ -1,8 +1,44 @@
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
 from app.api.router import api_router
+from app.core.config import settings
+from app.features.approvals.api.deps import get_event_hub
+from app.features.rag.api.deps import (
+    check_vector_search,
+    get_pdf_parser,
+    get_query_log,
+    get_reranker,
+)
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI(title="Control Hub API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    await check_vector_search()
+    if settings.docling_eager_load:
+        await get_pdf_parser().warmup()
+    yield
+    # only what was built: calling a factory that never ran would build it now
+    if _built(get_event_hub):
+        await get_event_hub().close()
+    query_log = get_query_log() if _built(get_query_log) else None
+    if query_log is not None:
+        await query_log.close()
+    reranker = get_reranker() if _built(get_reranker) else None
+    if reranker is not None:
+        reranker.shutdown()
+    if _built(get_pdf_parser):
+        get_pdf_parser().shutdown()
+
+
+def _built(factory: Any) -> bool:
+    # lru_cache'd process-wide factories hold their instance once called
+    return bool(factory.cache_info().currsize)
+
+
+app = FastAPI(title="Control Hub API", lifespan=lifespan)
 app.include_router(api_router)
 
 app.add_middleware(
@@ -11,4 +47,6 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # GET /approvals returns the next page's cursor in a header
+    expose_headers=["X-Next-Cursor"],
 )
@@ -0,0 +1,95 @@
+"""Rows/sec for writing document_chunks + chunk_embeddings, per insert method.
+
+    python scripts/bench_bulk_insert.py --chunks 10000 100000
+
+Runs against TEST_DATABASE_URL (falls back to DATABASE_URL) inside a
+transaction that is rolled back, so it leaves no data behind. The schema must
+already exist (alembic upgrade head).
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from app.core.config import settings
+from app.features.rag.repo import chunks, documents, embeddings
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+METHODS = ("orm", "executemany", "copy")
+
+
+def _rows(doc_id: str, n: int, dim: int) -> tuple[list[dict], list[dict]]:
+    rng = random.Random(0)
+    chunk_rows = [
+        {
+            "chunk_id": f"{doc_id}:{i}",
+            "ordinal": i,
+            "content": f"chunk {i} " + "lorem ipsum dolor sit amet " * 40,
+            "metadata_json": {},
+        }
+        for i in range(n)
+    ]
+    emb_rows = [
+        {
+            "chunk_id": f"{doc_id}:{i}",
+            "embedding_model_version": "bench",
+            "embedding": [rng.random() for _ in range(dim)],
+        }
+        for i in range(n)
+    ]
+    return chunk_rows, emb_rows
+
+
+async def _run(sessionmaker, method: str, n: int) -> float:
+    doc_id = f"bench-{method}-{n}"
+    chunk_rows, emb_rows = _rows(doc_id, n, 1536)
+
+    async with sessionmaker() as session:
+        await documents.create(
+            session,
+            doc_id=doc_id,
+            source_type="pdf",
+            source_uri=f"bench://{doc_id}",
+            title=None,
+            checksum=None,
+            metadata_json={},
+        )
+        started = time.perf_counter()
+        if method == "orm":
+            await chunks.bulk_create(session, doc_id=doc_id, rows=chunk_rows)
+            await embeddings.bulk_create(
+                session, doc_id=doc_id, source_type="pdf", rows=emb_rows
+            )
+        else:
+            await chunks.bulk_insert(
+                session, doc_id=doc_id, rows=chunk_rows, method=method
+            )
+            await embeddings.bulk_insert(
+                session, doc_id=doc_id, source_type="pdf", rows=emb_rows, method=method
+            )
+        elapsed = time.perf_counter() - started
+        await session.rollback()
+    return elapsed
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--methods", nargs="+", choices=METHODS, default=list(METHODS))
+    args = parser.parse_args()
+
+    engine = create_async_engine(settings.test_database_url or settings.database_url)
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+
+    print(f"{'chunks':>8}  {'method':<12} {'seconds':>9} {'rows/sec':>10}")
+    for n in args.chunks:
+        for method in args.methods:
+            elapsed = await _run(sessionmaker, method, n)
+            # each chunk writes two rows: the chunk and its embedding
+            print(f"{n:>8}  {method:<12} {elapsed:>9.2f} {2 * n / elapsed:>10.0f}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,219 @@
+"""Recall and latency of vector search per first-pass precision (full / half / binary).
+
+    python scripts/bench_vector_precision.py --rows 20000 --queries 50 --top-k 10
+
+Loads synthetic clustered embeddings for one configured model, takes exact
+top-k neighbours (index scans disabled) as ground truth, then times
+embeddings.search with each precision and reports recall@k against it, along
+with the on-disk size of each precision's HNSW indexes. A model only has the
+indexes of its configured precision; those of the other precisions benched are
+built after loading, inside the same transaction.
+
+Runs against TEST_DATABASE_URL (falls back to DATABASE_URL) inside a
+transaction that is rolled back, so it leaves no data behind. The schema must
+already exist (alembic upgrade head), and the database should hold no other
+rows for the model, or they will be searched too.
+"""
+import argparse
+import asyncio
+import math
+import random
+import statistics
+import time
+
+from app.core.config import settings
+from app.features.rag.domain.models import (
+    INDEX_FLAVOURS,
+    PRECISION_INDEX_FLAVOURS,
+    model_index_name,
+)
+from app.features.rag.repo import chunks, documents, embeddings
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+PRECISIONS = ("full", "half", "binary")
+DOC_ID = "bench-precision"
+
+
+def _unit(v: list[float]) -> list[float]:
+    norm = math.sqrt(sum(x * x for x in v)) or 1.0
+    return [x / norm for x in v]
+
+
+def _vectors(n: int, dim: int, *, clusters: int, seed: int) -> list[list[float]]:
+    # clustered rather than uniform, so neighbours are meaningfully closer than the rest
+    rng = random.Random(0)
+    centers = [[rng.gauss(0.0, 1.0) for _ in range(dim)] for _ in range(clusters)]
+    rng = random.Random(seed)
+    return [
+        _unit([c + rng.gauss(0.0, 0.5) for c in rng.choice(centers)]) for _ in range(n)
+    ]
+
+
+async def _load(
+    session: AsyncSession, model: str, dim: int, rows: int, clusters: int
+) -> None:
+    await documents.create(
+        session,
+        doc_id=DOC_ID,
+        source_type="pdf",
+        source_uri=f"bench://{DOC_ID}",
+        title=None,
+        checksum=None,
+        metadata_json={},
+    )
+    await chunks.bulk_insert(
+        session,
+        doc_id=DOC_ID,
+        rows=[
+            {
+                "chunk_id": f"{DOC_ID}:{i}",
+                "ordinal": i,
+                "content": f"chunk {i}",
+                "metadata_json": {},
+            }
+            for i in range(rows)
+        ],
+    )
+    await embeddings.bulk_insert(
+        session,
+        doc_id=DOC_ID,
+        source_type="pdf",
+        rows=[
+            {
+                "chunk_id": f"{DOC_ID}:{i}",
+                "embedding_model_version": model,
+                "embedding": v,
+            }
+            for i, v in enumerate(_vectors(rows, dim, clusters=clusters, seed=1))
+        ],
+    )
+
+
+async def _build_missing_indexes(
+    session: AsyncSession, model: str, dim: int, precisions: list[str]
+) -> None:
+    literal = model.replace("'", "''")
+    for precision in precisions:
+        for flavour in PRECISION_INDEX_FLAVOURS[precision]:
+            name = model_index_name(model, flavour)
+            exists = await session.scalar(
+                text("SELECT to_regclass(:n) IS NOT NULL"), {"n": name}
+            )
+            if exists:
+                continue
+            expr, opclass = INDEX_FLAVOURS[flavour]
+            started = time.perf_counter()
+            await session.execute(
+                text(
+                    f"CREATE INDEX {name} ON chunk_embeddings USING hnsw "
+                    f"(({expr.format(dim=dim)}) {opclass}) "
+                    "WITH (m = 16, ef_construction = 64) "
+                    f"WHERE embedding_model_version = '{literal}'"
+                )
+            )
+            print(f"built {name} in {time.perf_counter() - started:.1f}s")
+
+
+async def _search(
+    session: AsyncSession, q: list[float], args, *, precision: str
+) -> list[str]:
+    rows = await embeddings.search(
+        session,
+        query_vector=q,
+        embedding_model_version=args.model,
+        dim=args.dim,
+        top_k=args.top_k,
+        precision=precision,
+        candidates=args.top_k * args.oversample,
+    )
+    return [r.chunk_id for r in rows]
+
+
+async def _run(sessionmaker, args) -> None:
+    queries = _vectors(args.queries, args.dim, clusters=args.clusters, seed=2)
+
+    async with sessionmaker() as session:
+        started = time.perf_counter()
+        await _load(session, args.model, args.dim, args.rows, args.clusters)
+        elapsed = time.perf_counter() - started
+        print(f"loaded {args.rows} rows (index maintenance included) in {elapsed:.1f}s")
+
+        await _build_missing_indexes(session, args.model, args.dim, args.precisions)
+        print()
+
+        await session.execute(text("SET LOCAL enable_indexscan = off"))
+        truth = [
+            set(await _search(session, q, args, precision="full")) for q in queries
+        ]
+        await session.execute(text("SET LOCAL enable_indexscan = on"))
+
+        recall = f"recall@{args.top_k}"
+        print(f"{'precision':<10} {recall:>10} {'p50 ms':>8} {'p95 ms':>8}")
+        for precision in args.precisions:
+            candidates = (
+                args.top_k if precision == "full" else args.top_k * args.oversample
+            )
+            await embeddings.set_search_params(
+                session,
+                ef_search=max(args.ef_search, candidates),
+                probes=settings.rag_ivfflat_probes,
+                iterative_scan=settings.rag_hnsw_iterative_scan,
+            )
+            latencies, recalls = [], []
+            for q, expected in zip(queries, truth, strict=True):
+                t0 = time.perf_counter()
+                got = await _search(session, q, args, precision=precision)
+                latencies.append((time.perf_counter() - t0) * 1000)
+                recalls.append(len(expected & set(got)) / len(expected))
+            p95 = (
+                statistics.quantiles(latencies, n=20)[-1]
+                if len(latencies) > 1
+                else latencies[0]
+            )
+            print(
+                f"{precision:<10} {statistics.fmean(recalls):>10.3f} "
+                f"{statistics.median(latencies):>8.2f} {p95:>8.2f}"
+            )
+
+        print(f"\n{'index':<60} {'size':>10}")
+        flavours = [f for p in args.precisions for f in PRECISION_INDEX_FLAVOURS[p]]
+        for flavour in flavours:
+            name = model_index_name(args.model, flavour)
+            size = await session.scalar(
+                text("SELECT pg_size_pretty(pg_relation_size(to_regclass(:n)))"),
+                {"n": name},
+            )
+            print(f"{name:<60} {size or 'missing':>10}")
+
+        await session.rollback()
+
+
+async def main() -> None:
+    default_model, default_dim = next(iter(settings.rag_embedding_dims.items()))
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--model", default=default_model, help="embedding_model_version with indexes"
+    )
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--clusters", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--ef-search", type=int, default=settings.rag_hnsw_ef_search)
+    parser.add_argument(
+        "--oversample", type=int, default=settings.rag_rerank_oversample
+    )
+    parser.add_argument(
+        "--precisions", nargs="+", choices=PRECISIONS, default=list(PRECISIONS)
+    )
+    args = parser.parse_args()
+    args.dim = settings.rag_embedding_dims.get(args.model, default_dim)
+
+    engine = create_async_engine(settings.test_database_url or settings.database_url)
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+    await _run(sessionmaker, args)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -4,9 +4,14 @@ from httpx import ASGITransport, AsyncClient
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
+from app.core.cache import LRUCache
 from app.core.config import settings
 from app.db.base import Base
-from app.db.session_async import get_session
+from app.db.session_async import get_session, get_session_factory
+from app.features.approvals.api.deps import get_event_hub, get_stats_cache
+from app.features.approvals.services.event_hub import ApprovalEventHub
+from app.features.rag.api.deps import get_query_log
+from app.features.rag.services.query_log.sink import QueryLogSink
 from app.main import app
 
 
@@ -56,8 +61,30 @@ async def _db_schema_per_test(engine):
 
 
 @pytest_asyncio.fixture
-async def async_client(override_get_session):
+async def query_log(sessionmaker):
+    # per test: the app's sink is process-wide and bound to the app database
+    sink = QueryLogSink(sessionmaker, flush_interval_s=0.05)
+    yield sink
+    await sink.close()
+
+
+@pytest_asyncio.fixture
+async def event_hub(engine):
+    # per test, like query_log: LISTEN on the test database
+    hub = ApprovalEventHub(engine)
+    yield hub
+    await hub.close()
+
+
+@pytest_asyncio.fixture
+async def async_client(override_get_session, sessionmaker, query_log, event_hub):
     app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_session_factory] = lambda: sessionmaker
+    app.dependency_overrides[get_query_log] = lambda: query_log
+    app.dependency_overrides[get_event_hub] = lambda: event_hub
+    # a fresh stats cache per test, so no counts leak between tests
+    stats_cache = LRUCache(max_size=3, ttl_s=60.0)
+    app.dependency_overrides[get_stats_cache] = lambda: stats_cache
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as client:
         yield client
@@ -0,0 +1,165 @@
+import asyncio
+
+import pytest
+from app.features.approvals.services.approval_item_service import ApprovalItemService
+from app.features.approvals.services.event_hub import RESYNC, ApprovalEventHub
+from httpx import AsyncClient
+from sqlalchemy.exc import OperationalError
+
+
+async def _next(sub, timeout: float = 5.0):
+    return await asyncio.wait_for(anext(sub.events()), timeout)
+
+
+async def _create(async_client: AsyncClient, *, type: str, assigned_to=None) -> int:
+    r = await async_client.post(
+        "/approvals",
+        json={
+            "title": f"{type} change",
+            "type": type,
+            "requested_by": "agent:foo",
+            "assigned_to": assigned_to,
+        },
+    )
+    assert r.status_code == 201
+    return r.json()["id"]
+
+
+@pytest.mark.anyio
+async def test_approval_events_fan_out_with_filters(
+    async_client: AsyncClient, event_hub: ApprovalEventHub
+):
+    everything = await event_hub.subscribe()
+    configs = await event_hub.subscribe(types=["AGENT_CONFIG"])
+    mine = await event_hub.subscribe(assigned_to="user:spencer")
+
+    config_id = await _create(async_client, type="AGENT_CONFIG")
+    deploy_id = await _create(async_client, type="DEPLOY", assigned_to="user:spencer")
+    r = await async_client.post(
+        f"/approvals/{deploy_id}/approve", json={"decision_by": "user:spencer"}
+    )
+    assert r.status_code == 200
+    r = await async_client.post(
+        "/approvals/bulk/reject",
+        json={"ids": [config_id], "decision_by": "user:ops", "decision_reason": "no"},
+    )
+    assert r.status_code == 200
+
+    seen = [await _next(everything) for _ in range(4)]
+    assert [(e["event"], e["id"]) for e in seen] == [
+        ("created", config_id),
+        ("created", deploy_id),
+        ("approved", deploy_id),
+        ("rejected", config_id),
+    ]
+    assert seen[2]["status"] == "APPROVED" and seen[2]["assigned_to"] == "user:spencer"
+
+    got = [await _next(configs), await _next(configs)]
+    assert [(e["event"], e["id"]) for e in got] == [
+        ("created", config_id),
+        ("rejected", config_id),
+    ]
+    assert [(e["event"], e["id"]) for e in [await _next(mine), await _next(mine)]] == [
+        ("created", deploy_id),
+        ("approved", deploy_id),
+    ]
+    # nothing else was queued for the filtered subscribers
+    for sub in (configs, mine):
+        sub.close()
+        assert [e async for e in sub.events()] == []
+
+
+@pytest.mark.anyio
+async def test_approval_events_not_sent_for_rolled_back_changes(
+    async_client: AsyncClient, event_hub
+):
+    sub = await event_hub.subscribe()
+    item_id = await _create(async_client, type="DEPLOY")
+    assert (await _next(sub))["event"] == "created"
+
+    r = await async_client.post(
+        f"/approvals/{item_id}/approve", json={"decision_by": "a"}
+    )
+    assert r.status_code == 200
+    # 409: the transaction that would have notified is rolled back
+    r = await async_client.post(
+        f"/approvals/{item_id}/reject",
+        json={"decision_by": "b", "decision_reason": "x"},
+    )
+    assert r.status_code == 409
+    assert (await _next(sub))["event"] == "approved"
+    with pytest.raises(TimeoutError):
+        await _next(sub, timeout=0.3)
+
+
+@pytest.mark.anyio
+async def test_slow_subscriber_gets_resync(engine):
+    hub = ApprovalEventHub(engine, queue_size=2)
+    try:
+        sub = await hub.subscribe()
+        for i in range(3):
+            hub.publish({"event": "created", "id": i, "type": "T", "assigned_to": None})
+        # the backlog is dropped for a single "re-read the list" marker
+        assert await _next(sub) == RESYNC
+    finally:
+        await hub.close()
+
+
+@pytest.mark.anyio
+async def test_wait_returns_when_item_is_decided(async_client: AsyncClient):
+    item_id = await _create(async_client, type="DEPLOY")
+
+    waiting = asyncio.create_task(
+        async_client.get(f"/approvals/{item_id}/wait", params={"timeout": 10})
+    )
+    await asyncio.sleep(0.2)
+    assert not waiting.done()
+
+    r = await async_client.post(
+        f"/approvals/{item_id}/approve", json={"decision_by": "user:spencer"}
+    )
+    assert r.status_code == 200
+    r = await asyncio.wait_for(waiting, 5)
+    assert r.status_code == 200
+    assert r.json()["status"] == "APPROVED"
+
+    # already decided: no waiting at all
+    r = await async_client.get(f"/approvals/{item_id}/wait", params={"timeout": 10})
+    assert r.json()["status"] == "APPROVED"
+
+
+@pytest.mark.anyio
+async def test_wait_times_out_with_pending_item(
+    async_client: AsyncClient, event_hub: ApprovalEventHub
+):
+    item_id = await _create(async_client, type="DEPLOY")
+    r = await async_client.get(f"/approvals/{item_id}/wait", params={"timeout": 0.2})
+    assert r.status_code == 200
+    assert r.json()["status"] == "PENDING"
+    assert event_hub._waiters == {}
+
+    r = await async_client.get("/approvals/999999/wait", params={"timeout": 0.2})
+    assert r.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_wait_maps_only_listen_failures_to_503(
+    async_client: AsyncClient, event_hub: ApprovalEventHub, monkeypatch
+):
+    item_id = await _create(async_client, type="DEPLOY")
+
+    async def refuse_listen():
+        raise OSError("connection refused")
+
+    monkeypatch.setattr(event_hub, "_connect", refuse_listen)
+    r = await async_client.get(f"/approvals/{item_id}/wait", params={"timeout": 0.2})
+    assert r.status_code == 503
+    monkeypatch.undo()
+
+    # a database error reading the item is not the event hub's to report
+    async def broken_get(self, item_id):
+        raise OperationalError("SELECT", {}, OSError("server closed the connection"))
+
+    monkeypatch.setattr(ApprovalItemService, "get", broken_get)
+    with pytest.raises(OperationalError):
+        await async_client.get(f"/approvals/{item_id}/wait", params={"timeout": 0.2})
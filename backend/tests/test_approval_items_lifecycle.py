@@ -1,5 +1,14 @@
+from datetime import datetime, timedelta, timezone
+
 import pytest
+from app.features.approvals.domain.models import (
+    ApprovalItem,
+    ApprovalItemArchive,
+    ApprovalItemStat,
+)
+from app.features.approvals.services.archiver import ApprovalArchiver
 from httpx import AsyncClient
+from sqlalchemy import func, select, update
 
 
 @pytest.mark.anyio
@@ -39,3 +48,325 @@ async def test_approval_items_lifecycle(async_client: AsyncClient):
     assert r.status_code == 200
     fetched = r.json()
     assert fetched["status"] == "APPROVED"
+
+
+@pytest.mark.anyio
+async def test_approval_items_keyset_pagination(async_client: AsyncClient, db_session):
+    t0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    # two pairs share a created_at: id has to break the tie
+    stamps = [
+        t0,
+        t0,
+        t0 + timedelta(seconds=1),
+        t0 + timedelta(seconds=1),
+        t0 + timedelta(seconds=2),
+    ]
+    db_session.add_all(
+        ApprovalItem(
+            title=f"item {i}",
+            type="T",
+            payload_json={},
+            requested_by="agent:foo",
+            created_at=ts,
+        )
+        for i, ts in enumerate(stamps)
+    )
+    await db_session.commit()
+
+    seen: list[int] = []
+    cursor = None
+    for page in range(3):
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        r = await async_client.get("/approvals", params=params)
+        assert r.status_code == 200
+        seen += [x["id"] for x in r.json()]
+        cursor = r.headers.get("X-Next-Cursor")
+        if page == 0:
+            # a newer item arriving mid-walk must not shift later pages
+            db_session.add(
+                ApprovalItem(
+                    title="late", type="T", payload_json={}, requested_by="agent:foo"
+                )
+            )
+            await db_session.commit()
+    assert cursor is None  # third page was the last
+    assert len(seen) == 5
+
+    expected = sorted(zip(stamps, range(5), strict=True), reverse=True)
+    r = await async_client.get("/approvals", params={"limit": 10})
+    titles = {x["id"]: x["title"] for x in r.json()}
+    assert [titles[i] for i in seen] == [f"item {i}" for _, i in expected]
+
+    r = await async_client.get("/approvals", params={"cursor": "not-a-cursor"})
+    assert r.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_approval_items_bulk_decisions(async_client: AsyncClient, db_session):
+    items = [
+        ApprovalItem(
+            title=f"item {i}",
+            type="BULK" if i < 4 else "OTHER",
+            payload_json={},
+            requested_by="agent:foo",
+        )
+        for i in range(6)
+    ]
+    db_session.add_all(items)
+    await db_session.commit()
+    ids = [i.id for i in items]
+
+    r = await async_client.post(
+        f"/approvals/{ids[0]}/reject",
+        json={"decision_by": "u", "decision_reason": "no"},
+    )
+    assert r.status_code == 200
+
+    r = await async_client.post(
+        "/approvals/bulk/approve",
+        json={
+            "ids": [ids[0], ids[1], 999_999, ids[2], ids[1]],
+            "decision_by": "user:ops",
+        },
+    )
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert [x["id"] for x in body["updated"]] == [ids[1], ids[2]]
+    assert all(
+        x["status"] == "APPROVED" and x["decision_by"] == "user:ops"
+        for x in body["updated"]
+    )
+    assert body["already_decided"] == [{"id": ids[0], "status": "REJECTED"}]
+    assert body["not_found"] == [999_999]
+
+    r = await async_client.post(
+        "/approvals/bulk/reject",
+        json={
+            "filter": {"type": "BULK"},
+            "decision_by": "user:ops",
+            "decision_reason": "cleanup",
+        },
+    )
+    assert r.status_code == 200, r.text
+    # the only BULK item still PENDING
+    assert [x["id"] for x in r.json()["updated"]] == [ids[3]]
+
+    r = await async_client.get(f"/approvals/{ids[4]}")
+    assert r.json()["status"] == "PENDING"
+
+    r = await async_client.post(
+        "/approvals/bulk/reject", json={"ids": [ids[4]], "decision_by": "u"}
+    )
+    assert r.status_code == 422  # reject needs a reason
+    r = await async_client.post(
+        "/approvals/bulk/approve",
+        json={"ids": [ids[4]], "filter": {}, "decision_by": "u"},
+    )
+    assert r.status_code == 422
+
+
+@pytest.mark.anyio
+async def test_approval_items_batch_create_is_idempotent(async_client: AsyncClient):
+    def item(key, requested_by="agent:foo"):
+        return {
+            "title": f"change {key}",
+            "type": "AGENT_CONFIG",
+            "requested_by": requested_by,
+            "idempotency_key": key,
+        }
+
+    r = await async_client.post(
+        "/approvals/batch",
+        json={"items": [item("a"), item("b"), item(None), item("a")]},
+    )
+    assert r.status_code == 200, r.text
+    first = r.json()
+    assert [x["idempotency_key"] for x in first["created"]] == ["a", "b", None]
+    assert first["existing"] == []
+
+    # a retried batch writes nothing new but the unkeyed item, and gets the
+    # originals back
+    r = await async_client.post(
+        "/approvals/batch",
+        json={
+            "items": [
+                item("b"),
+                item(None),
+                item("a"),
+                item("a", requested_by="agent:bar"),
+            ]
+        },
+    )
+    body = r.json()
+    assert [(x["idempotency_key"], x["requested_by"]) for x in body["created"]] == [
+        (None, "agent:foo"),
+        ("a", "agent:bar"),  # keys are per requester
+    ]
+    originals = sorted(x["id"] for x in first["created"][:2])
+    assert sorted(x["id"] for x in body["existing"]) == originals
+
+    # single create: 201 the first time, 200 with the same item on a retry
+    r = await async_client.post("/approvals", json=item("c"))
+    assert r.status_code == 201
+    r2 = await async_client.post("/approvals", json=item("c"))
+    assert r2.status_code == 200
+    assert r2.json()["id"] == r.json()["id"]
+
+    r = await async_client.post("/approvals/batch", json={"items": []})
+    assert r.status_code == 422
+
+
+@pytest.mark.anyio
+async def test_approval_item_stats_follow_writes(async_client: AsyncClient, db_session):
+    def item(type, assigned_to=None):
+        return {
+            "title": "x",
+            "type": type,
+            "requested_by": "agent:foo",
+            "assigned_to": assigned_to,
+        }
+
+    r = await async_client.post(
+        "/approvals/batch",
+        json={
+            "items": [
+                item("DEPLOY", "user:a"),
+                item("DEPLOY", "user:a"),
+                item("DEPLOY"),
+                item("CONFIG", "user:b"),
+            ]
+        },
+    )
+    ids = [x["id"] for x in r.json()["created"]]
+    await async_client.post(
+        f"/approvals/{ids[0]}/approve", json={"decision_by": "user:a"}
+    )
+    await async_client.post(
+        "/approvals/bulk/reject",
+        json={
+            "filter": {"type": "CONFIG"},
+            "decision_by": "u",
+            "decision_reason": "no",
+        },
+    )
+    await db_session.execute(
+        update(ApprovalItem)
+        .where(ApprovalItem.id == ids[2])
+        .values(assigned_to="user:b")
+    )
+    await db_session.commit()
+
+    r = await async_client.get("/approvals/stats")
+    assert r.status_code == 200
+    stats = r.json()
+    assert stats["status"] == "PENDING" and stats["total"] == 2
+    assert stats["by_type"] == [{"type": "DEPLOY", "count": 2}]
+    by_assignee = {x["assigned_to"]: x["count"] for x in stats["by_assigned_to"]}
+    assert by_assignee == {"user:a": 1, "user:b": 1}
+
+    r = await async_client.get("/approvals/stats", params={"status": "REJECTED"})
+    assert r.json()["by_assigned_to"] == [{"assigned_to": "user:b", "count": 1}]
+
+    # served from the cache until it expires
+    await async_client.post("/approvals", json=item("DEPLOY"))
+    r = await async_client.get("/approvals/stats")
+    assert r.json()["total"] == 2
+
+    # the counters agree with a full count
+    rows = await db_session.execute(
+        select(
+            ApprovalItem.status,
+            ApprovalItem.type,
+            ApprovalItem.assigned_to,
+            func.count(),
+        ).group_by(ApprovalItem.status, ApprovalItem.type, ApprovalItem.assigned_to)
+    )
+    stored = await db_session.execute(
+        select(ApprovalItemStat).where(ApprovalItemStat.count != 0)
+    )
+    assert {(s, t, a or "", n) for s, t, a, n in rows} == {
+        (x.status, x.type, x.assigned_to, x.count) for x in stored.scalars()
+    }
+
+
+@pytest.mark.anyio
+async def test_archived_items_stay_readable(
+    async_client: AsyncClient, db_session, sessionmaker
+):
+    now = datetime.now(timezone.utc)
+    old = ApprovalItem(
+        title="old",
+        type="T",
+        payload_json={},
+        requested_by="agent:foo",
+        created_at=now - timedelta(days=90),
+    )
+    recent = ApprovalItem(
+        title="recent",
+        type="T",
+        payload_json={},
+        requested_by="agent:foo",
+        created_at=now - timedelta(days=60),
+    )
+    pending = ApprovalItem(
+        title="pending", type="T", payload_json={}, requested_by="agent:foo"
+    )
+    db_session.add_all([old, recent, pending])
+    await db_session.commit()
+    for item, decided_days_ago in ((old, 45), (recent, 1)):
+        r = await async_client.post(
+            f"/approvals/{item.id}/reject",
+            json={"decision_by": "u", "decision_reason": "no"},
+        )
+        assert r.status_code == 200
+        await db_session.execute(
+            update(ApprovalItem)
+            .where(ApprovalItem.id == item.id)
+            .values(decision_at=now - timedelta(days=decided_days_ago))
+        )
+    await db_session.commit()
+    before = (
+        await async_client.get("/approvals/stats", params={"status": "REJECTED"})
+    ).json()
+
+    archiver = ApprovalArchiver(
+        session_factory=sessionmaker, archive_after=timedelta(days=30), batch_size=10
+    )
+    assert await archiver.run_once() == 1
+    assert await archiver.run_once() == 0
+
+    assert await db_session.scalar(select(func.count()).select_from(ApprovalItem)) == 2
+    archived = (await db_session.execute(select(ApprovalItemArchive))).scalars().all()
+    assert [a.id for a in archived] == [old.id]
+
+    # reads span both tables
+    r = await async_client.get(f"/approvals/{old.id}")
+    assert r.status_code == 200 and r.json()["status"] == "REJECTED"
+    r = await async_client.get("/approvals")
+    assert [x["id"] for x in r.json()] == [pending.id, recent.id, old.id]
+    r = await async_client.get("/approvals", params={"status": "REJECTED", "limit": 1})
+    assert [x["id"] for x in r.json()] == [recent.id]
+    r = await async_client.get(
+        "/approvals",
+        params={"status": "REJECTED", "cursor": r.headers["X-Next-Cursor"]},
+    )
+    assert [x["id"] for x in r.json()] == [old.id]
+    r = await async_client.post(
+        f"/approvals/{old.id}/approve", json={"decision_by": "u"}
+    )
+    assert r.status_code == 409
+    r = await async_client.post(
+        "/approvals/bulk/approve", json={"ids": [old.id, 0], "decision_by": "u"}
+    )
+    body = r.json()
+    assert body["already_decided"] == [{"id": old.id, "status": "REJECTED"}]
+    assert body["not_found"] == [0]
+
+    # moving an item does not change the counters
+    assert before["total"] == 2
+    stored = await db_session.scalar(
+        select(func.sum(ApprovalItemStat.count)).where(
+            ApprovalItemStat.status == "REJECTED"
+        )
+    )
+    assert stored == 2
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from app.features.rag.services.embedding.pipeline import estimate_tokens
+from app.features.rag.services.ingestion.chunking import (
+    blocks_from_markdown,
+    iter_chunks,
+)
+from app.features.rag.services.ingestion.docling_parser import Block
+
+
+def _para(ref: str, page: int, sentences: int) -> Block:
+    text = " ".join(f"Sentence {ref} number {i} ends here." for i in range(sentences))
+    return Block(kind="paragraph", text=text, ref=ref, page=page)
+
+
+def test_chunks_respect_budget_and_carry_refs_and_pages():
+    blocks = [
+        Block(kind="heading", text="Install", ref="#/texts/0", page=1, level=1),
+        _para("#/texts/1", 1, 20),
+        _para("#/texts/2", 2, 20),
+        Block(kind="heading", text="Usage", ref="#/texts/3", page=3, level=1),
+        _para("#/texts/4", 3, 5),
+    ]
+    chunks = list(iter_chunks(blocks, max_tokens=300, overlap_tokens=30))
+
+    assert all(estimate_tokens(c.text) <= 300 for c in chunks)
+    assert chunks[0].start_ref == "#/texts/0"
+    assert chunks[0].headings == ("Install",)
+    assert (chunks[0].page_start, chunks[0].page_end) == (1, 1)
+
+    # the spill-over chunk opens with the previous paragraph's last sentences
+    overlap, _, rest = chunks[1].text.partition("\n\n")
+    assert overlap.startswith("Sentence #/texts/1")
+    assert overlap.endswith("number 19 ends here.")
+    assert estimate_tokens(overlap) <= 30
+    assert rest.startswith("Sentence #/texts/2 number 0")
+    assert chunks[1].page_start == 1 and chunks[1].page_end == 2
+
+    # a heading always starts a fresh chunk, without overlap from the old section
+    assert chunks[-1].text.startswith("Usage")
+    assert chunks[-1].headings == ("Usage",)
+
+
+def test_overlap_and_heading_count_against_the_budget():
+    blocks = [
+        Block(kind="heading", text="Install", ref="#/texts/0", page=1, level=1),
+        _para("#/texts/1", 1, 29),
+        _para("#/texts/2", 1, 29),
+        Block(
+            kind="heading", text="Upgrading from 1.x", ref="#/texts/3", page=2, level=1
+        ),
+        _para("#/texts/4", 2, 30),
+        Block(kind="heading", text="Usage", ref="#/texts/5", page=3, level=1),
+        _para("#/texts/6", 3, 80),
+    ]
+    chunks = list(iter_chunks(blocks, max_tokens=300, overlap_tokens=30))
+
+    assert all(estimate_tokens(c.text) <= 300 for c in chunks)
+    # a nearly full paragraph leaves room for only part of the overlap
+    overlap, _, rest = chunks[1].text.partition("\n\n")
+    assert overlap == "Sentence #/texts/1 number 28 ends here."
+    assert rest == blocks[2].text
+    # a paragraph that fits alone but not beside its heading drops the heading
+    assert chunks[2].text == blocks[4].text
+    assert chunks[2].headings == ("Upgrading from 1.x",)
+    # an oversized paragraph is split, the heading leading its first piece
+    assert chunks[3].text.startswith("Usage\n\nSentence #/texts/6 number 0 ")
+    assert len(chunks) > 4
+    assert all(c.headings == ("Usage",) for c in chunks[3:])
+
+
+def test_oversized_table_is_split_by_rows_with_header_repeated():
+    rows = "\n".join(f"| {i} | value {i} |" for i in range(200))
+    table = Block(
+        kind="table",
+        text=f"| id | value |\n|---|---|\n{rows}",
+        ref="#/tables/0",
+        page=4,
+    )
+
+    chunks = list(iter_chunks([table], max_tokens=200))
+
+    assert len(chunks) > 1
+    for c in chunks:
+        assert c.text.startswith("| id | value |\n|---|---|")
+        assert c.start_ref == "#/tables/0"
+
+
+def test_markdown_fallback_and_laziness():
+    md = "# Title\n\nHello world.\n\n## Table\n\n| A | B |\n|---|---|\n| 1 | 2 |\n"
+    kinds = [b.kind for b in blocks_from_markdown(md)]
+    assert kinds == ["heading", "paragraph", "heading", "table"]
+
+    gen = iter_chunks(blocks_from_markdown(md))
+    first = next(gen)
+    assert first.text == "# Title\n\nHello world."
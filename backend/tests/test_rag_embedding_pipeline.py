@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from app.features.rag.services.embedding.cache import EmbeddingCache
+from app.features.rag.services.embedding.pipeline import EmbeddingPipeline, iter_batches
+from app.features.rag.services.embedding.providers import (
+    CallableEmbeddingProvider,
+    EmbeddingError,
+    StubEmbeddingProvider,
+)
+
+
+class SlowFirstBatchProvider:
+    """Finishes batches out of order and fails the first call once."""
+
+    model_version = "test-4"
+    dim = 4
+
+    def __init__(self) -> None:
+        self.calls: list[list[str]] = []
+        self.failed_once = False
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(texts)
+        if not self.failed_once:
+            self.failed_once = True
+            raise EmbeddingError("rate limited")
+        if texts[0] == "t0":
+            await asyncio.sleep(0.05)
+        return [[float(t[1:]), 0.0, 0.0, 0.0] for t in texts]
+
+
+def test_iter_batches_respects_count_and_token_budget():
+    texts = ["a" * 40] * 5  # 10 estimated tokens each
+    assert list(iter_batches(texts, max_batch_size=2, max_batch_tokens=1_000)) == [
+        (0, 2),
+        (2, 4),
+        (4, 5),
+    ]
+    assert list(iter_batches(texts, max_batch_size=10, max_batch_tokens=25)) == [
+        (0, 2),
+        (2, 4),
+        (4, 5),
+    ]
+    # an oversized text still gets a batch of its own
+    assert list(
+        iter_batches(["a" * 400, "b"], max_batch_size=10, max_batch_tokens=25)
+    ) == [(0, 1), (1, 2)]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_keeps_input_order_and_retries():
+    provider = SlowFirstBatchProvider()
+    pipeline = EmbeddingPipeline(
+        provider, max_batch_size=2, concurrency=3, backoff_base_s=0.0
+    )
+
+    texts = [f"t{i}" for i in range(7)]
+    vectors = await pipeline.embed(texts)
+
+    assert [v[0] for v in vectors] == [float(i) for i in range(7)]
+    assert len(provider.calls) == 5  # 4 batches + 1 retry
+
+
+@pytest.mark.asyncio
+async def test_stub_provider_is_deterministic():
+    provider = StubEmbeddingProvider(dim=8)
+    a, b, a2 = await provider.embed(["same", "other", "same"])
+    assert a == a2
+    assert a != b
+    assert sum(x * x for x in a) == pytest.approx(1.0)
+
+
+@pytest.mark.asyncio
+async def test_embedding_cache_only_embeds_misses(db_session):
+    calls: list[list[str]] = []
+
+    def recording_embed(texts: list[str]) -> list[list[float]]:
+        calls.append(list(texts))
+        return [[float(len(t))] * 1536 for t in texts]
+
+    embedder = EmbeddingPipeline(
+        CallableEmbeddingProvider(recording_embed, model_version="stub-1536")
+    )
+
+    vectors, stats = await EmbeddingCache().embed(
+        db_session, ["a", "bb", "a"], embedder=embedder
+    )
+    await db_session.commit()
+    assert calls == [["a", "bb"]]
+    assert [v[0] for v in vectors] == [1.0, 2.0, 1.0]
+    assert stats["embedding_cache_misses"] == 2
+
+    # fresh process-local LRU: "a" now comes from Postgres, only "ccc" is embedded
+    vectors, stats = await EmbeddingCache().embed(
+        db_session, ["a", "ccc"], embedder=embedder
+    )
+    assert calls[-1] == ["ccc"]
+    assert [v[0] for v in vectors] == [1.0, 3.0]
+    assert stats == {
+        "embedding_cache_lru_hits": 0,
+        "embedding_cache_db_hits": 1,
+        "embedding_cache_misses": 1,
+    }
@@ -5,7 +5,9 @@ from typing import Any
 
 import pytest
 from app.features.rag.api.deps import get_pdf_ingestion_service
+from app.features.rag.services.ingestion.docling_parser import ParsedDoc
 from app.features.rag.services.ingestion.service import PdfIngestionService
+from app.features.rag.services.ingestion.worker import IngestionWorker
 from app.main import app
 
 
@@ -80,6 +82,104 @@ async def test_post_ingestion_runs_returns_run(async_client):
 
     data = resp.json()
     assert data["run_id"]
-    assert data["status"] in ("SUCCEEDED", "FAILED")
+    assert data["status"] == "STARTED"
+
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_worker_processes_queued_run_and_poll_reports_it(
+    async_client, sessionmaker
+):
+    svc = PdfIngestionService(
+        parser=FakeParser(),
+        embed_fn=fake_embed,
+        embedding_model_version="stub-1536",
+        pipeline_version="v0",
+    )
+    app.dependency_overrides[get_pdf_ingestion_service] = lambda: svc
+
+    resp = await async_client.post(
+        "/rag/ingestion-runs",
+        json={
+            "run_id": uuid.uuid4().hex,
+            "source_uri": "/workspace/tests/fixtures/swagger.pdf",
+            "pipeline_version": "v0",
+        },
+    )
+    assert resp.status_code == 201, resp.text
+    run_id = resp.json()["run_id"]
+
+    worker = IngestionWorker(service=svc, session_factory=sessionmaker)
+    assert await worker.run_once() is True
+    assert await worker.run_once() is False  # queue drained
+
+    resp = await async_client.get(f"/rag/ingestion-runs/{run_id}")
+    assert resp.status_code == 200
+    assert resp.json()["status"] in ("SUCCEEDED", "FAILED")
+
+    resp = await async_client.get("/rag/ingestion-runs/does-not-exist")
+    assert resp.status_code == 404
+
+    app.dependency_overrides.clear()
+
+
+class MarkdownParser:
+    def parse(self, source_uri: str) -> ParsedDoc:
+        with open(source_uri, encoding="utf-8") as f:
+            return ParsedDoc(markdown=f.read(), title=None)
+
+
+@pytest.mark.asyncio
+async def test_batch_dedupes_by_checksum_and_reports_progress(
+    async_client, sessionmaker, tmp_path
+):
+    (tmp_path / "a.pdf").write_text("# A\n\nAlpha text.")
+    (tmp_path / "b.pdf").write_text("# A\n\nAlpha text.")  # same bytes as a.pdf
+    (tmp_path / "c.pdf").write_text("# C\n\nGamma text.")
+
+    svc = PdfIngestionService(
+        parser=MarkdownParser(),
+        embed_fn=fake_embed,
+        embedding_model_version="stub-1536",
+        pipeline_version="v0",
+    )
+    app.dependency_overrides[get_pdf_ingestion_service] = lambda: svc
+
+    resp = await async_client.post(
+        "/rag/ingestion-batches",
+        json={
+            "source_uris": [str(tmp_path / "a.pdf")],  # also matched by the glob
+            "globs": [str(tmp_path / "*.pdf")],
+            "requested_by": "spencer",
+        },
+    )
+    assert resp.status_code == 201, resp.text
+    batch = resp.json()
+    assert batch["status"] == "STARTED"
+    assert batch["total"] == 3
+    assert batch["queued"] == 3
+
+    worker = IngestionWorker(service=svc, session_factory=sessionmaker)
+    while await worker.run_once():
+        pass
+
+    resp = await async_client.get(f"/rag/ingestion-batches/{batch['run_id']}")
+    assert resp.status_code == 200
+    progress = resp.json()
+    assert progress["status"] == "SUCCEEDED"
+    assert progress["succeeded"] == 3
+    assert progress["duplicates"] == 1
+    assert progress["queued"] == progress["running"] == progress["failed"] == 0
+    assert progress["chunk_count"] >= 2
+    assert progress["finished_at"] is not None
+
+    resp = await async_client.post(
+        "/rag/ingestion-batches", json={"globs": [str(tmp_path / "*.docx")]}
+    )
+    assert resp.status_code == 422
+
+    resp = await async_client.get("/rag/ingestion-batches/does-not-exist")
+    assert resp.status_code == 404
 
     app.dependency_overrides.clear()
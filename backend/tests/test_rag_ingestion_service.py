@@ -5,8 +5,9 @@ import hashlib
 
 import pytest
 from app.features.rag.domain.models import ChunkEmbedding, Document, DocumentChunk
+from app.features.rag.repo import chunks
 from app.features.rag.repo.ingestion_runs import get_by_run_id
-from app.features.rag.services.ingestion.docling_parser import ParsedDoc
+from app.features.rag.services.ingestion.docling_parser import Block, ParsedDoc
 from app.features.rag.services.ingestion.service import PdfIngestionService
 from sqlalchemy import func, select
 
@@ -68,3 +69,232 @@ async def test_ingest_creates_document_chunks_embeddings(db_session):
         .where(ChunkEmbedding.embedding_model_version == "stub-1536")
     )).scalar_one()
     assert emb_count == chunk_count
+
+
+class MutableParser:
+    def __init__(self, markdown: str) -> None:
+        self.markdown = markdown
+
+    def parse(self, source_uri: str) -> ParsedDoc:
+        return ParsedDoc(markdown=self.markdown, title="Manual")
+
+
+def _paragraphs(*letters: str) -> str:
+    return "\n\n".join(f"{c} " * 700 for c in letters)
+
+
+@pytest.mark.asyncio
+async def test_reingest_only_touches_changed_chunks(db_session):
+    parser = MutableParser(_paragraphs("a", "b", "c", "d"))
+    svc = PdfIngestionService(
+        parser=parser,
+        embed_fn=fake_embed,
+        embedding_model_version="stub-1536",
+        pipeline_version="v0",
+    )
+    source_uri = "/workspace/tests/fixtures/manual.pdf"
+
+    first = await get_by_run_id(db_session, run_id=await svc.ingest_pdf(
+        session=db_session, source_uri=source_uri, requested_by="spencer",
+    ))
+    assert first.status == "SUCCEEDED", first.error_message
+    total = first.stats_json["chunk_count"]
+    assert first.stats_json["chunks_inserted"] == total
+
+    # unchanged file: same document, nothing written
+    again = await get_by_run_id(db_session, run_id=await svc.ingest_pdf(
+        session=db_session, source_uri=source_uri, requested_by="spencer",
+    ))
+    assert again.status == "SUCCEEDED", again.error_message
+    assert again.stats_json["doc_id"] == first.stats_json["doc_id"]
+    assert again.stats_json["chunks_inserted"] == 0
+    assert again.stats_json["chunks_deleted"] == 0
+    assert again.stats_json["chunks_unchanged"] == total
+    assert again.stats_json["embeddings_created"] == 0
+
+    # edit the tail only: the head chunks and their embeddings survive
+    parser.markdown = _paragraphs("a", "b", "c", "z")
+    edited = await get_by_run_id(db_session, run_id=await svc.ingest_pdf(
+        session=db_session, source_uri=source_uri, requested_by="spencer",
+    ))
+    assert edited.status == "SUCCEEDED", edited.error_message
+    assert edited.stats_json["chunks_unchanged"] >= 1
+    assert edited.stats_json["chunks_inserted"] >= 1
+    assert edited.stats_json["chunks_deleted"] >= 1
+    assert (
+        edited.stats_json["embeddings_created"] == edited.stats_json["chunks_inserted"]
+    )
+
+    doc_id = edited.stats_json["doc_id"]
+    chunk_count = (
+        await db_session.execute(
+            select(func.count())
+            .select_from(DocumentChunk)
+            .where(DocumentChunk.doc_id == doc_id)
+        )
+    ).scalar_one()
+    assert chunk_count == edited.stats_json["chunk_count"]
+
+
+class PagedParser:
+    def __init__(self, pages: int) -> None:
+        self.pages = pages
+        self.windows: list[tuple[int, int]] = []
+
+    def page_count(self, source_uri: str) -> int:
+        return self.pages
+
+    def parse(
+        self, source_uri: str, page_range: tuple[int, int] | None = None
+    ) -> ParsedDoc:
+        first, last = page_range or (1, self.pages)
+        self.windows.append((first, last))
+        blocks = tuple(
+            Block(
+                kind="paragraph",
+                text=f"Page {p} paragraph {i} says something. " * 20,
+                ref=f"#/texts/{p}-{i}",
+                page=p,
+            )
+            for p in range(first, last + 1)
+            for i in range(3)
+        )
+        return ParsedDoc(
+            markdown="\n\n".join(b.text for b in blocks), title="Paged", blocks=blocks
+        )
+
+
+@pytest.mark.asyncio
+async def test_large_document_is_parsed_in_windows_and_committed_in_batches(db_session):
+    parser = PagedParser(pages=10)
+    svc = PdfIngestionService(
+        parser=parser,
+        embed_fn=fake_embed,
+        embedding_model_version="stub-1536",
+        write_batch_size=4,
+        queue_depth=1,
+        parse_window_pages=3,
+    )
+
+    run = await get_by_run_id(
+        db_session,
+        run_id=await svc.ingest_pdf(
+            session=db_session,
+            source_uri="/workspace/tests/fixtures/big.pdf",
+            requested_by="spencer",
+        ),
+    )
+    assert run.status == "SUCCEEDED", run.error_message
+    assert parser.windows == [(1, 3), (4, 6), (7, 9), (10, 10)]
+
+    stats = run.stats_json
+    assert stats["page_count"] == 10
+    assert stats["write_commits"] == -(-stats["chunk_count"] // 4)
+    assert set(stats["stages"]) == {"parse", "chunk", "embed", "write"}
+    assert stats["stages"]["parse"]["blocks"] == 30
+    assert stats["stages"]["write"]["chunks"] == stats["chunk_count"]
+
+    rows = (await db_session.execute(
+        select(DocumentChunk.ordinal, DocumentChunk.page_start)
+        .where(DocumentChunk.doc_id == stats["doc_id"])
+        .order_by(DocumentChunk.ordinal)
+    )).all()
+    assert [r.ordinal for r in rows] == list(range(stats["chunk_count"]))
+    assert rows[0].page_start == 1 and rows[-1].page_start == 10
+
+    doc = (
+        await db_session.execute(
+            select(Document).where(Document.doc_id == stats["doc_id"])
+        )
+    ).scalar_one()
+    assert doc.title == "Paged"
+
+
+@pytest.mark.asyncio
+async def test_stage_failure_fails_the_run_with_the_original_error(db_session):
+    calls = 0
+
+    def flaky_embed(texts: list[str]) -> list[list[float]]:
+        nonlocal calls
+        calls += 1
+        if calls > 1:
+            raise ValueError("embedding backend exploded")
+        return fake_embed(texts)
+
+    svc = PdfIngestionService(
+        parser=PagedParser(pages=6),
+        embed_fn=flaky_embed,
+        embedding_model_version="stub-1536",
+        write_batch_size=2,
+        queue_depth=1,
+        parse_window_pages=2,
+    )
+    run = await get_by_run_id(
+        db_session,
+        run_id=await svc.ingest_pdf(
+            session=db_session,
+            source_uri="/workspace/tests/fixtures/flaky.pdf",
+            requested_by="spencer",
+        ),
+    )
+    assert run.status == "FAILED"
+    assert "embedding backend exploded" in run.error_message
+
+
+@pytest.mark.asyncio
+async def test_reingest_after_a_failed_write_renumbers_every_chunk(
+    db_session, monkeypatch
+):
+    parser = MutableParser(_paragraphs("a", "b", "c", "d", "e"))
+    svc = PdfIngestionService(
+        parser=parser,
+        embed_fn=fake_embed,
+        embedding_model_version="stub-1536",
+        write_batch_size=2,
+        queue_depth=1,
+    )
+    source_uri = "/workspace/tests/fixtures/renumbered.pdf"
+    first = await get_by_run_id(db_session, run_id=await svc.ingest_pdf(
+        session=db_session, source_uri=source_uri, requested_by="spencer",
+    ))
+    assert first.status == "SUCCEEDED", first.error_message
+    doc_id = first.stats_json["doc_id"]
+
+    # the first batch of the edited file is committed, the second one fails:
+    # two chunks hold final ordinals and the five old ones are left parked
+    bulk_insert = chunks.bulk_insert
+    writes = 0
+
+    async def failing_bulk_insert(*args, **kwargs):
+        nonlocal writes
+        writes += 1
+        if writes > 1:
+            raise ValueError("disk full")
+        await bulk_insert(*args, **kwargs)
+
+    monkeypatch.setattr(chunks, "bulk_insert", failing_bulk_insert)
+    parser.markdown = _paragraphs("x", "a", "y", "b", "c", "d", "e")
+    failed = await get_by_run_id(db_session, run_id=await svc.ingest_pdf(
+        session=db_session, source_uri=source_uri, requested_by="spencer",
+    ))
+    assert failed.status == "FAILED"
+    parked = (await db_session.execute(
+        select(func.count()).select_from(DocumentChunk)
+        .where(DocumentChunk.doc_id == doc_id)
+        .where(DocumentChunk.ordinal < 0)
+    )).scalar_one()
+    assert parked == 5
+
+    monkeypatch.setattr(chunks, "bulk_insert", bulk_insert)
+    retried = await get_by_run_id(db_session, run_id=await svc.ingest_pdf(
+        session=db_session, source_uri=source_uri, requested_by="spencer",
+    ))
+    assert retried.status == "SUCCEEDED", retried.error_message
+    assert retried.stats_json["chunk_count"] == 7
+
+    ordinals = (await db_session.execute(
+        select(DocumentChunk.ordinal)
+        .where(DocumentChunk.doc_id == doc_id)
+        .order_by(DocumentChunk.ordinal)
+    )).scalars().all()
+    assert ordinals == list(range(7))
@@ -0,0 +1,70 @@
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from app.features.rag.services.ingestion.docling_parser import ParsedDoc
+from app.features.rag.services.ingestion.parser_pool import ProcessPoolPdfParser
+
+
+class PidParser:
+    """Built in each pool process; reports which process parsed the file."""
+
+    def page_count(self, source_uri: str) -> int | None:
+        return 7
+
+    def parse(
+        self, source_uri: str, page_range: tuple[int, int] | None = None
+    ) -> ParsedDoc:
+        if source_uri.endswith("corrupt.pdf"):
+            raise ValueError(f"cannot parse {source_uri}")
+        if source_uri.endswith("oom.pdf"):
+            os._exit(1)
+        return ParsedDoc(markdown=f"{source_uri} {page_range}", title=str(os.getpid()))
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+@pytest.mark.asyncio
+async def test_pool_parses_in_a_separate_process():
+    parser = ProcessPoolPdfParser(max_workers=1, parser_factory=PidParser)
+    try:
+        parsed = await parser.parse("/docs/a.pdf", (3, 4))
+        assert parsed.markdown == "/docs/a.pdf (3, 4)"
+        assert int(parsed.title) != os.getpid()
+        assert await parser.page_count("/docs/a.pdf") == 7
+    finally:
+        parser.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_worker_errors_reach_the_caller_and_the_pool_keeps_going():
+    parser = ProcessPoolPdfParser(max_workers=1, parser_factory=PidParser)
+    try:
+        with pytest.raises(ValueError, match="cannot parse /docs/corrupt.pdf"):
+            await parser.parse("/docs/corrupt.pdf")
+        worker = int((await parser.parse("/docs/a.pdf")).title)
+
+        # a worker that dies takes the pool with it; the next job gets a new one
+        with pytest.raises(BrokenProcessPool):
+            await parser.parse("/docs/oom.pdf")
+        assert int((await parser.parse("/docs/a.pdf")).title) != worker
+    finally:
+        parser.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_shutdown_stops_the_pool_processes():
+    parser = ProcessPoolPdfParser(max_workers=1, parser_factory=PidParser)
+    worker = int((await parser.parse("/docs/a.pdf")).title)
+    assert _alive(worker)
+
+    parser.shutdown()
+    assert not _alive(worker)
+    assert await parser.refresh_stats() == []
+    parser.shutdown()  # a second call is a no-op
@@ -0,0 +1,13 @@
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_parser_status_reports_lazy_registry(async_client):
+    resp = await async_client.get("/rag/parser/status")
+    assert resp.status_code == 200, resp.text
+
+    data = resp.json()
+    # nothing has parsed yet in the API process, so the converter was never built
+    assert data["api_process"]["loaded"] is False
+    assert data["api_process"]["load_seconds"] is None
+    assert data["pool_processes"] == []
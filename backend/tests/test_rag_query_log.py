@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from app.features.rag.domain.models import RagQuerySession, RetrievalLog
+from app.features.rag.domain.schemas import RetrievalResultDTO
+from app.features.rag.services.query_log.sink import QueryLogSink
+from sqlalchemy import func, select
+
+
+async def _count(db_session, model) -> int:
+    return (
+        await db_session.execute(select(func.count()).select_from(model))
+    ).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_sink_batches_rows_and_drains_on_close(sessionmaker, db_session):
+    sink = QueryLogSink(sessionmaker, max_batch=10, flush_interval_s=60)
+    hit = RetrievalResultDTO(chunk_id="doc-1:0", doc_id="doc-1", score=0.9)
+
+    for i in range(25):
+        assert await sink.log_retrieval(
+            retrieval_id=f"r-{i}",
+            query_text="fan",
+            embedding_model_version="stub-1536",
+            top_k=1,
+            results=[hit],
+            params={"top_k": 1, "doc_ids": ["doc-1"]},
+        )
+    await sink.log_session(
+        session_id="s-1",
+        query_text="fan",
+        embedding_model_version="stub-1536",
+        citations=[hit],
+    )
+    await sink.close()
+
+    assert sink.stats.submitted == 26
+    assert sink.stats.written == 26
+    # max_batch, not the 60s interval, triggered the first writes
+    assert sink.stats.flushes >= 3
+    assert await _count(db_session, RetrievalLog) == 25
+    assert await _count(db_session, RagQuerySession) == 1
+    log = (
+        await db_session.execute(
+            select(RetrievalLog).where(RetrievalLog.retrieval_id == "r-0")
+        )
+    ).scalar_one()
+    assert log.doc_id == "doc-1"
+    assert log.results_json["results"] == [
+        {"chunk_id": "doc-1:0", "doc_id": "doc-1", "score": 0.9}
+    ]
+
+    # closed: further rows are refused, not queued forever
+    assert not await sink.log_session(
+        session_id="s-2",
+        query_text="fan",
+        embedding_model_version="stub-1536",
+        citations=[],
+    )
+    assert sink.stats.dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_sink_drops_when_full_instead_of_blocking(sessionmaker, db_session):
+    sink = QueryLogSink(sessionmaker, max_pending=2, flush_interval_s=60)
+
+    # nothing awaits in between, so the flusher never gets to empty the queue
+    accepted = [
+        await sink.log_session(
+            session_id=f"s-{i}",
+            query_text="q",
+            embedding_model_version="stub-1536",
+            citations=[],
+        )
+        for i in range(4)
+    ]
+    assert accepted == [True, True, False, False]
+    assert sink.stats.dropped == 2
+
+    await sink.close()
+    assert await _count(db_session, RagQuerySession) == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("yields", [0, 1, 2, 3])
+async def test_flush_writes_rows_the_flusher_is_waiting_on(
+    sessionmaker, db_session, yields
+):
+    sink = QueryLogSink(sessionmaker, max_batch=10, flush_interval_s=60)
+    await sink.log_session(
+        session_id="s-0",
+        query_text="q",
+        embedding_model_version="stub-1536",
+        citations=[],
+    )
+    # the flusher is now waiting for the batch to fill
+    await asyncio.sleep(0.01)
+    await sink.log_session(
+        session_id="s-1",
+        query_text="q",
+        embedding_model_version="stub-1536",
+        citations=[],
+    )
+    # flush at any point while the flusher handles the second row
+    for _ in range(yields):
+        await asyncio.sleep(0)
+
+    await sink.flush()
+    assert sink.stats.written == sink.stats.submitted == 2
+    assert await _count(db_session, RagQuerySession) == 2
+    await sink.close()
@@ -0,0 +1,562 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+from app.core import cache as core_cache
+from app.features.rag.api.deps import get_llm_client, get_retrieval_service
+from app.features.rag.domain.models import RagQuerySession, RetrievalLog
+from app.features.rag.domain.schemas import RetrievalResultDTO
+from app.features.rag.repo import chunks, corpus, documents, embeddings
+from app.features.rag.services.embedding.providers import CallableEmbeddingProvider
+from app.features.rag.services.generation.llm import FakeLLMClient
+from app.features.rag.services.generation.prompt import build_prompt
+from app.features.rag.services.retrieval.cache import RetrievalCache
+from app.features.rag.services.retrieval.rerank import LexicalReranker, RerankStage
+from app.features.rag.services.retrieval.service import (
+    RetrievalService,
+    reciprocal_rank_fusion,
+)
+from app.main import app
+from sqlalchemy import select
+
+
+def one_hot_embed(texts: list[str]) -> list[list[float]]:
+    # identical text -> identical axis, different text -> (almost surely) orthogonal
+    out = []
+    for t in texts:
+        v = [0.0] * 1536
+        v[int(hashlib.sha256(t.encode("utf-8")).hexdigest(), 16) % 1536] = 1.0
+        out.append(v)
+    return out
+
+
+async def _seed(
+    db_session,
+    texts: list[str],
+    *,
+    doc_id: str = "doc-1",
+    source_type: str = "pdf",
+    source_uri: str = "/docs/manual.pdf",
+) -> None:
+    await documents.create(
+        db_session,
+        doc_id=doc_id,
+        source_type=source_type,
+        source_uri=source_uri,
+        title="Manual",
+        checksum=None,
+        metadata_json={},
+    )
+    created = await chunks.bulk_create(
+        db_session,
+        doc_id=doc_id,
+        rows=[
+            {
+                "chunk_id": f"{doc_id}:{i}",
+                "ordinal": i,
+                "content": t,
+                "page_start": i + 1,
+                "metadata_json": {},
+            }
+            for i, t in enumerate(texts)
+        ],
+    )
+    await embeddings.bulk_create(
+        db_session,
+        doc_id=doc_id,
+        source_type=source_type,
+        rows=[
+            {
+                "chunk_id": c.chunk_id,
+                "embedding_model_version": "stub-1536",
+                "embedding": v,
+            }
+            for c, v in zip(created, one_hot_embed(texts), strict=True)
+        ],
+    )
+    await db_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_rag_query_returns_nearest_chunks(async_client, db_session):
+    await _seed(
+        db_session,
+        ["reset the router", "replace the fan", "error E42 means overheating"],
+    )
+
+    app.dependency_overrides[get_retrieval_service] = lambda: RetrievalService(
+        provider=CallableEmbeddingProvider(one_hot_embed, model_version="stub-1536"),
+    )
+
+    resp = await async_client.post(
+        "/rag/query",
+        json={
+            "query_text": "error E42 means overheating",
+            "embedding_model_version": "stub-1536",
+            "top_k": 2,
+            "ef_search": 100,
+        },
+    )
+    assert resp.status_code == 200, resp.text
+
+    citations = resp.json()["citations"]
+    assert len(citations) == 2
+    assert citations[0]["chunk_id"] == "doc-1:2"
+    assert citations[0]["score"] == pytest.approx(1.0)
+    assert citations[0]["deep_link"] == "/docs/manual.pdf#page=3"
+
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("precision", ["half", "binary"])
+async def test_quantized_search_reranks_on_full_vectors(db_session, precision):
+    await _seed(
+        db_session,
+        ["reset the router", "replace the fan", "error E42 means overheating"],
+    )
+    svc = RetrievalService(
+        provider=CallableEmbeddingProvider(one_hot_embed, model_version="stub-1536"),
+        precision=precision,
+        rerank_oversample=3,
+    )
+
+    results = await svc.retrieve(
+        session=db_session,
+        query_text="replace the fan",
+        embedding_model_version="stub-1536",
+        top_k=2,
+        ef_search=100,
+    )
+    assert len(results) == 2
+    assert results[0].chunk_id == "doc-1:1"
+    # scores come from the float32 re-rank, not the quantized pass
+    assert results[0].score == pytest.approx(1.0)
+    assert results[1].score == pytest.approx(0.0)
+
+
+@pytest.mark.asyncio
+async def test_missing_model_indexes_reports_models_without_a_migration(db_session):
+    # stub-1536 is indexed by the schema; a model only added in config is not
+    assert await embeddings.missing_model_indexes(db_session, ["stub-1536"]) == []
+    missing = await embeddings.missing_model_indexes(
+        db_session, ["stub-1536", "new-768"]
+    )
+    assert missing == [
+        "ix_chunk_embeddings_hnsw_cosine_new_768",
+        "ix_chunk_embeddings_hnsw_ip_new_768",
+    ]
+    assert await embeddings.vector_extension_version(db_session) >= (0, 5)
+
+
+@pytest.mark.asyncio
+async def test_rag_query_rejects_unknown_model_version(async_client):
+    resp = await async_client.post(
+        "/rag/query",
+        json={"query_text": "anything", "embedding_model_version": "other-model"},
+    )
+    assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_hybrid_query_finds_exact_terms_vectors_miss(async_client, db_session):
+    await _seed(
+        db_session,
+        ["reset the router", "replace the fan", "error E42 means overheating"],
+    )
+
+    app.dependency_overrides[get_retrieval_service] = lambda: RetrievalService(
+        provider=CallableEmbeddingProvider(one_hot_embed, model_version="stub-1536"),
+    )
+    # the one-hot query vector is orthogonal to every chunk: only the keyword side
+    # can rank them
+    body = {
+        "query_text": "what does E42 mean?",
+        "embedding_model_version": "stub-1536",
+        "top_k": 3,
+    }
+
+    resp = await async_client.post("/rag/query", json={**body, "mode": "keyword"})
+    assert resp.status_code == 200, resp.text
+    citations = resp.json()["citations"]
+    assert [c["chunk_id"] for c in citations] == ["doc-1:2"]
+
+    resp = await async_client.post("/rag/query", json={**body, "mode": "hybrid"})
+    assert resp.status_code == 200, resp.text
+    citations = resp.json()["citations"]
+    assert citations[0]["chunk_id"] == "doc-1:2"
+    assert citations[0]["metadata_json"]["keyword_rank"] == 1
+    assert len(citations) == 3
+
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_rag_query_filters_inside_the_scan(async_client, db_session):
+    await _seed(db_session, ["reset the router", "replace the fan"])
+    await _seed(
+        db_session,
+        ["replace the fan", "clean the filter"],
+        doc_id="doc-2",
+        source_type="markdown",
+        source_uri="/docs/notes.md",
+    )
+
+    app.dependency_overrides[get_retrieval_service] = lambda: RetrievalService(
+        provider=CallableEmbeddingProvider(one_hot_embed, model_version="stub-1536"),
+    )
+    body = {
+        "query_text": "replace the fan",
+        "embedding_model_version": "stub-1536",
+        "top_k": 2,
+        "ef_search": 100,
+    }
+
+    for filters, expected in (
+        ({"doc_ids": ["doc-2"]}, "doc-2:0"),
+        ({"source_types": ["pdf"]}, "doc-1:1"),
+    ):
+        for mode in ("vector", "keyword"):
+            resp = await async_client.post(
+                "/rag/query", json={**body, **filters, "mode": mode}
+            )
+            assert resp.status_code == 200, resp.text
+            citations = resp.json()["citations"]
+            assert citations[0]["chunk_id"] == expected, (filters, mode)
+            assert {c["doc_id"] for c in citations} == {expected.split(":")[0]}
+
+    resp = await async_client.post(
+        "/rag/query", json={**body, "ingested_before": "2000-01-01T00:00:00Z"}
+    )
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["citations"] == []
+
+    app.dependency_overrides.clear()
+
+
+def _sse_events(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for frame in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in frame.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+@pytest.mark.asyncio
+async def test_rag_query_stream_sends_citations_then_tokens_and_persists(
+    async_client, db_session, query_log
+):
+    await _seed(
+        db_session,
+        ["reset the router", "replace the fan", "error E42 means overheating"],
+    )
+    llm = FakeLLMClient(answer="Overheating, see [1].", model_version="fake-1")
+    app.dependency_overrides[get_retrieval_service] = lambda: RetrievalService(
+        provider=CallableEmbeddingProvider(one_hot_embed, model_version="stub-1536"),
+    )
+    app.dependency_overrides[get_llm_client] = lambda: llm
+
+    resp = await async_client.post(
+        "/rag/query/stream",
+        json={
+            "query_text": "error E42 means overheating",
+            "embedding_model_version": "stub-1536",
+            "top_k": 1,
+        },
+    )
+    assert resp.status_code == 200, resp.text
+    assert resp.headers["content-type"].startswith("text/event-stream")
+
+    events = _sse_events(resp.text)
+    names = [name for name, _ in events]
+    assert names == ["citations", "token", "token", "token", "done"]
+    session_id = events[0][1]["session_id"]
+    assert [c["chunk_id"] for c in events[0][1]["citations"]] == ["doc-1:2"]
+    assert (
+        "".join(data["text"] for name, data in events if name == "token")
+        == "Overheating, see [1]."
+    )
+    assert "[1] (/docs/manual.pdf)\nerror E42 means overheating" in llm.prompts[0]
+
+    await query_log.flush()
+    row = (
+        await db_session.execute(
+            select(RagQuerySession).where(RagQuerySession.session_id == session_id)
+        )
+    ).scalar_one()
+    assert row.answer_text == "Overheating, see [1]."
+    assert row.answer_model_version == "fake-1"
+    assert row.citations_json["finish_reason"] == "stop"
+    assert [c["chunk_id"] for c in row.citations_json["citations"]] == ["doc-1:2"]
+
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_rag_query_stream_rejects_unknown_model_before_streaming(async_client):
+    resp = await async_client.post(
+        "/rag/query/stream",
+        json={"query_text": "anything", "embedding_model_version": "other-model"},
+    )
+    assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_rag_query_reranks_overfetched_candidates_and_logs_timing(
+    async_client, db_session, query_log
+):
+    await _seed(
+        db_session,
+        ["reset the router", "replace the fan", "error E42 means overheating"],
+    )
+    pool = ThreadPoolExecutor(max_workers=1)
+    app.dependency_overrides[get_retrieval_service] = lambda: RetrievalService(
+        provider=CallableEmbeddingProvider(one_hot_embed, model_version="stub-1536"),
+        reranker=RerankStage(
+            LexicalReranker(), executor=pool, batch_size=2, budget_s=5
+        ),
+        rerank_candidates=3,
+    )
+    # the query vector matches no chunk, so only the reranker can put E42 first
+    body = {
+        "query_text": "what does E42 mean",
+        "embedding_model_version": "stub-1536",
+        "top_k": 1,
+        "ef_search": 100,
+    }
+
+    resp = await async_client.post("/rag/query", json=body)
+    assert resp.status_code == 200, resp.text
+    citations = resp.json()["citations"]
+    assert [c["chunk_id"] for c in citations] == ["doc-1:2"]
+    assert citations[0]["metadata_json"]["rerank_rank"] == 1
+
+    await query_log.flush()
+    log = (await db_session.execute(select(RetrievalLog))).scalar_one()
+    timing = log.results_json["trace"]["rerank"]
+    assert timing["reranker"] == "lexical-bm25"
+    assert (timing["candidates"], timing["scored"], timing["batches"]) == (3, 3, 2)
+
+    resp = await async_client.post("/rag/query", json={**body, "rerank": False})
+    assert "rerank_rank" not in resp.json()["citations"][0]["metadata_json"]
+
+    pool.shutdown()
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_rerank_stage_keeps_retrieval_order_for_batches_over_budget():
+    release = threading.Event()
+
+    class SlowOnSecondBatch:
+        name = "slow"
+
+        def prepare(self, query: str, passages: list[str]):
+            return self.score
+
+        def score(self, passages: list[str]) -> list[float]:
+            if "late" in passages[0]:
+                release.wait(5)
+            return [float(len(p)) for p in passages]
+
+    candidates = [
+        RetrievalResultDTO(chunk_id=f"c{i}", doc_id="d", score=1.0, snippet=text)
+        for i, text in enumerate(["a", "bbb", "late", "late-too"])
+    ]
+    pool = ThreadPoolExecutor(max_workers=2)
+    stage = RerankStage(SlowOnSecondBatch(), executor=pool, batch_size=2, budget_s=0.2)
+    try:
+        results, timing = await stage.rerank("q", candidates, top_k=4)
+    finally:
+        release.set()
+        pool.shutdown()
+
+    assert [r.chunk_id for r in results] == ["c1", "c0", "c2", "c3"]
+    assert results[0].metadata_json["rerank_score"] == 3.0
+    assert "rerank_score" not in results[2].metadata_json
+    assert timing["scored"] == 2
+    assert timing["batches_over_budget"] == 1
+
+
+@pytest.mark.asyncio
+async def test_rerank_stage_leaves_batches_after_an_unfinished_one_in_order():
+    release = threading.Event()
+
+    class SlowOnFirstBatch:
+        name = "slow"
+
+        def prepare(self, query: str, passages: list[str]):
+            return self.score
+
+        def score(self, passages: list[str]) -> list[float]:
+            if "early" in passages[0]:
+                release.wait(5)
+            return [float(len(p)) for p in passages]
+
+    candidates = [
+        RetrievalResultDTO(chunk_id=f"c{i}", doc_id="d", score=1.0, snippet=text)
+        for i, text in enumerate(["early", "e", "much-longer", "longest-of-all"])
+    ]
+    pool = ThreadPoolExecutor(max_workers=2)
+    stage = RerankStage(SlowOnFirstBatch(), executor=pool, batch_size=2, budget_s=0.2)
+    try:
+        results, timing = await stage.rerank("q", candidates, top_k=4)
+    finally:
+        release.set()
+        pool.shutdown()
+
+    # the second batch was scored in time, but can't jump the unscored first one
+    assert [r.chunk_id for r in results] == ["c0", "c1", "c2", "c3"]
+    assert all("rerank_score" not in r.metadata_json for r in results)
+    assert timing["scored"] == 0
+    assert timing["batches_over_budget"] == 1
+
+
+@pytest.mark.asyncio
+async def test_lexical_rerank_scores_full_content_independently_of_batch_size():
+    filler = "lorem ipsum " * 60
+    candidates = [
+        RetrievalResultDTO(
+            chunk_id=f"c{i}",
+            doc_id="d",
+            score=1.0,
+            snippet=text[:20],
+            content=text,
+        )
+        for i, text in enumerate(
+            [
+                "fan noise " + filler,
+                filler + "error E42 means overheating",
+                "error codes " + filler,
+                "reset the router " + filler + "error",
+                "E42 E42 " + filler,
+            ]
+        )
+    ]
+    ranked = []
+    pool = ThreadPoolExecutor(max_workers=2)
+    try:
+        for batch_size in (1, 2, 16):
+            stage = RerankStage(
+                LexicalReranker(), executor=pool, batch_size=batch_size, budget_s=5
+            )
+            results, _ = await stage.rerank("error E42", candidates, top_k=5)
+            ranked.append(
+                [(r.chunk_id, r.metadata_json["rerank_score"]) for r in results]
+            )
+    finally:
+        pool.shutdown()
+
+    assert ranked[0] == ranked[1] == ranked[2]
+    # "E42" is past the 20-char snippet: only the full text ranks these first
+    assert {chunk_id for chunk_id, _ in ranked[0][:2]} == {"c1", "c4"}
+    assert "content" not in candidates[0].model_dump()
+
+
+def test_prompt_uses_whole_chunks_and_cuts_only_at_the_budget():
+    long_chunk = "x" * 700 + " the answer is 42"
+    citations = [
+        RetrievalResultDTO(
+            chunk_id=f"c{i}", doc_id="d", score=1.0, snippet=text[:500], content=text
+        )
+        for i, text in enumerate([long_chunk, "y" * 300, "never reached"])
+    ]
+
+    prompt = build_prompt("what is it?", citations, max_context_chars=1000)
+    assert long_chunk in prompt
+    assert "[2] (d)\n" + "y" * (1000 - len(long_chunk)) + "\n" in prompt
+    assert "never reached" not in prompt
+
+
+def test_reciprocal_rank_fusion_weights_lists():
+    a, b, c = (SimpleNamespace(chunk_id=x) for x in "abc")
+    vector, keyword = [a, b], [c, b]
+
+    fused = reciprocal_rank_fusion([(vector, 1.0), (keyword, 1.0)], k=60)
+    # in both lists beats rank 1 in one
+    assert [h.row.chunk_id for h in fused] == ["b", "a", "c"]
+    assert fused[0].ranks == [2, 2]
+
+    fused = reciprocal_rank_fusion([(vector, 0.0), (keyword, 1.0)], k=60)
+    assert [h.row.chunk_id for h in fused][:2] == ["c", "b"]
+
+
+@pytest.mark.asyncio
+async def test_cached_query_reuses_vector_and_results_until_corpus_changes(db_session):
+    await _seed(
+        db_session,
+        ["reset the router", "replace the fan", "error E42 means overheating"],
+    )
+
+    embedded: list[str] = []
+
+    def counting_embed(texts: list[str]) -> list[list[float]]:
+        embedded.extend(texts)
+        return one_hot_embed(texts)
+
+    svc = RetrievalService(
+        provider=CallableEmbeddingProvider(counting_embed, model_version="stub-1536"),
+        cache=RetrievalCache(version_check_s=0),
+    )
+
+    async def query(text: str) -> list[str]:
+        results = await svc.retrieve(
+            session=db_session,
+            query_text=text,
+            embedding_model_version="stub-1536",
+            top_k=1,
+            mode="keyword",
+        )
+        return [r.chunk_id for r in results]
+
+    async def vector_query(text: str) -> list[str]:
+        results = await svc.retrieve(
+            session=db_session,
+            query_text=text,
+            embedding_model_version="stub-1536",
+            top_k=1,
+            ef_search=100,
+        )
+        return [r.chunk_id for r in results]
+
+    assert await vector_query("replace the fan") == ["doc-1:1"]
+    assert await vector_query("  Replace  the FAN ") == ["doc-1:1"]
+    assert embedded == ["replace the fan"]  # second query hit the vector cache
+
+    assert await query("fan") == ["doc-1:1"]
+    await chunks.bulk_create(
+        db_session,
+        doc_id="doc-1",
+        rows=[
+            {
+                "chunk_id": "doc-1:3",
+                "ordinal": 3,
+                "content": "fan fan fan",
+                "metadata_json": {},
+            }
+        ],
+    )
+    await db_session.commit()
+    assert await query("fan") == ["doc-1:1"]  # corpus version unchanged: cached
+
+    await corpus.bump_version(db_session)
+    await db_session.commit()
+    assert await query("fan") == ["doc-1:3"]
+
+
+def test_lru_cache_ttl_expires_entries(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(core_cache.time, "monotonic", lambda: now[0])
+    lru = core_cache.LRUCache(2, ttl_s=10)
+
+    lru.put("a", 1)
+    now[0] += 5
+    assert lru.get("a") == 1
+    now[0] += 6
+    assert lru.get("a") is None
+    assert len(lru) == 0